@@ -0,0 +1,184 @@
+import csv
+import json
+import sys
+
+import numpy as np
+
+from viz import load_log, get_log_files, recipient_rows, RECEIVED, CACHE_DIR
+
+# summary statistics of a run computed from its parsed logs (see viz.parse_log) with array operations, so runs with
+# tens of millions of events can be compared without plotting them:
+#   - the distribution of each machine's clock jumps (how much its clock moves from one event to the next)
+#   - the logical clock drift between every pair of machines over global time
+#   - queue wait times: how long messages sent to a machine waited before it consumed them
+#   - throughput: events, sends and receives per second
+# usage: python analysis.py [LOG_NAME]   writes logs/analysis<LOG_NAME>.json (everything) and .csv (one row per machine)
+
+LOG_NAME = "LOG"
+# percentiles reported for clock jumps and queue wait times
+PERCENTILES = [50, 90, 99]
+
+def percentiles(values) -> dict:
+    if not len(values):
+        return {f"p{p}": 0. for p in PERCENTILES}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+# the clocks of machines a and b at every event of either, in time order: returns the event times, a's clock and b's
+# clock (the last value each logged at or before each event, or its first value before it has logged anything). Both logs are already sorted by time, so a stable sort of
+# the two concatenated is a linear merge, much cheaper than a binary search per event on large logs
+def aligned(a, b):
+    times = np.concatenate((a["time"], b["time"]))
+    order = np.argsort(times, kind="stable")
+    fromA = order < len(a["time"])
+    latestA = np.maximum(np.cumsum(fromA) - 1, 0)
+    latestB = np.maximum(np.cumsum(~fromA) - 1, 0)
+    return times[order], a["clock"][latestA], b["clock"][latestB]
+
+def clock_jumps(log: dict) -> dict:
+    """
+    The distribution of a machine's clock jumps between consecutive events: 1 for an internal event or a send, more
+    when a received message pulls the clock forward. "histogram" maps each jump size seen to how often it happened.
+    """
+    jumps = np.diff(log["clock"])
+    sizes, counts = np.unique(jumps, return_counts=True)
+    return {"mean": float(jumps.mean()) if len(jumps) else 0., "max": int(jumps.max()) if len(jumps) else 0,
+            **percentiles(jumps), "histogram": {int(s): int(c) for s, c in zip(sizes, counts)}}
+
+def common_start(logs: list) -> float:
+    # the first time every machine has logged something, from which their clocks can be compared
+    return max((log["time"][0] for log in logs if len(log["time"])), default=0.)
+
+def drift(a: dict, b: dict, start: float = 0.) -> dict:
+    """
+    The clock of machine a minus the clock of machine b over global time (from start), evaluated at every event of
+    either: its largest and mean absolute value, and its value at the end of the run.
+    """
+    if not len(a["time"]) or not len(b["time"]):
+        return {"max": 0, "mean": 0., "final": 0}
+    ts, clockA, clockB = aligned(a, b)
+    during = ts >= start
+    if not during.any():
+        return {"max": 0, "mean": 0., "final": 0}
+    diff = clockA[during] - clockB[during]
+    return {"max": int(np.abs(diff).max()), "mean": float(np.abs(diff).mean()), "final": int(diff[-1])}
+
+def max_behind(logs: list) -> list:
+    """
+    For each machine, the largest amount its clock was behind the largest clock in the system at any of its events.
+    """
+    start = common_start(logs)
+    # every machine's clock only goes up, so the largest clock in the system at an event is the largest clock value
+    # logged by anyone up to then: a running maximum over all the logs merged in time order
+    times = np.concatenate([log["time"] for log in logs])
+    order = np.argsort(times, kind="stable")
+    running = np.maximum.accumulate(np.concatenate([log["clock"] for log in logs])[order])
+    # events logged at the same time all see the running maximum after the last of them, whatever their pids
+    last = np.searchsorted(times[order], times[order], side="right") - 1
+    fastest = np.empty(len(order), dtype=np.int64)
+    fastest[order] = running[last]
+    result = []
+    offset = 0
+    for log in logs:
+        n = len(log["time"])
+        during = log["time"] >= start
+        behind = fastest[offset:offset + n] - log["clock"]
+        result.append(int(behind[during].max()) if during.any() else 0)
+        offset += n
+    return result
+
+def wait_times(logs: list, pid: int):
+    """
+    How long each message sent to machine pid waited (in seconds) before pid consumed it. Receive events do not name
+    the sender, but a machine has a single FIFO queue and messages reach it over loopback almost as soon as they are
+    sent, so the k-th message sent to pid (ordered by send time, across all senders) is the k-th one it consumes.
+    Messages still queued when the logs end are left out, and so are any a bounded queue dropped, which would shift
+    the matching (see OVERFLOW_POLICY in process.py).
+    """
+    sends = [log["time"][recipient_rows(log)[log["recipient_pids"] == pid]] for log in logs]
+    sent = np.sort(np.concatenate(sends)) if sends else np.zeros(0)
+    log = logs[pid]
+    received = log["event"] == RECEIVED
+    # a batched receive consumes several messages at once
+    consumed = np.repeat(log["time"][received], log["messages"][received])
+    n = min(len(sent), len(consumed))
+    return consumed[:n] - sent[:n]
+
+def throughput(log: dict) -> dict:
+    """
+    Events, sends (counting every recipient), and messages received per second over the span of the log.
+    """
+    span = log["time"][-1] - log["time"][0] if len(log["time"]) > 1 else 0.
+    recipients = int(log["recipient_count"].sum())
+    rate = lambda count: float(count / span) if span else 0.
+    return {"duration": float(span), "events_per_second": rate(len(log["time"])),
+            "messages_sent_per_second": rate(recipients),
+            "messages_received_per_second": rate(log["messages"][log["event"] == RECEIVED].sum())}
+
+def analyze(logs: dict) -> dict:
+    """
+    All statistics for a run, from a dict of pid to parsed log (as returned by viz.parse_log or viz.load_log).
+    """
+    pids = list(logs)
+    parsed = [logs[pid] for pid in pids]
+    start = common_start(parsed)
+    behind = max_behind(parsed)
+    machines = {}
+    for i, pid in enumerate(pids):
+        waits = wait_times(parsed, i)
+        # the queue length is only logged by receives (-1 otherwise)
+        received = parsed[i]["queue"][parsed[i]["event"] == RECEIVED]
+        machines[pid] = {
+            "ticks": parsed[i]["ticks"],
+            "events": len(parsed[i]["clock"]),
+            "max_behind": behind[i],
+            "max_queue": int(received.max()) if len(received) else 0,
+            "jumps": clock_jumps(parsed[i]),
+            "wait": {"mean": float(waits.mean()) if len(waits) else 0., **percentiles(waits),
+                     "max": float(waits.max()) if len(waits) else 0., "matched": len(waits)},
+            "throughput": throughput(parsed[i]),
+        }
+    pairs = {f"{a}-{b}": drift(logs[a], logs[b], start) for i, a in enumerate(pids) for b in pids[i + 1:]}
+    return {"machines": machines, "drift": pairs}
+
+# one flat row per machine, nested statistics joined with underscores (e.g. jumps_p99); the jump histogram and pairwise
+# drift are only in the JSON output
+def machine_rows(result: dict) -> list:
+    rows = []
+    for pid, stats in result["machines"].items():
+        row = {"pid": pid}
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                row.update({f"{key}_{k}": v for k, v in value.items() if k != "histogram"})
+            else:
+                row[key] = value
+        rows.append(row)
+    return rows
+
+def write_json(result: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+
+def write_csv(result: dict, path: str):
+    rows = machine_rows(result)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        LOG_NAME = str(sys.argv[1])
+
+    logs = {pid: load_log(f, CACHE_DIR) for pid, f in get_log_files(LOG_NAME).items()}
+    if not logs:
+        print(f"no logs found for {LOG_NAME}")
+        sys.exit(1)
+    result = analyze(logs)
+    write_json(result, f"logs/analysis{LOG_NAME}.json")
+    write_csv(result, f"logs/analysis{LOG_NAME}.csv")
+    for row in machine_rows(result):
+        print(f"machine {row['pid']}: {row['ticks']} ticks/s, mean jump {row['jumps_mean']:.2f}, "
+              f"max behind {row['max_behind']}, mean wait {row['wait_mean'] * 1e3:.1f} ms, max queue {row['max_queue']}")
+    for pair, stats in result["drift"].items():
+        print(f"drift {pair}: max {stats['max']}, mean {stats['mean']:.1f}, final {stats['final']}")
+    print(f"wrote logs/analysis{LOG_NAME}.json and logs/analysis{LOG_NAME}.csv")
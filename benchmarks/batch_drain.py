@@ -0,0 +1,24 @@
+import sys
+
+from simulation import simulate
+
+# compares the strict one-message-per-tick model with batch draining in the virtual-time simulator: average queue
+# length (which, by Little's law, is proportional to how long messages wait) and average clock jump per receive
+# usage: python -m benchmarks.batch_drain [DURATION]
+
+BATCH_SIZES = [1, 2, 4, 0]
+# the slow machine falls behind the two fast ones, which is where batching matters
+TICKS = [1, 5, 6]
+DURATION = 600
+SEED = 0
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        DURATION = float(sys.argv[1])
+
+    print(f"{'batch':>6} {'machine':>8} {'ticks/s':>8} {'mean queue':>11} {'mean jump':>10}")
+    for batchSize in BATCH_SIZES:
+        result = simulate(DURATION, SEED, ticks=TICKS, logDir=None, batchSize=batchSize)
+        for pid in range(len(TICKS)):
+            label = "all" if batchSize == 0 else batchSize
+            print(f"{label:>6} {pid:>8} {TICKS[pid]:>8} {result['meanQueue'][pid]:>11.2f} {result['meanJump'][pid]:>10.2f}")
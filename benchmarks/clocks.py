@@ -0,0 +1,31 @@
+import sys
+import time
+
+from simulation import simulate
+from clocks import CLOCKS
+
+# per-message cost of each clock implementation in the virtual-time simulator: wall time per simulated message and
+# 64-bit words put on the wire per message (vector and matrix clocks are delta encoded)
+# usage: python -m benchmarks.clocks [DURATION]
+
+SIZES = [3, 20, 100]
+TOPOLOGY = "random"
+DURATION = 60
+SEED = 0
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        DURATION = float(sys.argv[1])
+
+    print(f"{'clock':>8} {'N':>5} {'messages':>9} {'us/msg':>8} {'words/msg':>10} {'concurrent':>11}")
+    for n in SIZES:
+        for clock in CLOCKS:
+            start = time.perf_counter()
+            result = simulate(DURATION, SEED, logDir=None, n=n, topology=TOPOLOGY, clock=clock)
+            elapsed = time.perf_counter() - start
+            # every clock sees the same sequence of events for the same seed, and a Lamport message is one word
+            if clock == "lamport":
+                messages = sum(result["wordsSent"])
+            concurrent = "-" if result["concurrent"][0] is None else sum(result["concurrent"])
+            print(f"{clock:>8} {n:>5} {messages:>9} {elapsed / max(messages, 1) * 1e6:>8.1f} "
+                  f"{sum(result['wordsSent']) / max(messages, 1):>10.2f} {concurrent:>11}")
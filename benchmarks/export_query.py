@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from export import export, get_runs, Dataset, queue_vs_tick_ratio
+from simulation import simulate
+from viz import parse_log, RECEIVED
+
+# time to answer a cross-run question (each run's largest queue length against the ratio of its machines' tick rates)
+# by parsing every run's text logs with parse_log, versus from a dataset written by export.py, which only reads the
+# index and the queue and event columns; also the time export takes and the size of the logs and of the dataset. The
+# runs are simulated (see simulation.py) with random tick rates.
+# usage: python -m benchmarks.export_query [N_RUNS] [DURATION]
+
+N_RUNS = 50
+# virtual seconds per run
+DURATION = 600
+
+def query_text(runs):
+    rows = []
+    for name, files in runs.items():
+        logs = [parse_log(f) for f in files.values()]
+        ticks = [log["ticks"] for log in logs]
+        rows.append({"run": name, "tick_ratio": max(ticks) / min(ticks),
+                     "max_queue": max(int(log["queue"][log["event"] == RECEIVED].max(initial=0)) for log in logs)})
+    return rows
+
+def query_dataset(path):
+    dataset = Dataset(path)
+    rows = queue_vs_tick_ratio(dataset)
+    dataset.close()
+    return rows
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_RUNS = int(sys.argv[1])
+    if len(sys.argv) >= 3:
+        DURATION = float(sys.argv[2])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(0)
+        for run in range(N_RUNS):
+            simulate(DURATION, seed=run, ticks=rng.integers(1, 7, 3).tolist(), logName=f"RUN{run}", logDir=tmp)
+        runs = get_runs(tmp)
+        path = os.path.join(tmp, "runs.npz")
+
+        start = time.perf_counter()
+        fromText = query_text(runs)
+        textTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # no cache, so the export parses every log as the text query does
+        export(runs, path, cache_dir=None)
+        exportTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fromDataset = query_dataset(path)
+        datasetTime = time.perf_counter() - start
+        assert fromText == fromDataset
+
+        textSize = sum(os.path.getsize(f) for files in runs.values() for f in files.values())
+        print(f"{N_RUNS} runs of {DURATION:.0f} s, {textSize / 1e6:.1f} MB of text logs, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB dataset")
+        print(f"export: {exportTime:.3f} s")
+        print(f"query from text logs: {textTime * 1e3:.1f} ms")
+        print(f"query from dataset: {datasetTime * 1e3:.1f} ms")
@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+import time
+
+from binlog import BinaryLog
+from process import log_message_receipt, log_message_send
+
+# per-event cost and file size of the text logs (a formatted line with a wall-clock timestamp and a flush per event)
+# versus the buffered binary logs, on the same mix of receive, send and internal events
+# usage: python -m benchmarks.log_format [N_EVENTS]
+
+N_EVENTS = 200000
+OTHER_PROCESSES = [1, 2]
+
+def log_events(logFile, nEvents):
+    start = time.perf_counter()
+    for i in range(nEvents):
+        if i % 3 == 0:
+            log_message_receipt(i % 5, i, logFile)
+        elif i % 3 == 1:
+            log_message_send([0, 1], OTHER_PROCESSES, i, logFile)
+        else:
+            log_message_send([], OTHER_PROCESSES, i, logFile)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_EVENTS = int(sys.argv[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        textPath, binPath = os.path.join(tmp, "log.txt"), os.path.join(tmp, "log.bin")
+        with open(textPath, "w") as logFile:
+            logFile.write("ticks per second: 1.0\n")
+            textTime = log_events(logFile, N_EVENTS)
+        with BinaryLog(binPath, 0, 1.0) as logFile:
+            binTime = log_events(logFile, N_EVENTS)
+        textSize, binSize = os.path.getsize(textPath), os.path.getsize(binPath)
+
+    print(f"{'format':>7} {'us/event':>9} {'bytes/event':>12}")
+    print(f"{'text':>7} {textTime / N_EVENTS * 1e6:>9.2f} {textSize / N_EVENTS:>12.1f}")
+    print(f"{'binary':>7} {binTime / N_EVENTS * 1e6:>9.2f} {binSize / N_EVENTS:>12.1f}")
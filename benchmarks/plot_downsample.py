@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from viz import downsample, PLOT_POINTS
+
+# time to draw and save a long run's clock and queue length step plots with every point versus downsampled to
+# PLOT_POINTS per line, plus the size of the saved figure (PNG, and SVG where the number of points shows directly) and
+# whether the largest clock jump and queue length peak are still drawn
+# usage: python -m benchmarks.plot_downsample [N_POINTS]
+
+N_POINTS = 1000000
+N_LINES = 3
+
+def make_series(nPoints, seed):
+    rng = np.random.default_rng(seed)
+    xs = np.cumsum(rng.exponential(0.01, nPoints))
+    clock = np.cumsum(rng.integers(1, 3, nPoints))
+    # occasional large jumps, as when a message from a faster machine arrives
+    clock += np.cumsum(np.where(rng.random(nPoints) < 1e-4, rng.integers(50, 500, nPoints), 0))
+    queue = rng.poisson(0.3, nPoints)
+    queue[rng.integers(nPoints)] = 50
+    return xs, clock, queue
+
+def render(series, path, method):
+    start = time.perf_counter()
+    fig, (clock_ax, queue_ax) = plt.subplots(2, 1)
+    drawn = []
+    for xs, clock, queue in series:
+        if method is None:
+            cx, cy, qx, qy = xs, clock, xs, queue
+        else:
+            cx, cy = downsample(xs, clock, PLOT_POINTS, method)
+            qx, qy = downsample(xs, queue, PLOT_POINTS, method)
+        clock_ax.step(cx, cy)
+        queue_ax.step(qx, qy)
+        drawn.append((cx, cy, qy))
+    fig.savefig(path)
+    plt.close(fig)
+    return time.perf_counter() - start, drawn
+
+# the biggest jump between consecutive clock values is still drawn as a jump at least as high (it can only be moved
+# within its slice of the time axis), and the highest queue length is still drawn
+def preserved(series, drawn):
+    for (xs, clock, queue), (cx, cy, qy) in zip(series, drawn):
+        if np.diff(cy).max() < np.diff(clock).max() or qy.max() != queue.max():
+            return False
+    return True
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_POINTS = int(sys.argv[1])
+    series = [make_series(N_POINTS, seed) for seed in range(N_LINES)]
+
+    print(f"{N_LINES} lines x {N_POINTS} points, downsampled to {PLOT_POINTS}")
+    print(f"{'method':>7} {'png s':>7} {'png KB':>7} {'svg s':>7} {'svg KB':>8} {'peaks kept':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for method in [None, "minmax", "lttb"]:
+            png, svg = os.path.join(tmp, "plot.png"), os.path.join(tmp, "plot.svg")
+            pngTime, drawn = render(series, png, method)
+            svgTime, _ = render(series, svg, method)
+            print(f"{method or 'none':>7} {pngTime:>7.2f} {os.path.getsize(png) / 1e3:>7.0f} {svgTime:>7.2f} "
+                  f"{os.path.getsize(svg) / 1e3:>8.0f} {str(preserved(series, drawn)):>11}")
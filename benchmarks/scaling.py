@@ -0,0 +1,39 @@
+import sys
+import time
+import tracemalloc
+
+from simulation import simulate
+from topology import TOPOLOGIES
+
+# how the virtual-time simulator scales with the number of machines: events handled per second of wall time and
+# peak traced memory, for each topology
+# usage: python -m benchmarks.scaling [DURATION]
+
+SIZES = [3, 10, 50, 100, 250, 500]
+# virtual seconds simulated per configuration
+DURATION = 20
+SEED = 0
+
+def run(n, topology, duration):
+    # timed run without tracing, since tracemalloc slows every allocation down
+    start = time.perf_counter()
+    result = simulate(duration, SEED, logDir=None, n=n, topology=topology)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    simulate(duration, SEED, logDir=None, n=n, topology=topology)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    events = sum(result["events"])
+    return events, elapsed, peak
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        DURATION = float(sys.argv[1])
+
+    print(f"{'topology':>8} {'N':>5} {'ticks':>10} {'wall (s)':>9} {'ticks/s':>10} {'peak MiB':>9}")
+    for topology in TOPOLOGIES:
+        for n in SIZES:
+            events, elapsed, peak = run(n, topology, DURATION)
+            print(f"{topology:>8} {n:>5} {events:>10} {elapsed:>9.3f} {events / elapsed:>10.0f} {peak / 2**20:>9.2f}")
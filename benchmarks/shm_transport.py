@@ -0,0 +1,94 @@
+import socket
+import sys
+import time
+from multiprocessing import Process, Queue
+
+from analysis import percentiles
+from process import POLL_INTERVAL
+from shm_ring import RingBuffer, ShmLink
+from wire import FrameDecoder, Link, RECV_SIZE
+
+# one-way delivery latency and maximum throughput of clock updates between two processes over a localhost TCP
+# connection (process.py's "tcp" transport) versus a shared-memory ring buffer ("shm", see shm_ring.py). For latency
+# the sender writes time.perf_counter_ns() (a system-wide monotonic clock on Linux) as the clock value at RATE
+# messages per second, and the receiver subtracts it from the time it takes the message off the link; the ring is read
+# the way process.py reads it (sleeping POLL_INTERVAL when it is empty) and also by spinning, which shows the cost of
+# the polling itself. For throughput the sender writes N_MESSAGES * 10 updates as fast as it can, one per send.
+# usage: python -m benchmarks.shm_transport [N_MESSAGES]
+
+N_MESSAGES = 20000
+# messages per second sent in the latency runs, well below what either transport can carry
+RATE = 5000
+
+def tcp_receiver(serverSock, nMessages, results):
+    c, _ = serverSock.accept()
+    decoder = FrameDecoder()
+    latencies = []
+    with c:
+        while len(latencies) < nMessages:
+            for _, _, clocks in decoder.feed(c.recv(RECV_SIZE)):
+                now = time.perf_counter_ns()
+                latencies.extend(now - sent for sent in clocks)
+    results.put((time.perf_counter(), latencies))
+
+def shm_receiver(name, nMessages, pollInterval, results):
+    ring = RingBuffer(name=name)
+    latencies = []
+    while len(latencies) < nMessages:
+        values = ring.pop_all()
+        if not values and pollInterval:
+            time.sleep(pollInterval)
+        now = time.perf_counter_ns()
+        latencies.extend(now - sent for sent in values)
+    results.put((time.perf_counter(), latencies))
+    ring.close()
+
+# sends nMessages timestamps through the transport, rate per second (as fast as possible if rate is 0); returns the
+# receiver's latencies in microseconds and the messages per second delivered
+def run(transport, nMessages, rate, pollInterval=POLL_INTERVAL):
+    results = Queue()
+    if transport == "tcp":
+        serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        serverSock.bind(("localhost", 0))
+        serverSock.listen(1)
+        other = Process(target=tcp_receiver, args=(serverSock, nMessages, results))
+        other.start()
+        link = Link(socket.create_connection(serverSock.getsockname()), 0)
+    else:
+        ring = RingBuffer()
+        other = Process(target=shm_receiver, args=(ring.name, nMessages, pollInterval, results))
+        other.start()
+        link = ShmLink(ring, 0)
+
+    start = time.perf_counter()
+    for i in range(nMessages):
+        if rate:
+            # spin rather than sleep, since sleeps this short overshoot
+            while time.perf_counter() - start < i / rate:
+                pass
+        link.send(time.perf_counter_ns())
+    end, latencies = results.get()
+    other.join()
+    link.close()
+    if transport == "tcp":
+        serverSock.close()
+    else:
+        ring.close()
+    return [latency / 1e3 for latency in latencies], nMessages / (end - start)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_MESSAGES = int(sys.argv[1])
+
+    runs = [("tcp", "tcp", POLL_INTERVAL), ("shm", "shm", POLL_INTERVAL), ("shm spin", "shm", 0)]
+    print(f"one-way latency at {RATE} messages/s")
+    print(f"{'transport':>9} {'p50 (us)':>10} {'p90 (us)':>10} {'p99 (us)':>10} {'max (us)':>10}")
+    for name, transport, pollInterval in runs:
+        latencies, _ = run(transport, N_MESSAGES, RATE, pollInterval)
+        stats = percentiles(latencies)
+        print(f"{name:>9} {stats['p50']:>10.1f} {stats['p90']:>10.1f} {stats['p99']:>10.1f} {max(latencies):>10.1f}")
+
+    print(f"\n{'transport':>9} {'messages/s':>12}")
+    for name, transport, pollInterval in runs:
+        _, throughput = run(transport, N_MESSAGES * 10, 0, pollInterval)
+        print(f"{name:>9} {throughput:>12.0f}")
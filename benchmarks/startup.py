@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+
+import process
+from message_queue import MessageQueue
+from topology import make_topology
+
+# what it costs to start things up, which adds up when a sweep launches many short runs:
+#   - the time to import viz.py (which imports matplotlib only once a figure is drawn), and what importing it cost when
+#     it imported matplotlib.pyplot straight away; the same for unittests.py, which imports the viz parsers
+#   - the time from launching a run's machines to all of them being connected and ticking (process.start_machines),
+#     next to the fixed 5 second sleep every machine used to wait before connecting
+# usage: python -m benchmarks.startup [REPEATS]
+
+REPEATS = 5
+MACHINES = [3, 10]
+# the wait every machine used to start with before connecting to the others
+OLD_STARTUP = 5.0
+
+IMPORTS = [
+    ("viz", "import viz"),
+    ("viz + pyplot (before)", "import viz, matplotlib.pyplot"),
+    ("unittests", "import unittests"),
+    ("unittests + pyplot (before)", "import unittests, matplotlib.pyplot"),
+]
+
+# seconds for a fresh interpreter to run statement, best of repeats
+def import_time(statement, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+# seconds from launching n machines on free ports until every one has its links up and is ticking, best of repeats
+def launch_time(n, repeats):
+    process.N_PROCESS = n
+    process.LOG_NAME = "STARTUPBENCH"
+    process.METRICS = False
+    neighbors = make_topology(process.TOPOLOGY, n, process.TOPOLOGY_SEED)
+    times = []
+    # the machines trace their connections; keep that out of the results
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        for _ in range(repeats):
+            process.ports = dict.fromkeys(range(n), 0)
+            process.hosts = {pid: "localhost" for pid in range(n)}
+            process.messageQueue = [MessageQueue(process.MAX_QUEUE_LENGTH, process.OVERFLOW_POLICY) for _ in range(n)]
+            start = time.perf_counter()
+            machines = process.start_machines(range(n), neighbors)
+            times.append(time.perf_counter() - start)
+            for machine in machines:
+                machine.terminate()
+            for machine in machines:
+                machine.join()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    # a machine opens its log only once it is ticking, so one terminated straight away may not have one
+    for pid in range(n):
+        if os.path.exists(f"logs/process{pid}STARTUPBENCH.txt"):
+            os.remove(f"logs/process{pid}STARTUPBENCH.txt")
+    return min(times)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        REPEATS = int(sys.argv[1])
+
+    print(f"{'import':>28} {'seconds':>8}")
+    for name, statement in IMPORTS:
+        print(f"{name:>28} {import_time(statement, REPEATS):>8.3f}")
+
+    print(f"\n{'machines':>8} {'started in (s)':>15} {'before (s)':>11}")
+    for n in MACHINES:
+        started = launch_time(n, REPEATS)
+        print(f"{n:>8} {started:>15.3f} {'> ' + str(OLD_STARTUP):>11}")
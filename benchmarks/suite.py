@@ -0,0 +1,232 @@
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+from multiprocessing import Process, Queue
+from random import Random
+
+import numpy as np
+
+from binlog import BinaryLog
+from message_queue import MessageQueue
+from process import handle_message_receipt, log_message_receipt, log_message_send, get_recipients
+from viz import parse_log
+from wire import FrameDecoder, Link, RECV_SIZE
+from benchmarks.viz_parse import write_log
+
+# the benchmarks that matter for the clock runtime and the analysis pipeline, run with fixed sizes and seeds so results
+# from different commits can be compared: the per-event cost of handling receives and sends and of logging them, message
+# queue operations with a large backlog, clock update throughput over a socket between two local processes, and
+# parse_log time against log size. Each benchmark is repeated REPEATS times and the best run is kept, which is the
+# least noisy estimate of the cost. Results are written as JSON and compared against a baseline file; a result more
+# than THRESHOLD worse than the baseline is reported as a regression (and the exit status is 1). Timings only compare
+# on the same machine, so if the baseline was recorded on a different platform, CPU count or Python version the
+# comparison is still printed but nothing counts as a regression; save a baseline on each machine the suite gates on.
+# usage: python -m benchmarks.suite [--out results.json] [--baseline benchmarks/baseline.json] [--save-baseline]
+
+BASELINE = "benchmarks/baseline.json"
+REPEATS = 3
+# a result this much worse than the baseline (as a fraction) counts as a regression
+THRESHOLD = 0.25
+SEED = 0
+# the parts of environment() that have to match the baseline's for its timings to be comparable
+MATCHING = ["platform", "cpus", "python"]
+
+N_EVENTS = 50000
+BACKLOG = 100000
+N_MESSAGES = 200000
+PARSE_SIZES = [10000, 100000, 1000000]
+OTHER_PROCESSES = [1, 2]
+
+def best(bench, *args):
+    return min(bench(*args) for _ in range(REPEATS))
+
+# microseconds per receive event: take a message off the queue, update the clock and log it to a text file
+def bench_receive(nEvents):
+    queue = MessageQueue()
+    for message in range(nEvents):
+        queue.put(message)
+    with tempfile.TemporaryFile("w") as logFile:
+        start = time.perf_counter()
+        clock = 1
+        for _ in range(nEvents):
+            clock = handle_message_receipt(queue, clock, logFile)
+        return (time.perf_counter() - start) / nEvents * 1e6
+
+# microseconds per send event: pick recipients, send the clock to each over a socket and log the event
+def bench_send(nEvents):
+    rng = Random(SEED)
+    a, b = socket.socketpair()
+    # the other end is only emptied every 1000 events, so give the sockets room for what is sent in between
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 22)
+    b.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+    b.setblocking(False)
+    links = [Link(a, 0), Link(a, 0)]
+    with tempfile.TemporaryFile("w") as logFile:
+        start = time.perf_counter()
+        for clock in range(nEvents):
+            toSend = get_recipients(rng.randint(1, 10))
+            for rec in toSend:
+                links[rec].send(clock)
+            log_message_send(toSend, OTHER_PROCESSES, clock + 1, logFile)
+            if clock % 1000 == 0:
+                try:
+                    while b.recv(1 << 16):
+                        pass
+                except BlockingIOError:
+                    pass
+        elapsed = time.perf_counter() - start
+    a.close()
+    b.close()
+    return elapsed / nEvents * 1e6
+
+# microseconds per logged event, text (formatted line and flush) or binary (buffered record)
+def bench_log(nEvents, binary):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log")
+        logFile = BinaryLog(path, 0, 1.0) if binary else open(path, "w")
+        start = time.perf_counter()
+        for i in range(nEvents):
+            if i % 2:
+                log_message_receipt(i % 5, i, logFile)
+            else:
+                log_message_send([0, 1], OTHER_PROCESSES, i, logFile)
+        elapsed = time.perf_counter() - start
+        logFile.close()
+    return elapsed / nEvents * 1e6
+
+# nanoseconds per put + popleft pair on a queue holding backlog messages
+def bench_queue(backlog):
+    queue = MessageQueue()
+    for message in range(backlog):
+        queue.put(message)
+    start = time.perf_counter()
+    for message in range(backlog):
+        queue.put(message)
+        queue.popleft()
+    return (time.perf_counter() - start) / backlog * 1e9
+
+def receiver(serverSock, nMessages, results):
+    c, _ = serverSock.accept()
+    decoder = FrameDecoder()
+    received = 0
+    with c:
+        while received < nMessages:
+            for _, _, clocks in decoder.feed(c.recv(RECV_SIZE)):
+                received += len(clocks)
+    results.put(time.perf_counter())
+
+# single-clock frames per second from one process to another over a localhost TCP connection, from the first send to
+# the last message being decoded
+def bench_socket(nMessages):
+    serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serverSock.bind(("localhost", 0))
+    serverSock.listen(1)
+    results = Queue()
+    other = Process(target=receiver, args=(serverSock, nMessages, results))
+    other.start()
+    link = Link(socket.create_connection(serverSock.getsockname()), 0)
+    start = time.perf_counter()
+    for clock in range(nMessages):
+        link.send(clock)
+    end = results.get()
+    other.join()
+    link.close()
+    serverSock.close()
+    return nMessages / (end - start)
+
+# seconds for parse_log to load a synthetic log of nLines lines
+def bench_parse(path):
+    start = time.perf_counter()
+    parse_log(path)
+    return time.perf_counter() - start
+
+def run_suite() -> dict:
+    """
+    Runs every benchmark; returns a dict from benchmark name to {"value", "unit", "better"}, where better says whether
+    "lower" or "higher" values are improvements.
+    """
+    results = {
+        "receive_event": (best(bench_receive, N_EVENTS), "us/event", "lower"),
+        "send_event": (best(bench_send, N_EVENTS), "us/event", "lower"),
+        "log_text": (best(bench_log, N_EVENTS, False), "us/event", "lower"),
+        "log_binary": (best(bench_log, N_EVENTS, True), "us/event", "lower"),
+        "queue_backlog": (best(bench_queue, BACKLOG), "ns/op", "lower"),
+        "socket_throughput": (best(bench_socket, N_MESSAGES), "messages/s", "higher"),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for nLines in PARSE_SIZES:
+            path = os.path.join(tmp, f"log{nLines}.txt")
+            write_log(path, nLines)
+            results[f"parse_{nLines}"] = (best(bench_parse, path), "s", "lower")
+    return {name: {"value": value, "unit": unit, "better": better} for name, (value, unit, better) in results.items()}
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def mismatches(env: dict, baselineEnv: dict) -> list:
+    """
+    The MATCHING fields of environment() that differ between env and the baseline's environment, as (name, baseline
+    value, value).
+    """
+    return [(name, baselineEnv.get(name), env[name]) for name in MATCHING if baselineEnv.get(name) != env[name]]
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    """
+    Compares results with a baseline's; returns (name, baseline value, value, change, regressed) for every benchmark in
+    both, where change is the fraction by which the result is worse (negative if it is better).
+    """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        change = (new - old) / old if result["better"] == "lower" else (old - new) / old
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    out = args[args.index("--out") + 1] if "--out" in args else None
+    baselinePath = args[args.index("--baseline") + 1] if "--baseline" in args else BASELINE
+
+    results = run_suite()
+    report = {"environment": environment(), "results": results}
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+    if "--save-baseline" in args:
+        with open(baselinePath, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline to {baselinePath}")
+
+    baseline = {}
+    different = []
+    if os.path.exists(baselinePath):
+        with open(baselinePath) as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        different = mismatches(report["environment"], stored.get("environment", {}))
+    compared = {row[0]: row for row in compare(results, baseline)}
+    regressions = 0
+    print(f"{'benchmark':>18} {'unit':>10} {'baseline':>12} {'result':>12} {'change':>8}")
+    for name, result in results.items():
+        if name in compared:
+            _, old, new, change, regressed = compared[name]
+            regressions += regressed
+            flag = "  REGRESSION" if regressed and not different else ""
+            print(f"{name:>18} {result['unit']:>10} {old:>12.4g} {new:>12.4g} {(new - old) / old:>+8.0%}{flag}")
+        else:
+            print(f"{name:>18} {result['unit']:>10} {'-':>12} {result['value']:>12.4g} {'':>8}")
+    if different:
+        for name, old, new in different:
+            print(f"warning: {baselinePath} was recorded with {name} {old}, this machine has {new}")
+        print("the results are not comparable, so no regressions are reported; save a baseline on this machine with "
+              "--save-baseline")
+    elif regressions:
+        print(f"{regressions} regression(s) of more than {THRESHOLD:.0%} against {baselinePath}")
+        sys.exit(1)
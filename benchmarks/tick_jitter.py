@@ -0,0 +1,67 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from log_writer import AsyncLogWriter
+from process import log_message_send
+
+# tick-period jitter of a tick loop that logs an event every tick, writing the log synchronously (write + flush on
+# the tick thread, as process.py did) versus through the background writer; with --fsync every flush also forces the
+# data to disk, standing in for a slow or busy disk
+# usage: python -m benchmarks.tick_jitter [TICKS_PER_SECOND] [SECONDS] [--fsync]
+
+TICKS_PER_SECOND = 200
+SECONDS = 3
+OTHER_PROCESSES = [1, 2]
+
+# flushes a file and forces it to disk, like a stalled page cache writeback would
+class FsyncFile:
+    def __init__(self, f):
+        self.f = f
+        self.write = f.write
+
+    def flush(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+def run(logFile, ticksPerSecond, seconds):
+    sleepDuration = 1 / ticksPerSecond
+    periods = []
+    last = time.perf_counter()
+    for clock in range(int(ticksPerSecond * seconds)):
+        time.sleep(sleepDuration)
+        log_message_send([0], OTHER_PROCESSES, clock, logFile)
+        now = time.perf_counter()
+        periods.append(now - last)
+        last = now
+    logFile.close()
+    return periods
+
+def report(name, periods, sleepDuration):
+    periods = sorted(periods)
+    late = [p - sleepDuration for p in periods]
+    print(f"{name:>6} {statistics.mean(periods) * 1000:>10.3f} {statistics.pstdev(periods) * 1000:>10.3f} "
+          f"{late[int(len(late) * 0.99)] * 1000:>10.3f} {late[-1] * 1000:>10.3f}")
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--fsync"]
+    fsync = "--fsync" in sys.argv
+    if len(args) >= 1:
+        TICKS_PER_SECOND = float(args[0])
+    if len(args) >= 2:
+        SECONDS = float(args[1])
+
+    print(f"{'writer':>6} {'mean (ms)':>10} {'std (ms)':>10} {'p99 late':>10} {'max late':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ["sync", "async"]:
+            logFile = open(os.path.join(tmp, f"{name}.txt"), "w")
+            if fsync:
+                logFile = FsyncFile(logFile)
+            if name == "async":
+                logFile = AsyncLogWriter(logFile)
+            report(name, run(logFile, TICKS_PER_SECOND, SECONDS), 1 / TICKS_PER_SECOND)
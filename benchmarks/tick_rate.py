@@ -0,0 +1,47 @@
+import sys
+import time
+
+from scheduler import TickScheduler
+
+# achieved ticks per second of a tick loop doing a fixed amount of work per tick, when it sleeps for the tick period
+# after the work (as process.py did) versus when it waits on the scheduler's absolute deadlines, with and without
+# spinning for the last half millisecond
+# usage: python -m benchmarks.tick_rate [SECONDS]
+
+RATES = [5, 50, 200, 1000]
+SECONDS = 2
+# stands in for the printing, sending and logging a tick does
+WORK_NS = 200_000
+SPIN_NS = 500_000
+
+def work():
+    end = time.perf_counter_ns() + WORK_NS
+    while time.perf_counter_ns() < end:
+        pass
+
+def run_sleep(ticksPerSecond, seconds):
+    start = time.monotonic()
+    ticks = 0
+    while time.monotonic() - start < seconds:
+        time.sleep(1 / ticksPerSecond)
+        work()
+        ticks += 1
+    return ticks / (time.monotonic() - start), 0
+
+def run_scheduler(ticksPerSecond, seconds, spinNs=0):
+    scheduler = TickScheduler(ticksPerSecond, spinNs)
+    while scheduler.ticks < ticksPerSecond * seconds:
+        scheduler.wait()
+        work()
+    return scheduler.rate(), scheduler.maxLatenessNs / 1000
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        SECONDS = float(sys.argv[1])
+
+    print(f"{'configured':>10} {'sleep':>10} {'deadline':>10} {'spin':>10} {'max late (us)':>14}")
+    for rate in RATES:
+        slept, _ = run_sleep(rate, SECONDS)
+        scheduled, _ = run_scheduler(rate, SECONDS)
+        spun, lateness = run_scheduler(rate, SECONDS, SPIN_NS)
+        print(f"{rate:>10} {slept:>10.2f} {scheduled:>10.2f} {spun:>10.2f} {lateness:>14.1f}")
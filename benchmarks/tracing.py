@@ -0,0 +1,87 @@
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from random import randint
+
+from message_queue import MessageQueue
+from process import receive_messages, get_recipients, log_message_send
+from tracing import Tracer, DEBUG, INFO
+from wire import Link, RECV_SIZE
+
+# the highest tick rate process.py's tick loop can sustain (ticks per second with no sleeping between them) when every
+# tick prints its trace lines as the old print() calls did, with debug tracing on (unlimited and rate limited), and with
+# debug tracing off (the default). Each tick does what process_messages does: consume a message if one is queued, or
+# pick recipients, send to them over a socket and log the event.
+# usage: python -m benchmarks.tracing [SECONDS] [--tty]
+#   trace output goes to a temporary file, or to the terminal with --tty (where printing is much slower)
+
+SECONDS = 2
+OTHER_PROCESSES = [1, 2]
+
+class PrintTracer:
+    """
+    Stands in for a Tracer with the print(f"...") calls process.py used to make.
+    """
+    def __init__(self, pid, out):
+        self.pid = pid
+        self.out = out
+
+    def debug(self, msg, *args):
+        print(f"[{self.pid}] {msg % args}", file=self.out)
+
+def drain(sock):
+    while sock.recv(RECV_SIZE):
+        pass
+
+def run(trace, seconds):
+    a, b = socket.socketpair()
+    threading.Thread(target=drain, args=(b,), daemon=True).start()
+    link = Link(a, 0)
+    queue = MessageQueue()
+    clock = 1
+    ticks = 0
+    with open(os.devnull, "w") as logFile:
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            ticks += 1
+            trace.debug("sleeping for %s seconds", 0.)
+            # a message arrives every other tick
+            if ticks % 2:
+                queue.put(clock + 3)
+                trace.debug("received message %d from %d", clock + 3, 1)
+            if queue:
+                clock, _ = receive_messages(queue, clock, logFile)
+                trace.debug("processed message, updated clock value to %d", clock)
+                continue
+            num = randint(1, 10)
+            trace.debug("generated number %d", num)
+            toSend = get_recipients(num)
+            trace.debug("sending messages to %d other process(es)", len(toSend))
+            for rec in toSend:
+                trace.debug("sending message to %d", OTHER_PROCESSES[rec])
+                link.send(clock)
+            clock += 1
+            log_message_send(toSend, OTHER_PROCESSES, clock, logFile)
+        elapsed = time.perf_counter() - start
+    a.close()
+    b.close()
+    return ticks / elapsed
+
+if __name__ == "__main__":
+    tty = "--tty" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--tty"]
+    if args:
+        SECONDS = float(args[0])
+
+    results = []
+    with tempfile.TemporaryFile("w") as tmp:
+        out = sys.stdout if tty else tmp
+        for name, trace in [("print", PrintTracer(0, out)), ("debug", Tracer(0, DEBUG, None, out)),
+                            ("debug 100/s", Tracer(0, DEBUG, 100, out)), ("off", Tracer(0, INFO, out=out))]:
+            results.append((name, run(trace, SECONDS)))
+    print(f"{'tracing':>12} {'max ticks/s':>12}")
+    for name, rate in results:
+        print(f"{name:>12} {rate:>12.0f}")
@@ -0,0 +1,134 @@
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+
+from wire import FrameDecoder, Link, RECV_SIZE, encode_frame
+
+# per-message round-trip latency and CPU cost of the threaded socket transport (process.py: a blocking recv loop in a
+# thread per connection) versus the asyncio streams transport (process_async.py), over loopback, followed by the
+# throughput of one-way clock updates when they are sent one per frame versus coalesced into larger frames
+# usage: python -m benchmarks.transport [N_MESSAGES]
+
+N_MESSAGES = 5000
+# clock updates per frame for the throughput comparison
+COALESCE = [1, 16, 256]
+# the size of a frame carrying a single clock update
+MESSAGE_SIZE = len(encode_frame(0, 0, [0]))
+
+# echo every single-clock frame straight back
+def threaded_echo(serverSock):
+    c, _ = serverSock.accept()
+    with c:
+        while True:
+            rec = c.recv(MESSAGE_SIZE)
+            if not rec:
+                return
+            c.sendall(rec)
+
+def bench_threaded(nMessages):
+    serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serverSock.bind(("localhost", 0))
+    serverSock.listen(1)
+    server = threading.Thread(target=threaded_echo, args=(serverSock,))
+    server.start()
+
+    latencies = []
+    with socket.create_connection(serverSock.getsockname()) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for clock in range(nMessages):
+            start = time.perf_counter_ns()
+            sock.sendall(encode_frame(0, clock, [clock]))
+            # a read can come back short, so keep reading until the whole echoed frame is in
+            echoed = 0
+            while echoed < MESSAGE_SIZE:
+                echoed += len(sock.recv(MESSAGE_SIZE - echoed))
+            latencies.append(time.perf_counter_ns() - start)
+    server.join()
+    serverSock.close()
+    return latencies
+
+async def async_echo(reader, writer, done):
+    try:
+        while True:
+            writer.write(await reader.readexactly(MESSAGE_SIZE))
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        writer.close()
+        done.set()
+
+async def bench_async(nMessages):
+    done = asyncio.Event()
+    server = await asyncio.start_server(lambda reader, writer: async_echo(reader, writer, done), "localhost", 0)
+    reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+    writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    latencies = []
+    for clock in range(nMessages):
+        start = time.perf_counter_ns()
+        writer.write(encode_frame(0, clock, [clock]))
+        await writer.drain()
+        await reader.readexactly(MESSAGE_SIZE)
+        latencies.append(time.perf_counter_ns() - start)
+    writer.close()
+    await done.wait()
+    server.close()
+    await server.wait_closed()
+    return latencies
+
+# decode everything sent on the connection, counting the clock updates received
+def threaded_sink(serverSock, received):
+    c, _ = serverSock.accept()
+    decoder = FrameDecoder()
+    with c:
+        while True:
+            rec = c.recv(RECV_SIZE)
+            if not rec:
+                return
+            for _, _, clocks in decoder.feed(rec):
+                received[0] += len(clocks)
+
+def bench_coalescing(nMessages, perFrame):
+    serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serverSock.bind(("localhost", 0))
+    serverSock.listen(1)
+    received = [0]
+    sink = threading.Thread(target=threaded_sink, args=(serverSock, received))
+    sink.start()
+
+    start = time.perf_counter()
+    link = Link(socket.create_connection(serverSock.getsockname()), 0)
+    for clock in range(nMessages):
+        link.add(clock)
+        if len(link.pending) == perFrame:
+            link.flush()
+    link.flush()
+    link.close()
+    sink.join()
+    serverSock.close()
+    assert received[0] == nMessages
+    return nMessages / (time.perf_counter() - start)
+
+def report(name, latencies, cpu):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{name:>9} {statistics.median(latencies) / 1000:>10.1f} {p99 / 1000:>10.1f} {cpu / len(latencies) * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_MESSAGES = int(sys.argv[1])
+
+    print(f"{'transport':>9} {'p50 (us)':>10} {'p99 (us)':>10} {'CPU/msg (us)':>12}")
+    cpu = time.process_time()
+    latencies = bench_threaded(N_MESSAGES)
+    report("threaded", latencies, time.process_time() - cpu)
+
+    cpu = time.process_time()
+    latencies = asyncio.run(bench_async(N_MESSAGES))
+    report("asyncio", latencies, time.process_time() - cpu)
+
+    print(f"\n{'clocks/frame':>12} {'updates/s':>12}")
+    for perFrame in COALESCE:
+        print(f"{perFrame:>12} {bench_coalescing(N_MESSAGES * 20, perFrame):>12.0f}")
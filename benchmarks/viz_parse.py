@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import time
+
+from viz import get_clock_updates, get_queue_lengths, get_start_time, get_ticks, parse_log, load_log
+
+# time to load a log for plotting with the line-by-line parsers viz.py used to call (get_ticks, get_start_time, then
+# get_clock_updates and get_queue_lengths, each reading the whole file) versus one vectorized pass with parse_log, on a
+# synthetic log with the usual mix of receive, send and internal events. Also times load_log: its first call (parse and
+# fill the cache), a second call on the unchanged log, and a call after 1% more lines have been appended
+# usage: python -m benchmarks.viz_parse [N_LINES]   (e.g. 10000000 for a 10M-line log, about 900MB)
+
+N_LINES = 1000000
+# events per second of the synthetic log
+RATE = 1000
+
+def write_log(path, nLines):
+    with open(path, "w") as f:
+        f.write(f"ticks per second: {RATE}.0\n")
+        lines = []
+        for i in range(nLines):
+            t = i / RATE
+            globalTime = f"{int(t // 3600):02d}:{int(t % 3600 // 60):02d}:{t % 60:09.6f}"
+            if i % 3 == 0:
+                lines.append(f"[MESSAGE RECEIVED] | Global Time - {globalTime} | Queue Length - {i % 5} | Clock Time - {i}\n")
+            elif i % 3 == 1:
+                lines.append(f"[MESSAGE(S) SENT] | Global Time - {globalTime} | Receiver(s) - [1, 2] | Clock Time - {i}\n")
+            else:
+                lines.append(f"[INTERNAL] | Global Time - {globalTime} | No Messages Sent | Clock Time - {i}\n")
+            if len(lines) == 100000:
+                f.write("".join(lines))
+                lines = []
+        f.write("".join(lines))
+
+def parse_lines(path):
+    get_ticks(path)
+    st = get_start_time(path)
+    return get_clock_updates(path, st), get_queue_lengths(path, st)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        N_LINES = int(sys.argv[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.txt")
+        write_log(path, N_LINES)
+        start = time.perf_counter()
+        clockUpdates, queueLengths = parse_lines(path)
+        lineTime = time.perf_counter() - start
+        start = time.perf_counter()
+        parsed = parse_log(path)
+        arrayTime = time.perf_counter() - start
+        cacheDir = os.path.join(tmp, "cache")
+        cacheTimes = []
+        for append in [False, False, True]:
+            if append:
+                with open(path) as f:
+                    f.readline()
+                    lines = [f.readline() for _ in range(N_LINES // 100)]
+                with open(path, "a") as f:
+                    f.write("".join(lines))
+            start = time.perf_counter()
+            load_log(path, cacheDir)
+            cacheTimes.append(time.perf_counter() - start)
+
+    assert len(parsed["clock"]) == len(clockUpdates)
+    print(f"{N_LINES} lines")
+    print(f"{'parser':>10} {'s':>8} {'M lines/s':>10}")
+    print(f"{'lines':>10} {lineTime:>8.2f} {N_LINES / lineTime / 1e6:>10.2f}")
+    print(f"{'parse_log':>10} {arrayTime:>8.2f} {N_LINES / arrayTime / 1e6:>10.2f}")
+    print(f"speedup: {lineTime / arrayTime:.1f}x")
+    print(f"load_log: first {cacheTimes[0]:.3f}s, cached {cacheTimes[1]:.4f}s, after 1% appended {cacheTimes[2]:.4f}s")
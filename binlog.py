@@ -0,0 +1,139 @@
+import struct
+import sys
+import time
+from datetime import datetime
+
+# binary alternative to the text logs: fixed-width records written through a buffer, instead of a formatted line plus
+# a flush per event. A file starts with a header
+#   magic (6 bytes) | pid (uint16) | ticks per second (float64) | wall clock ns (int64) | monotonic ns (int64)
+# where the two clock readings are taken together so record timestamps (monotonic ns) can be turned back into wall
+# clock times, followed by records
+#   event type (uint8) | pid (uint16) | messages (uint16) | queue length (uint32) | monotonic ns (int64) |
+#   clock (uint64) | recipients bitmask (uint64)
+# all little-endian. `messages` is the number of messages a receive consumed (see BATCH_SIZE in process.py), and bit i
+# of the recipients bitmask is set if pid i was sent a message, so binary logs support runs of at most MAX_MACHINES
+# machines (process.py refuses to start larger runs with LOG_FORMAT = "binary").
+
+MAGIC = b"LCLOG1"
+HEADER = struct.Struct("<6sHdqq")
+RECORD = struct.Struct("<BHHIqQQ")
+
+# the most machines a run with binary logs can have: one recipients bit per pid
+MAX_MACHINES = 64
+
+# event types
+RECEIVED = 0
+SENT = 1
+INTERNAL = 2
+
+# default flush policy: write the buffer out every FLUSH_EVERY records or FLUSH_INTERVAL seconds, whichever comes first
+# (since the runners are stopped by killing them, this bounds how much of the end of a run can be lost)
+FLUSH_EVERY = 1024
+FLUSH_INTERVAL = 1.0
+
+class BinaryLog:
+    """
+    Buffered writer of binary log records for one process.
+
+    Args:
+    path - file to write (overwriting it if it exists)
+    pid - the process id
+    ticksPerSecond - the process's clock rate, recorded in the header like the first line of the text logs
+    flushEvery - flush after this many buffered records (0 to only flush on the interval or when closed)
+    flushInterval - flush when a record is logged this many seconds after the last flush (None to disable)
+    """
+    def __init__(self, path: str, pid: int, ticksPerSecond: float, flushEvery: int = FLUSH_EVERY,
+                 flushInterval: float = FLUSH_INTERVAL):
+        self.pid = pid
+        self.flushEvery = flushEvery
+        self.flushIntervalNs = None if flushInterval is None else int(flushInterval * 1e9)
+        self.f = open(path, "wb")
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.lastFlush = time.monotonic_ns()
+        self.f.write(HEADER.pack(MAGIC, pid, ticksPerSecond, time.time_ns(), self.lastFlush))
+
+    def record(self, eventType: int, clock: int, queueLength: int = 0, count: int = 0, recipients: int = 0):
+        now = time.monotonic_ns()
+        self.buffer += RECORD.pack(eventType, self.pid, count, queueLength, now, clock, recipients)
+        self.buffered += 1
+        if (self.flushEvery and self.buffered >= self.flushEvery) or \
+                (self.flushIntervalNs is not None and now - self.lastFlush >= self.flushIntervalNs):
+            self.flush()
+
+    def received(self, queueLength: int, clock: int, count: int = 1):
+        self.record(RECEIVED, clock, queueLength, count)
+
+    # a send to the given pids, or an internal event if there are none
+    def sent(self, recipients: list, clock: int):
+        if not recipients:
+            self.record(INTERNAL, clock)
+            return
+        mask = 0
+        for rec in recipients:
+            if rec >= MAX_MACHINES:
+                raise ValueError(f"binary logs support recipient pids below {MAX_MACHINES}, got {rec}")
+            mask |= 1 << rec
+        self.record(SENT, clock, recipients=mask)
+
+    def flush(self):
+        self.f.write(self.buffer)
+        self.f.flush()
+        self.buffer.clear()
+        self.buffered = 0
+        self.lastFlush = time.monotonic_ns()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_log(path: str):
+    """
+    Reads a binary log, returning its header as a dict (pid, ticks, wallNs, monotonicNs) and its records as a list of
+    tuples in RECORD order (event type, pid, messages, queue length, monotonic ns, clock, recipients bitmask). A record
+    cut short at the end of the file (a process killed mid-write) is ignored.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, pid, ticks, wallNs, monotonicNs = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary log")
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    records = list(RECORD.iter_unpack(data[HEADER.size:end]))
+    return {"pid": pid, "ticks": ticks, "wallNs": wallNs, "monotonicNs": monotonicNs}, records
+
+def to_text(binPath: str, textPath: str):
+    """
+    Converts a binary log into the text format process.py writes (and viz.py reads).
+    """
+    header, records = read_log(binPath)
+    offset = header["wallNs"] - header["monotonicNs"]
+    with open(textPath, "w") as f:
+        f.write(f"ticks per second: {header['ticks']}\n")
+        for eventType, _, count, queueLength, ns, clock, recipients in records:
+            globalTime = datetime.fromtimestamp((ns + offset) / 1e9).strftime('%H:%M:%S.%f')
+            if eventType == RECEIVED:
+                messages = "" if count == 1 else f" | Messages - {count}"
+                f.write(f"[MESSAGE RECEIVED] | Global Time - {globalTime} | Queue Length - {queueLength}{messages} | Clock Time - {clock}\n")
+            elif eventType == SENT:
+                receivers = [i for i in range(64) if recipients >> i & 1]
+                f.write(f"[MESSAGE(S) SENT] | Global Time - {globalTime} | Receiver(s) - {receivers} | Clock Time - {clock}\n")
+            else:
+                f.write(f"[INTERNAL] | Global Time - {globalTime} | No Messages Sent | Clock Time - {clock}\n")
+
+
+if __name__ == "__main__":
+    # usage: python binlog.py <binary log> [text log]; the text log defaults to the same name ending in .txt
+    if len(sys.argv) < 2:
+        print(f"usage: {sys.argv[0]} <binary log> [text log]")
+        sys.exit(1)
+    binPath = sys.argv[1]
+    textPath = sys.argv[2] if len(sys.argv) >= 3 else binPath.rsplit(".", 1)[0] + ".txt"
+    to_text(binPath, textPath)
+    print(f"wrote {textPath}")
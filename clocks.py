@@ -0,0 +1,197 @@
+import time
+from array import array
+
+# logical clock implementations that can stand in for the scalar Lamport clock. Every clock has the same interface:
+#   tick()                 - IR1, for an internal event or after sending messages
+#   send(to)               - the payload (a list of unsigned 64-bit ints, so it fits in a frame, see wire.py) to put on
+#                            a message for machine `to`; like the Lamport runner, it carries the clock before the tick
+#   receive(messages)      - IR2 then IR1 for a receive event consuming a list of (sender, payload) messages
+#   value                  - a scalar for the "Clock Time" field of the logs
+# Vector and matrix clocks send only the entries that changed since the last message on the same link (delta
+# encoding), which relies on links delivering messages in order, as TCP does.
+
+LAMPORT = "lamport"
+VECTOR = "vector"
+MATRIX = "matrix"
+HYBRID = "hybrid"
+
+# result of comparing two vector timestamps with compare()
+BEFORE = -1
+EQUAL = 0
+AFTER = 1
+CONCURRENT = None
+
+def compare(a, b):
+    """
+    Compares vector timestamps a and b: BEFORE if a happened before b, AFTER if b happened before a, EQUAL if they are
+    the same and CONCURRENT if neither happened before the other.
+    """
+    less = greater = False
+    for x, y in zip(a, b):
+        if x < y:
+            less = True
+        elif x > y:
+            greater = True
+    if less and greater:
+        return CONCURRENT
+    if less:
+        return BEFORE
+    if greater:
+        return AFTER
+    return EQUAL
+
+# encode the entries of current that differ from previous as a flat [index, value, index, value, ...] list, and bring
+# previous up to date
+def encode_delta(current, previous):
+    delta = []
+    for i, (x, y) in enumerate(zip(current, previous)):
+        if x != y:
+            delta += (i, x)
+            previous[i] = x
+    return delta
+
+# apply a delta from encode_delta to the receiver's copy of the sender's last timestamp
+def apply_delta(delta, previous):
+    for i in range(0, len(delta), 2):
+        previous[delta[i]] = delta[i + 1]
+
+class LamportClock:
+    """
+    The scalar clock process.py uses: max(message, clock) + 1 on receipt, + 1 otherwise.
+    """
+    def __init__(self, pid: int, n: int):
+        self.value = 1
+
+    def tick(self):
+        self.value += 1
+
+    def send(self, to: int) -> list:
+        return [self.value]
+
+    def receive(self, messages: list):
+        self.value = max(self.value, *(payload[0] for _, payload in messages)) + 1
+
+class VectorClock:
+    """
+    One counter per machine, held in a compact array. Unlike a Lamport clock, comparing two vector timestamps tells
+    whether the events were causally related or concurrent; `concurrent` counts receive events whose message was
+    concurrent with the receiver's state.
+    """
+    def __init__(self, pid: int, n: int):
+        self.pid = pid
+        self.vector = array("Q", [0] * n)
+        self.vector[pid] = 1
+        # our last timestamp sent to / received from each other machine, to delta encode against
+        self.sent = {}
+        self.received = {}
+        self.concurrent = 0
+
+    @property
+    def value(self):
+        return self.vector[self.pid]
+
+    def tick(self):
+        self.vector[self.pid] += 1
+
+    def send(self, to: int) -> list:
+        return encode_delta(self.vector, self.sent.setdefault(to, array("Q", [0] * len(self.vector))))
+
+    def receive(self, messages: list):
+        for sender, payload in messages:
+            remote = self.received.setdefault(sender, array("Q", [0] * len(self.vector)))
+            apply_delta(payload, remote)
+            if compare(remote, self.vector) is CONCURRENT:
+                self.concurrent += 1
+            self.vector = array("Q", map(max, self.vector, remote))
+        self.tick()
+
+class MatrixClock:
+    """
+    Each machine keeps its own vector clock (its row) plus its latest knowledge of every other machine's vector clock,
+    in one flat n x n array, so it also knows what the others know (e.g. which messages everyone has seen).
+    """
+    def __init__(self, pid: int, n: int):
+        self.pid = pid
+        self.n = n
+        self.matrix = array("Q", [0] * (n * n))
+        self.matrix[pid * n + pid] = 1
+        self.sent = {}
+        self.received = {}
+        self.concurrent = 0
+
+    @property
+    def value(self):
+        return self.matrix[self.pid * self.n + self.pid]
+
+    def row(self, i: int):
+        return self.matrix[i * self.n:(i + 1) * self.n]
+
+    def tick(self):
+        self.matrix[self.pid * self.n + self.pid] += 1
+
+    def send(self, to: int) -> list:
+        return encode_delta(self.matrix, self.sent.setdefault(to, array("Q", [0] * len(self.matrix))))
+
+    def receive(self, messages: list):
+        n = self.n
+        for sender, payload in messages:
+            remote = self.received.setdefault(sender, array("Q", [0] * len(self.matrix)))
+            apply_delta(payload, remote)
+            own = self.pid * n
+            senderRow = remote[sender * n:(sender + 1) * n]
+            if compare(senderRow, self.row(self.pid)) is CONCURRENT:
+                self.concurrent += 1
+            # merge what the sender knows about everyone, then fold the sender's own vector into ours
+            self.matrix = array("Q", map(max, self.matrix, remote))
+            self.matrix[own:own + n] = array("Q", map(max, self.matrix[own:own + n], senderRow))
+        self.tick()
+
+class HybridLogicalClock:
+    """
+    Hybrid logical clock (Kulkarni et al.): a logical component l that tracks the largest physical time seen (in
+    milliseconds) and a counter c that orders events sharing the same l. It stays close to physical time while still
+    respecting causality. value packs both into one 64-bit int as l << 16 | c.
+
+    Args:
+    now - function returning the current physical time in seconds (time.time by default; the simulator passes virtual
+          time)
+    """
+    def __init__(self, pid: int, n: int, now=time.time):
+        self.now = now
+        self.l = 0
+        self.c = 0
+
+    @property
+    def value(self):
+        return (self.l << 16) | self.c
+
+    def tick(self):
+        pt = int(self.now() * 1000)
+        if pt > self.l:
+            self.l, self.c = pt, 0
+        else:
+            self.c += 1
+
+    def send(self, to: int) -> list:
+        return [self.value]
+
+    def receive(self, messages: list):
+        remote = [(payload[0] >> 16, payload[0] & 0xFFFF) for _, payload in messages]
+        l = max(self.l, *(lm for lm, _ in remote))
+        pt = int(self.now() * 1000)
+        if pt > l:
+            self.l, self.c = pt, 0
+        else:
+            # continue counting from the largest counter among the timestamps that share the new l
+            self.c = max([self.c] * (self.l == l) + [cm for lm, cm in remote if lm == l]) + 1
+            self.l = l
+
+CLOCKS = {LAMPORT: LamportClock, VECTOR: VectorClock, MATRIX: MatrixClock, HYBRID: HybridLogicalClock}
+
+def make_clock(name: str, pid: int, n: int, **kwargs):
+    """
+    Creates the named clock (one of CLOCKS) for machine pid out of n machines.
+    """
+    if name not in CLOCKS:
+        raise ValueError(f"unknown clock {name}, expected one of {sorted(CLOCKS)}")
+    return CLOCKS[name](pid, n, **kwargs)
@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+
+import numpy as np
+
+from viz import load_log, CACHE_DIR, RECEIVED
+
+# exports many runs' logs into one columnar, compressed dataset (a NumPy .npz archive, one compressed array per column),
+# so questions across runs, like how the largest queue length depends on the ratio of the machines' tick rates, load
+# just the columns they use instead of parsing every text log again. Every row is one logged event:
+#   run (index into run_names), pid, ticks (the machine's ticks per second), event (viz.RECEIVED/SENT/INTERNAL),
+#   time (seconds since midnight), clock, queue (queue length after a receive, -1 otherwise), messages (consumed by a
+#   receive), recipient_count (how many machines a send went to)
+# Rows are grouped by run and then pid, and the index_* arrays hold one entry per (run, pid) with its ticks per second
+# and the range of rows [index_start, index_stop) holding its events. recipient_pids holds the pids every send went to,
+# one after another in row order, so a row's are found from the running total of recipient_count (see
+# Dataset.recipient_pids).
+# usage: python export.py [OUT] [LOG_NAME ...]   exports the given runs (every run in logs/ by default) to OUT
+#   (logs/runs.npz by default) and prints each run's largest queue length against its tick rate ratio
+
+OUT = "logs/runs.npz"
+# the row columns and the types they are stored with
+COLUMNS = {"run": np.int32, "pid": np.int16, "ticks": np.int16, "event": np.int8, "time": np.float64,
+           "clock": np.int64, "queue": np.int64, "messages": np.int64, "recipient_count": np.int32}
+INDEX_COLUMNS = ["index_run", "index_pid", "index_ticks", "index_start", "index_stop"]
+
+def get_runs(log_dir="logs") -> dict:
+    """
+    Every run with text logs in log_dir: a dict from LOG_NAME to a dict from pid to log file, sorted by name and pid.
+    """
+    pattern = re.compile(r"process(\d+)(.*)\.txt")
+    runs = {}
+    for name in os.listdir(log_dir):
+        match = pattern.fullmatch(name)
+        if match:
+            runs.setdefault(match.group(2), {})[int(match.group(1))] = os.path.join(log_dir, name)
+    return {name: dict(sorted(runs[name].items())) for name in sorted(runs)}
+
+def export(runs: dict, path: str = OUT, cache_dir=CACHE_DIR):
+    """
+    Writes the logs of runs (a dict from LOG_NAME to a dict from pid to log file, as returned by get_runs) to path as
+    one dataset (see the top of this file), parsing them with viz.load_log.
+    """
+    columns = {name: [] for name in COLUMNS}
+    pids = []
+    index = {name: [] for name in INDEX_COLUMNS}
+    start = 0
+    for run, files in enumerate(runs.values()):
+        for pid, log_file in files.items():
+            log = load_log(log_file, cache_dir)
+            n = len(log["time"])
+            for name in ["event", "time", "clock", "queue", "messages", "recipient_count"]:
+                columns[name].append(log[name])
+            pids.append(log["recipient_pids"])
+            columns["run"].append(np.full(n, run))
+            columns["pid"].append(np.full(n, pid))
+            columns["ticks"].append(np.full(n, log["ticks"]))
+            for name, value in zip(INDEX_COLUMNS, [run, pid, log["ticks"], start, start + n]):
+                index[name].append(value)
+            start += n
+    arrays = {name: np.concatenate(columns[name]).astype(dtype) if columns[name] else np.zeros(0, dtype)
+              for name, dtype in COLUMNS.items()}
+    arrays["recipient_pids"] = np.concatenate(pids).astype(np.int32) if pids else np.zeros(0, np.int32)
+    arrays.update({name: np.array(values, dtype=np.int64) for name, values in index.items()})
+    arrays["run_names"] = np.array(list(runs), dtype=str)
+    np.savez_compressed(path, **arrays)
+
+class Dataset:
+    """
+    A dataset written by export. Columns are read (and decompressed) from the file the first time they are asked for,
+    so a query only pays for the columns it uses.
+
+    Args:
+    path - the .npz file written by export
+    """
+    def __init__(self, path: str = OUT):
+        self.archive = np.load(path)
+        self.loaded = {}
+        self.run_names = self.column("run_names").tolist()
+        self.index = {name[len("index_"):]: self.column(name) for name in INDEX_COLUMNS}
+
+    def column(self, name: str):
+        if name not in self.loaded:
+            self.loaded[name] = self.archive[name]
+        return self.loaded[name]
+
+    def rows(self, run: str, pid: int) -> slice:
+        """
+        The rows holding the events of machine pid in the run named run.
+        """
+        i = np.flatnonzero((self.index["run"] == self.run_names.index(run)) & (self.index["pid"] == pid))
+        if not len(i):
+            raise KeyError(f"no machine {pid} in run {run}")
+        return slice(int(self.index["start"][i[0]]), int(self.index["stop"][i[0]]))
+
+    def recipient_pids(self, rows: slice):
+        """
+        The pids the sends in rows (e.g. from Dataset.rows) went to, one after another in row order.
+        """
+        if "recipient_offsets" not in self.loaded:
+            self.loaded["recipient_offsets"] = np.concatenate(([0], np.cumsum(self.column("recipient_count"))))
+        offsets = self.loaded["recipient_offsets"]
+        return self.column("recipient_pids")[offsets[rows.start]:offsets[rows.stop]]
+
+    def per_machine(self, name: str, reduce=np.maximum, mask=None):
+        """
+        A column reduced over each machine's rows (the largest value by default), in index order; 0 for a machine
+        with no events. With mask (a boolean array over the rows), the rows it leaves out count as 0.
+        """
+        values = self.column(name)
+        if mask is not None:
+            values = np.where(mask, values, 0)
+        starts, stops = self.index["start"], self.index["stop"]
+        nonEmpty = stops > starts
+        result = np.zeros(len(starts), dtype=values.dtype)
+        if nonEmpty.any():
+            result[nonEmpty] = reduce.reduceat(values, starts[nonEmpty])
+        return result
+
+    def close(self):
+        self.archive.close()
+
+def queue_vs_tick_ratio(dataset: Dataset) -> list:
+    """
+    For every run, the ratio of its fastest machine's tick rate to its slowest's and its largest queue length, read
+    from the index and the queue and event columns only. The queue length is only logged by receives, so a machine
+    that never received has a largest queue length of 0.
+    """
+    maxQueue = dataset.per_machine("queue", mask=dataset.column("event") == RECEIVED)
+    result = []
+    for run, name in enumerate(dataset.run_names):
+        machines = dataset.index["run"] == run
+        ticks = dataset.index["ticks"][machines]
+        result.append({"run": name, "tick_ratio": float(ticks.max() / ticks.min()) if ticks.min() else float("inf"),
+                       "max_queue": int(maxQueue[machines].max())})
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        OUT = str(sys.argv[1])
+
+    runs = get_runs()
+    if len(sys.argv) >= 3:
+        runs = {name: runs[name] for name in sys.argv[2:]}
+    export(runs, OUT)
+    dataset = Dataset(OUT)
+    print(f"exported {len(runs)} runs ({len(dataset.column('time'))} events) to {OUT} ({os.path.getsize(OUT)} bytes)")
+    print(f"{'run':>12} {'tick ratio':>10} {'max queue':>9}")
+    for row in sorted(queue_vs_tick_ratio(dataset), key=lambda row: row["tick_ratio"]):
+        print(f"{row['run']:>12} {row['tick_ratio']:>10.2f} {row['max_queue']:>9}")
+    dataset.close()
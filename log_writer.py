@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import deque
+
+# a log file wrapper that moves disk I/O off the tick loop: write() only appends the line to an in-memory queue, and a
+# writer thread drains whatever has accumulated, writing and flushing it as one batch. All the logs of a process share
+# one writer thread (per write interval), so process_async.py, which hosts every machine in one process, runs a single
+# writer thread however many machines it has
+
+# how often (in seconds) the writer thread drains the queues when nobody wakes it up earlier
+WRITE_INTERVAL = 0.05
+# how many lines may be waiting before write() stops and waits for the writer to catch up
+MAX_PENDING = 10000
+
+class WriterThread:
+    """
+    A background thread that drains every AsyncLogWriter added to it, every interval seconds or when woken up. A
+    writer whose file fails is dropped (with the exception kept in its `error`); the others go on being written.
+
+    Args:
+    interval - how often the thread wakes up to write, in seconds
+    """
+    def __init__(self, interval: float = WRITE_INTERVAL):
+        self.interval = interval
+        self.writers = []
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.drained = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, writer):
+        with self.lock:
+            self.writers.append(writer)
+
+    def remove(self, writer):
+        with self.lock:
+            if writer in self.writers:
+                self.writers.remove(writer)
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            with self.lock:
+                writers = list(self.writers)
+            for writer in writers:
+                try:
+                    writer.drain()
+                except Exception as e:
+                    writer.error = e
+                    self.remove(writer)
+            self.drained.set()
+
+# the writer thread for each interval, and the process they were started in (a forked child has none of them running)
+threads = {}
+threadsPid = None
+
+def get_writer_thread(interval: float = WRITE_INTERVAL) -> WriterThread:
+    """
+    The writer thread of this process for the given interval, started the first time it is asked for.
+    """
+    global threadsPid
+    if threadsPid != os.getpid():
+        threads.clear()
+        threadsPid = os.getpid()
+    if interval not in threads:
+        threads[interval] = WriterThread(interval)
+    return threads[interval]
+
+class AsyncLogWriter:
+    """
+    Wraps an open text file so that writes return immediately. Appending to and popping from a deque are atomic, so
+    the tick loop never takes a lock; it only waits if the writer has fallen MAX_PENDING lines behind, so memory stays
+    bounded if the disk cannot keep up (the number of times that happened is counted in `stalls`). If writing the file
+    fails (e.g. the disk is full), the exception is kept in `error` and raised by the next write or flush.
+
+    Args:
+    f - the file to write to; it is closed when the writer is
+    maxPending - the most lines that can be waiting to be written
+    interval - how often the writer thread wakes up to write, in seconds (writers with the same interval share a thread)
+    """
+    def __init__(self, f, maxPending: int = MAX_PENDING, interval: float = WRITE_INTERVAL):
+        self.f = f
+        self.maxPending = maxPending
+        self.pending = deque()
+        self.stalls = 0
+        self.error = None
+        # held while a batch is written, so close() never writes at the same time as the writer thread
+        self.lock = threading.Lock()
+        self.thread = get_writer_thread(interval)
+        self.thread.add(self)
+
+    def write(self, s: str):
+        if self.error:
+            raise self.error
+        self.pending.append(s)
+        if len(self.pending) >= self.maxPending:
+            self.stalls += 1
+            while len(self.pending) >= self.maxPending:
+                # nothing will drain the queue once writing it has failed
+                if self.error:
+                    raise self.error
+                self.thread.drained.clear()
+                self.thread.wake.set()
+                self.thread.drained.wait(self.thread.interval)
+
+    # the writer thread flushes after every batch, so there is nothing for the caller to wait for
+    def flush(self):
+        if self.error:
+            raise self.error
+
+    def drain(self):
+        """
+        Writes and flushes everything queued so far; called by the writer thread.
+        """
+        with self.lock:
+            batch = []
+            while self.pending:
+                batch.append(self.pending.popleft())
+            if batch:
+                self.f.write("".join(batch))
+                self.f.flush()
+
+    def close(self):
+        """
+        Writes out everything still queued and closes the file.
+        """
+        self.thread.remove(self)
+        if not self.error:
+            self.drain()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
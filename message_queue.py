@@ -0,0 +1,65 @@
+import threading
+from collections import deque
+
+# what to do with a message that arrives when the queue is full
+BLOCK = "block"              # wait for room; the receiving thread stops reading its socket, which backs up the sender
+DROP_OLDEST = "drop-oldest"  # make room by discarding the message at the front of the queue
+DROP_NEWEST = "drop-newest"  # discard the message that just arrived
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+class MessageQueue:
+    """
+    Thread-safe FIFO queue of received messages backed by a deque, so adding and removing a message takes constant time
+    no matter how long the backlog is. With a maxLength the queue never holds more than that many messages, and
+    overflow is handled according to the policy (one of POLICIES).
+
+    Besides the messages, the queue counts how many messages were added and dropped, and the most it ever held
+    (highWater).
+    """
+    def __init__(self, maxLength: int = 0, policy: str = BLOCK):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy}, expected one of {POLICIES}")
+        # a maxLength of 0 means the queue is unbounded
+        self.maxLength = maxLength
+        self.policy = policy
+        self.added = 0
+        self.dropped = 0
+        self.highWater = 0
+        self.messages = deque()
+        self.notFull = threading.Condition(threading.Lock())
+
+    def put(self, message, timeout: float = None):
+        """
+        Adds a message to the back of the queue. Returns False if the message was not added (dropped under the
+        drop-newest policy, or the timeout ran out while blocked) and True otherwise.
+        """
+        with self.notFull:
+            if self.maxLength and len(self.messages) >= self.maxLength:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self.messages.popleft()
+                    self.dropped += 1
+                elif not self.notFull.wait_for(lambda: len(self.messages) < self.maxLength, timeout):
+                    return False
+            self.messages.append(message)
+            self.added += 1
+            if len(self.messages) > self.highWater:
+                self.highWater = len(self.messages)
+            return True
+
+    def popleft(self):
+        """
+        Removes and returns the message at the front of the queue, waking up a sender blocked on a full queue.
+        """
+        with self.notFull:
+            message = self.messages.popleft()
+            self.notFull.notify()
+            return message
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __bool__(self):
+        return bool(self.messages)
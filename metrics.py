@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# in-process metrics for a running machine: counters, gauges (read when a snapshot is taken) and fixed-bucket
+# histograms, periodically written out as a JSON snapshot that can be watched while a run is going, e.g.
+#   watch -n1 cat logs/metrics0LOG.json
+# Updating a counter or histogram is a couple of additions with no locking, so every metric must be updated from a
+# single thread (process.py updates them all from the tick loop; the message queue keeps its own counts under its
+# lock). Snapshots are taken from another thread, so a snapshot can be off by the update in progress.
+
+# how often (in seconds) the snapshot file is rewritten
+SNAPSHOT_INTERVAL = 1.0
+
+# bucket upper bounds for the histograms process.py keeps
+LATENESS_MS_BUCKETS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000]
+LATENCY_US_BUCKETS = [10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000]
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+class Histogram:
+    """
+    Counts observations in fixed buckets: counts[i] is the number of values at most bounds[i] (and above bounds[i - 1]),
+    and the last count is for values above every bound. Also keeps the number, sum and largest of the values.
+    """
+    def __init__(self, bounds: list):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict:
+        return {"buckets": dict(zip([str(b) for b in self.bounds] + ["inf"], self.counts)), "count": self.count,
+                "mean": self.sum / self.count if self.count else 0, "max": self.max}
+
+class Metrics:
+    """
+    A named collection of counters, gauges and histograms that can be snapshotted together as a dict.
+    """
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def counter(self, name: str) -> Counter:
+        return self.counters.setdefault(name, Counter())
+
+    # a value that is read (by calling read()) when a snapshot is taken rather than updated as it changes
+    def gauge(self, name: str, read):
+        self.gauges[name] = read
+
+    def histogram(self, name: str, bounds: list) -> Histogram:
+        return self.histograms.setdefault(name, Histogram(bounds))
+
+    def snapshot(self) -> dict:
+        return {"time": time.time(),
+                **{name: c.value for name, c in self.counters.items()},
+                **{name: read() for name, read in self.gauges.items()},
+                **{name: h.snapshot() for name, h in self.histograms.items()}}
+
+class SnapshotWriter:
+    """
+    Writes metrics.snapshot() to path as JSON every interval seconds from a daemon thread. Each snapshot is written to
+    a temporary file that then replaces path, so a reader never sees a half-written snapshot.
+
+    Args:
+    metrics - the Metrics to snapshot
+    path - the file to write
+    interval - seconds between snapshots
+    """
+    def __init__(self, metrics: Metrics, path: str, interval: float = SNAPSHOT_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.metrics.snapshot(), f, indent=1)
+        os.replace(tmp, self.path)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def close(self):
+        """
+        Stops the writer thread after writing one last snapshot.
+        """
+        self.stopped.set()
+        self.thread.join()
+        self.write()
@@ -1,3 +1,4 @@
+import platform
 import signal
 import sys
 import os
@@ -6,244 +7,576 @@ import threading
 import time
 from datetime import datetime
 from random import randint
-from multiprocessing import Process 
+import multiprocessing
+from topology import make_topology
+from message_queue import MessageQueue, BLOCK
+from wire import FrameDecoder, ReconnectingLink, RECV_SIZE
+from binlog import BinaryLog, MAX_MACHINES
+from log_writer import AsyncLogWriter
+from scheduler import TickScheduler, LATE_FRACTION
+from metrics import Metrics, SnapshotWriter, LATENESS_MS_BUCKETS, LATENCY_US_BUCKETS
+from tracing import get_tracer, DEBUG
+from shm_ring import RingBuffer, ShmLink, supported
 
 # Constants
-# we run 3 processes with pids 0, 1, 2, which will also be used as indexes
+# we run N_PROCESS processes with pids 0, 1, ..., N_PROCESS - 1, which will also be used as indexes
 N_PROCESS = 3
-MESSAGE_SIZE = 4
+# which machines talk to each other: "mesh", "ring", "star" or "random" (see topology.py)
+TOPOLOGY = "mesh"
+TOPOLOGY_SEED = 0
 LOG_NAME = "LOG"
+# "text" writes the human-readable logs viz.py reads; "binary" writes fixed-width records through a buffer (much cheaper
+# per event, see binlog.py), which `python binlog.py logs/process<pid><LOG_NAME>.bin` converts to the text format
+LOG_FORMAT = "text"
+# write text logs from a background thread (see log_writer.py) so the tick loop never waits on the disk
+ASYNC_LOGGING = True
+# write a snapshot of each process's counters and latency histograms (see metrics.py) to
+# logs/metrics<pid><LOG_NAME>.json every second while it runs
+METRICS = True
 
 # change these constants to try different variants, e.g. differences in internal tick rates/probability of internal events
 TICK_RANGE = [1, 6]
 FIXED_TICKS = False
 TICKS = [1, 5, 6]
+# with two neighbors, a machine sends with probability 3/INTERNAL_EVENT_CAP (see get_event_cap for more neighbors)
 INTERNAL_EVENT_CAP = 10
 
-# ports for each process' server
-ports = {0: 23522, 1: 23523, 2: 23524}
-
-# stores messages for each of the three processes; since these queues are populated via socket communications and are never
+# the most messages a process's queue will hold (0 for no limit), and what happens to messages that arrive when it is
+# full: BLOCK stops reading from the sender's socket until there is room, "drop-oldest"/"drop-newest" discard messages
+MAX_QUEUE_LENGTH = 1024
+OVERFLOW_POLICY = BLOCK
+
+# how many queued messages a process handles in one tick: 1 is the strict one-message-per-tick model, K > 1 drains up
+# to K messages and 0 drains everything pending; a batch is logged as a single receive event with its message count
+BATCH_SIZE = 1
+
+# how clock updates travel between machines: "tcp" sends them over localhost sockets, "shm" writes them to a
+# shared-memory ring buffer per link (see shm_ring.py), which takes the kernel out of the path so the clock algorithm
+# can be run at message rates loopback TCP can't sustain; both deliver each link's messages in order and make a sender
+# wait when its link is backed up
+TRANSPORT = "tcp"
+# how long a machine's ring reader sleeps when none of its rings has anything in it
+POLL_INTERVAL = 0.0001
+
+# ports for each process' server; process pid listens on BASE_PORT + pid. A port of 0 lets the machine's server take any
+# free port, which it reports to the launcher (see start_machines), so runs started side by side never collide
+BASE_PORT = 23522
+ports = {pid: BASE_PORT + pid for pid in range(N_PROCESS)}
+# the host each process's server runs on; a peer file (see load_peers) sets hosts and ports for machines spread across
+# several computers
+hosts = {pid: "localhost" for pid in range(N_PROCESS)}
+# how long (in seconds) a process keeps trying to connect, or reconnect, to another before giving up
+CONNECT_TIMEOUT = 60
+
+# stores messages for each of the processes; since these queues are populated via socket communications and are never
 # appended to directly by a process (when an event is generated) this is not considered shared memory
-messageQueue = [[], [], []]
+messageQueue = [MessageQueue(MAX_QUEUE_LENGTH, OVERFLOW_POLICY) for _ in range(N_PROCESS)]
 
 # maintain references to all threads to prevent garbage collection
 threads = []
 
 # helper functions
-# handle a new message by updating the logical clock and writing to a logfile
-def handle_message_receipt(queue, clock, logFile):
-    message = queue.pop(0)
-    clock = max(message, clock) + 1
-    logFile.write(f"[MESSAGE RECEIVED] | Global Time - {datetime.now().strftime('%H:%M:%S.%f')} | Queue Length - {len(queue)} | Clock Time - {clock}\n")
+def load_peers(path: str) -> dict:
+    """
+    Reads a peer file, with a line "<pid> <host>:<port>" for each machine (blank lines and lines starting with # are
+    skipped); returns a dict from pid to (host, port). The pids must be 0, 1, ..., N - 1.
+    """
+    peers = {}
+    with open(path) as f:
+        for lineNumber, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                pid, address = line.split()
+                host, port = address.rsplit(":", 1)
+                peers[int(pid)] = (host, int(port))
+            except ValueError:
+                raise ValueError(f"{path}:{lineNumber}: expected <pid> <host>:<port>, got {line!r}")
+    if sorted(peers) != list(range(len(peers))):
+        raise ValueError(f"{path}: pids must be 0 to {len(peers) - 1}, got {sorted(peers)}")
+    return peers
+
+# the metrics a process keeps: messages sent and consumed, its queue's size, and histograms of how late ticks start,
+# how long socket sends take and how long logging an event takes
+def make_metrics(queue):
+    metrics = Metrics()
+    metrics.counter("ticks")
+    metrics.counter("messages_sent")
+    metrics.counter("messages_received")
+    metrics.counter("internal_events")
+    metrics.gauge("messages_arrived", lambda: queue.added)
+    metrics.gauge("messages_dropped", lambda: queue.dropped)
+    metrics.gauge("queue_length", lambda: len(queue))
+    metrics.gauge("queue_high_water", lambda: queue.highWater)
+    metrics.histogram("tick_lateness_ms", LATENESS_MS_BUCKETS)
+    metrics.histogram("send_latency_us", LATENCY_US_BUCKETS)
+    metrics.histogram("log_write_us", LATENCY_US_BUCKETS)
+    return metrics
+
+# log a receive event; count is the number of messages consumed, recorded only for batches
+# globalTime optionally overrides the wall-clock timestamp (used by the virtual-time simulator)
+def log_message_receipt(queueLength, clock, logFile, count=None, globalTime=None):
+    # binary logs timestamp their records themselves
+    if isinstance(logFile, BinaryLog):
+        logFile.received(queueLength, clock, count or 1)
+        return
+    if globalTime is None:
+        globalTime = datetime.now().strftime('%H:%M:%S.%f')
+    if count is None:
+        logFile.write(f"[MESSAGE RECEIVED] | Global Time - {globalTime} | Queue Length - {queueLength} | Clock Time - {clock}\n")
+    else:
+        logFile.write(f"[MESSAGE RECEIVED] | Global Time - {globalTime} | Queue Length - {queueLength} | Messages - {count} | Clock Time - {clock}\n")
     # the operation was reading the message, time to sleep again after flushing
     logFile.flush()
+
+# handle a new message by updating the logical clock and writing to a logfile
+def handle_message_receipt(queue, clock, logFile, globalTime=None):
+    message = queue.popleft()
+    clock = max(message, clock) + 1
+    log_message_receipt(len(queue), clock, logFile, globalTime=globalTime)
     # logical clock IR2, then IR1
     return clock
 
-def get_recipients(num):
+# handle up to batchSize queued messages (all of them if batchSize is 0) as a single receive event: the clock jumps
+# past the largest message in the batch, and the log line records how many messages were consumed; returns the new
+# clock and that count
+def handle_message_batch(queue, clock, logFile, batchSize=0, globalTime=None):
+    count = len(queue) if batchSize == 0 else min(batchSize, len(queue))
+    message = max(queue.popleft() for _ in range(count))
+    clock = max(message, clock) + 1
+    log_message_receipt(len(queue), clock, logFile, count, globalTime)
+    return clock, count
+
+# handle pending messages according to batchSize (see BATCH_SIZE); a batch size of 1 keeps the original log format.
+# Returns the new clock and how many messages were consumed (other threads may be adding to the queue meanwhile, so
+# its length before and after does not tell)
+def receive_messages(queue, clock, logFile, batchSize=BATCH_SIZE, globalTime=None):
+    if batchSize == 1:
+        return handle_message_receipt(queue, clock, logFile, globalTime), 1
+    return handle_message_batch(queue, clock, logFile, batchSize, globalTime)
+
+# map a random number in [1, get_event_cap(nNeighbors)] to the indexes (into the list of neighbors) to send to:
+# 1..nNeighbors sends to that one neighbor, nNeighbors + 1 sends to all of them and anything larger is internal
+def get_recipients(num, nNeighbors=2):
     toSend = []
-    if num == 1:
-        toSend = [0]
-    elif num == 2:
-        toSend = [1]
-    elif num == 3:
-        toSend = [0, 1]
+    if 1 <= num <= nNeighbors:
+        toSend = [num - 1]
+    elif num == nNeighbors + 1:
+        toSend = list(range(nNeighbors))
     return toSend
 
+# the upper bound of the random number drawn each tick for a machine with nNeighbors neighbors; INTERNAL_EVENT_CAP is the
+# bound for the original two neighbors, and it is scaled so the probability of an internal event stays the same
+def get_event_cap(nNeighbors):
+    return max(nNeighbors + 1, round((nNeighbors + 1) * INTERNAL_EVENT_CAP / 3))
+
+# the ticks per second for a machine, either fixed by TICKS or drawn randomly from TICK_RANGE with the given randint
+def get_clock_ticks(pid, randint=randint):
+    if FIXED_TICKS:
+        return TICKS[pid % len(TICKS)]
+    return randint(TICK_RANGE[0], TICK_RANGE[1])
+
 # log a message being sent, or an internal operation (depending on whether or not toSend is empty)
-def log_message_send(toSend, otherProcesses, clock, logFile):
+def log_message_send(toSend, otherProcesses, clock, logFile, globalTime=None):
+    if isinstance(logFile, BinaryLog):
+        logFile.sent([otherProcesses[rec] for rec in toSend], clock)
+        return
+    if globalTime is None:
+        globalTime = datetime.now().strftime('%H:%M:%S.%f')
     if toSend:
-        logFile.write(f"[MESSAGE(S) SENT] | Global Time - {datetime.now().strftime('%H:%M:%S.%f')} | Receiver(s) - {[otherProcesses[rec] for rec in toSend]} | Clock Time - {clock}\n")
+        logFile.write(f"[MESSAGE(S) SENT] | Global Time - {globalTime} | Receiver(s) - {[otherProcesses[rec] for rec in toSend]} | Clock Time - {clock}\n")
     else:
-        logFile.write(f"[INTERNAL] | Global Time - {datetime.now().strftime('%H:%M:%S.%f')} | No Messages Sent | Clock Time - {clock}\n")
+        logFile.write(f"[INTERNAL] | Global Time - {globalTime} | No Messages Sent | Clock Time - {clock}\n")
     # flush the log file to ensure that everything is written before the next clock cycle
     logFile.flush()
 
-def process_messages(pid: int, sleepDuration: float):
+# open a process's log file (overwriting if one already exists), with LOG_NAME suffix, in LOG_FORMAT, and mark down
+# the number of ticks per second for the process
+def open_log(pid, ticksPerSecond):
+    if LOG_FORMAT == "binary":
+        return BinaryLog(f"logs/process{pid}{LOG_NAME}.bin", pid, ticksPerSecond)
+    logFile = open(f"logs/process{pid}{LOG_NAME}.txt", "w")
+    logFile.write(f"ticks per second: {ticksPerSecond}\n")
+    if ASYNC_LOGGING:
+        logFile = AsyncLogWriter(logFile)
+    return logFile
+
+# refuse a run that LOG_FORMAT can't log, before any machine starts: a binary log would only fail at the first send to a
+# pid it has no room for, killing that machine's tick loop in the middle of the run
+def check_log_format(nMachines):
+    if LOG_FORMAT == "binary" and nMachines > MAX_MACHINES:
+        raise ValueError(f"binary logs support at most {MAX_MACHINES} machines, not {nMachines}; use LOG_FORMAT = \"text\"")
+
+def process_messages(pid: int, sleepDuration: float, neighbors: list = None, rings: dict = None, ready=None,
+                     launcher=None):
     """
     Simulates the event handling that occurs at each clock tick in a process. Processes messages from other processes
     if they exist and randomly sends messages to other processes.
 
     Args:
-    pid - the process id (must be 0, 1 or 2 and must be unique)
+    pid - the process id (must be in [0, N_PROCESS) and must be unique)
     sleepDuration - how long the process sleeps for between responding to events; equal to 1/(# ticks per second)
+    neighbors - sorted pids of the processes this process sends to (defaults to every other process)
+    rings - with the shm transport, the RingBuffer for each (sender, receiver) link; None to connect over TCP
+    ready - a threading.Event set once every neighbor has connected to this process (see init_server)
+    launcher - the process's end of its pipe to the launcher (see start_machines), told when the tick loop starts
     """
     clock = 1
     global messageQueue
+    # per-tick traces are debug level (see tracing.py), so by default they cost next to nothing
+    trace = get_tracer(pid)
 
-    # sleep to give time for all processes to be started
-    time.sleep(5)
-
-    # get pids of the other two processes
-    otherProcesses = list({0, 1, 2} - {pid})
-    otherProcesses.sort()
-    print(f"[{pid}] communicating with {otherProcesses}")
+    # get pids of the processes this one talks to
+    if neighbors is None:
+        neighbors = sorted(set(range(N_PROCESS)) - {pid})
+    otherProcesses = list(neighbors)
+    eventCap = get_event_cap(len(otherProcesses))
+    trace.info("communicating with %s", otherProcesses)
 
-    # maintain reference to servers for other two processes, indexed via their pid
-    sockets = [None, None, None]
+    # maintain reference to links to the servers of the other processes, indexed via their pid
+    links = {}
 
-    # attempt to connect to other two processes
+    # connect to the other processes, retrying with backoff until their servers are up (see wire.connect)
     for process in otherProcesses:
-        connected = False
-        sockets[process] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        while not connected:
-            try:
-                sockets[process].connect(("localhost", ports[process]))
-                connected = True
-                print(f"[{pid}] connected to {process}")
-            # if unable to connect, just try again
-            except:
-                print(f"[{pid}] can't connect to {process} - terminating process")
-                os._exit(1)
+        if rings is not None:
+            links[process] = ShmLink(rings[(pid, process)], pid)
+            continue
+        try:
+            links[process] = ReconnectingLink((hosts[process], ports[process]), pid, CONNECT_TIMEOUT)
+            trace.info("connected to %d", process)
+        except OSError as e:
+            trace.error("can't connect to %d after %d seconds - terminating process: %s", process, CONNECT_TIMEOUT, e)
+            os._exit(1)
+
+    # readiness barrier: start ticking only once the links to and from every neighbor are up, so no machine runs ahead
+    # while the others are still starting
+    if ready is not None:
+        ready.wait()
+    trace.info("all links up, starting")
+    if launcher is not None:
+        launcher.send("started")
 
     # open log file (overwriting if one already exists), with LOG_NAME suffix
-    with open(f"logs/process{pid}{LOG_NAME}.txt", "w") as logFile:
-        # mark down the number of ticks per second for this process
-        logFile.write(f"ticks per second: {1/sleepDuration}\n")
+    with open_log(pid, 1/sleepDuration) as logFile:
+        # ticks fall on absolute deadlines, so the time spent handling a tick does not slow the clock rate down
+        scheduler = TickScheduler(1/sleepDuration)
+
+        # counters and histograms are only updated by this thread; another one writes them out
+        metrics = make_metrics(messageQueue[pid])
+        ticks, sent, received, internal = (metrics.counters[name] for name in
+                                           ["ticks", "messages_sent", "messages_received", "internal_events"])
+        tickLateness, sendLatency, logLatency = (metrics.histograms[name] for name in
+                                                 ["tick_lateness_ms", "send_latency_us", "log_write_us"])
+        metrics.gauge("reconnects", lambda: sum(getattr(link, "reconnects", 0) for link in links.values()))
+        if METRICS:
+            SnapshotWriter(metrics, f"logs/metrics{pid}{LOG_NAME}.json")
 
         while True:
-            # sleep for specified number of seconds
-            print(f"[{pid}] sleeping for {sleepDuration} seconds")
-            time.sleep(sleepDuration)
+            # sleep until the next tick is due
+            # only work out the sleep time when it is going to be printed
+            if trace.level <= DEBUG:
+                trace.debug("sleeping for %s seconds", scheduler.sleep_time())
+            lateness = scheduler.wait()
+            ticks.inc()
+            tickLateness.observe(lateness / 1e6)
+            if lateness > scheduler.period * LATE_FRACTION:
+                trace.warning("tick started %.1f ms late, %d tick(s) missed so far", lateness / 1e6, scheduler.missed)
 
             # process messages from the message queue if they exist
             if messageQueue[pid]:
-                # set logical clock to the maximum of local clock and received message; log event
-                clock = handle_message_receipt(messageQueue[pid], clock, logFile)
-                print(f"[{pid}] processed message, updated clock value to {clock}")
+                # set logical clock to the maximum of local clock and received message(s); log event
+                start = time.perf_counter_ns()
+                clock, consumed = receive_messages(messageQueue[pid], clock, logFile, BATCH_SIZE)
+                logLatency.observe((time.perf_counter_ns() - start) / 1e3)
+                received.inc(consumed)
+                trace.debug("processed message, updated clock value to %d", clock)
                 continue 
 
             # generate random number to decide what event will occur
-            num = randint(1, INTERNAL_EVENT_CAP)
-            print(f"[{pid}] generated number {num}")
+            num = randint(1, eventCap)
+            trace.debug("generated number %d", num)
 
-            # send to first, second or both of the other processes depending on number generated
-            toSend = get_recipients(num)
+            # send to one or all of the other processes (or none) depending on number generated
+            toSend = get_recipients(num, len(otherProcesses))
             
             # send messages
-            print(f"[{pid}] sending messages to {len(toSend)} other process(es)")
+            trace.debug("sending messages to %d other process(es)", len(toSend))
 
             try:
                 for rec in toSend:
-                    print(f"[{pid}] sending message to {otherProcesses[rec]}")
-                    sockets[otherProcesses[rec]].sendall(clock.to_bytes(MESSAGE_SIZE, "big"))
+                    trace.debug("sending message to %d", otherProcesses[rec])
+                    start = time.perf_counter_ns()
+                    links[otherProcesses[rec]].send(clock)
+                    sendLatency.observe((time.perf_counter_ns() - start) / 1e3)
+                    sent.inc()
+            # links reconnect by themselves, so this means another process has been unreachable for CONNECT_TIMEOUT
             except:
-                print(f"[{pid}] there is an error communicating with the server - terminating process")
+                trace.error("there is an error communicating with the server - terminating process")
                 # close all sockets
-                for sock in sockets:
-                    if sock:
-                        sock.close()
+                for link in links.values():
+                    link.close()
                 os._exit(1)
 
             # update logical clock (IR1)
             clock += 1
 
             # log message send event
+            if not toSend:
+                internal.inc()
+            start = time.perf_counter_ns()
             log_message_send(toSend, otherProcesses, clock, logFile)
+            logLatency.observe((time.perf_counter_ns() - start) / 1e3)
 
 
 def service_connection(pid: int, clientSocket):
     """
-    Adds messages sent to the server from a client to the appropriate process's message queue.
+    Adds messages sent to the server from a client to the appropriate process's message queue, until the client
+    disconnects; a client that reconnects is serviced by a new thread.
 
     Args:
-    pid - the process id (must be 0, 1 or 2 and must be unique)
+    pid - the process id (must be in [0, N_PROCESS) and must be unique)
     clientSocket - the processes's client's socket object returned from .accept()
     """
     global messageQueue
+    trace = get_tracer(pid)
+    # reassembles frames (see wire.py) from however the stream happens to be split across reads
+    decoder = FrameDecoder()
     while True:
         try:
-            # each message is a MESSAGE_SIZE length encoding the logical clock value of the sender process
-            rec = clientSocket.recv(MESSAGE_SIZE)
+            rec = clientSocket.recv(RECV_SIZE)
             # if the client sends 0 that means the client has disconnected; raise an exception (to be caught later)
             if not rec:
-                print(f"[{pid}] client disconnected")
-                raise
-        # there is an error communicating with the client; quit the program
+                trace.info("client disconnected")
+                clientSocket.close()
+                return
+            frames = decoder.feed(rec)
+        # there is an error communicating with the client (or it sent a corrupt frame); drop the connection, and the
+        # client reconnects (see wire.ReconnectingLink)
         except Exception as e:
-            print(f"[{pid}] there is an error communicating with a client - terminating process: {e}")
+            trace.error("there is an error communicating with a client - closing connection: %s", e)
             clientSocket.close()
-            os._exit(1)
+            return
+
+        # add messages to the process's message queue; each frame carries one or more clock values of the sender
+        for sender, seq, clocks in frames:
+            for message in clocks:
+                trace.debug("received message %d from %d", message, sender)
+                messageQueue[pid].put(message)
 
-        # add message to the process's message queue
-        message = int.from_bytes(rec, "big")
-        print(f"[{pid}] received message {message}")
-        messageQueue[pid].append(message)
 
+def service_rings(pid: int, rings: dict):
+    """
+    Adds messages written to this process's incoming ring buffers to its message queue; the shared-memory counterpart
+    of init_server and service_connection.
 
-def init_server(pid: int):
+    Args:
+    pid - the process id (must be in [0, N_PROCESS) and must be unique)
+    rings - the RingBuffer each neighbor sends to this process through, indexed by the neighbor's pid
+    """
+    global messageQueue
+    trace = get_tracer(pid)
+    while True:
+        idle = True
+        for sender, ring in rings.items():
+            for message in ring.pop_all():
+                idle = False
+                trace.debug("received message %d from %d", message, sender)
+                # under the BLOCK policy this waits for room, and the sender's ring fills up behind it
+                messageQueue[pid].put(message)
+        if idle:
+            time.sleep(POLL_INTERVAL)
+
+
+def init_server(pid: int, nClients: int = N_PROCESS - 1, ready=None, listening=None):
     """
     Initializes the server for each processes using sockets and waits for connections. Upon connecting with
     a client, the server offloads processing of communications to the service_connections helper function.
     
     Args:
-    pid - the process id (must be 0, 1 or 2 and must be unique)
+    pid - the process id (must be in [0, N_PROCESS) and must be unique)
+    nClients - the number of processes that will connect to this server
+    ready - a threading.Event to set once nClients connections have been accepted
+    listening - a threading.Event to set once the server is accepting connections
     """
     # each process is associated with a port for its server; get the appropriate port
     serverPort = ports[pid]
-    print(f"[{pid}] attempting to run on port {serverPort}")
+    trace = get_tracer(pid)
+    trace.info("attempting to run on port %d", serverPort)
 
-    # start the server socket, bind it, and put it into listening mode capable of accepting 2 connections
+    # start the server socket, bind it, and put it into listening mode capable of accepting a connection from each client
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as serverSock:
-        serverSock.bind(("localhost", serverPort))
-        serverSock.listen(2)
+        # a machine restarted after a crash can listen on its port again straight away, while the old connections are
+        # still in TIME_WAIT
+        serverSock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # without a server the process can't receive anything; exiting also tells the launcher (see start_machines)
+        try:
+            serverSock.bind((hosts[pid], serverPort))
+            serverSock.listen(max(nClients, 1))
+        except Exception as e:
+            trace.error("can't listen on port %d - terminating process: %s", serverPort, e)
+            os._exit(1)
+        # the port the OS picked, if any port would do
+        ports[pid] = serverSock.getsockname()[1]
+        accepted = 0
+        if listening is not None:
+            listening.set()
 
         # a forever loop until the program exits
         while True:
             try:
-                # wait for connections from the other two processes
-                print(f"[{pid}] server waiting to accept connection...")
+                # wait for connections from the other processes
+                trace.info("server waiting to accept connection...")
                 c, addr = serverSock.accept()
-                print(f"[{pid}] connected to process {addr[0]}:{addr[1]}")
+                trace.info("connected to process %s:%d", addr[0], addr[1])
             # if the .accept() function throws an error this is irrecoverable; exit the process with status code 7
             except Exception as e:
-                print(f"[{pid}] error accepting connection - terminating process: {e}")
+                trace.error("error accepting connection - terminating process: %s", e)
                 os._exit(1)
             # start a new thread for each client connection
             listener = threading.Thread(target=service_connection, args=(pid, c,))
             listener.start()
             threads.append(listener)
+            # connections after the first nClients are neighbors reconnecting
+            accepted += 1
+            if accepted == nClients and ready is not None:
+                ready.set()
 
 
-def init_process(pid: int):
+def init_process(pid: int, neighbors: list, ringNames: dict = None, launcher=None):
     """
     Initializes a process with a server thread which waits for incoming connections and adds
     incoming messages to the process's queue, and a processor thread that processes events and
     maintains the logical clock.
 
     Args:
-    pid - the process id (must be 0, 1 or 2 and must be unique)
+    pid - the process id (must be in [0, N_PROCESS) and must be unique)
+    neighbors - sorted pids of the processes this process is linked to
+    ringNames - with the shm transport, the shared memory name of the ring buffer for each (sender, receiver) link
+    launcher - this process's end of a pipe to the launcher, for the startup handshake (see start_machines)
     """
-    # start the server thread for each process
-    server = threading.Thread(target=init_server, args=(pid,))
+    rings = None
+    # set once every neighbor has connected to this process, and once this process's server is listening; the rings
+    # are there from the start
+    ready = threading.Event()
+    listening = threading.Event()
+    if ringNames is not None or not neighbors:
+        ready.set()
+    if ringNames is not None:
+        listening.set()
+    if ringNames is not None:
+        # attach to the rings this process writes to and the ones it reads from
+        rings = {link: RingBuffer(name=name) for link, name in ringNames.items() if pid in link}
+        server = threading.Thread(target=service_rings, args=(pid, {s: ring for (s, r), ring in rings.items() if r == pid}))
+    else:
+        # start the server thread for each process; links are two-way, so every neighbor connects to this server
+        server = threading.Thread(target=init_server, args=(pid, len(neighbors), ready, listening))
     server.start()
     threads.append(server)
 
+    # tell the launcher this process is listening (and on which port), and wait until every other one is before
+    # connecting to them; the launcher answers with every machine's port
+    if launcher is not None:
+        listening.wait()
+        launcher.send(ports.get(pid))
+        ports.update(launcher.recv())
+
     # randomly generate clock speed for process in terms of number of ticks per second
-    clockTicks = randint(TICK_RANGE[0], TICK_RANGE[1])
-    if FIXED_TICKS:
-        clockTicks = TICKS[pid]
-    processor = threading.Thread(target=process_messages, args=(pid, 1/clockTicks))
+    clockTicks = get_clock_ticks(pid)
+    processor = threading.Thread(target=process_messages, args=(pid, 1/clockTicks, neighbors, rings, ready, launcher))
     processor.start()
     threads.append(processor)
 
 
+def start_machines(pids: list, neighbors: list, ringNames: dict = None) -> list:
+    """
+    Starts an OS process running init_process for each machine in pids, and returns the processes once all of their
+    tick loops are running. Each process has a pipe to the launcher: it reports when its server is listening and on
+    which port, is told to connect (along with every machine's port) once every process is listening, and reports again
+    when its links are up and it starts ticking. So connections are made as soon as they can succeed rather than after
+    a fixed wait, and machines with a port of 0 in ports listen wherever the OS lets them, which ports is updated with.
+    If a process exits during startup, all of them are terminated and EOFError is raised. Raises ValueError, before starting any, if LOG_FORMAT can't log a run
+    this size.
+
+    Args:
+    pids - the machines to start here (machines on other computers connect to these as they come up)
+    neighbors - the topology: neighbors[pid] is the sorted list of pid's neighbors, for every machine in the run
+    ringNames - with the shm transport, the shared memory name of the ring buffer for each (sender, receiver) link
+    """
+    # the machines read this module's constants (set by the caller, e.g. sweep.run from its configuration) and
+    # messageQueue as globals, so they have to be forked: a spawned or forkserver process (the default on macOS and on
+    # Linux from Python 3.14) would import process.py afresh and run with the defaults
+    context = multiprocessing.get_context("fork")
+    check_log_format(len(neighbors))
+    machines, pipes = [], []
+    try:
+        for pid in pids:
+            ours, theirs = context.Pipe()
+            machine = context.Process(target=init_process, args=(pid, neighbors[pid], ringNames, theirs))
+            machine.start()
+            # with the process holding the only other copy of its end, recv raises EOFError if the process dies
+            theirs.close()
+            machines.append(machine)
+            pipes.append(ours)
+        for pid, pipe in zip(pids, pipes):
+            ports[pid] = pipe.recv()
+        for pipe in pipes:
+            pipe.send(ports)
+        for pipe in pipes:
+            pipe.recv()
+    except:
+        for machine in machines:
+            machine.terminate()
+        raise
+    return machines
+
+
 if __name__ == "__main__":
+    # usage: python process.py [LOG_NAME] [--peers FILE] [--pids 0,2]
     # optionally specify a suffix for the log file; the log name will be process<pid><LOG_NAME>.txt
-    if len(sys.argv) >= 2:
-        LOG_NAME = str(sys.argv[1])
+    # --peers reads every machine's host and port from a peer file (see load_peers) instead of running them all on
+    # localhost, and --pids runs only the listed machines here; to spread a run across computers, start process.py on
+    # each with the same peer file and that computer's pids (they connect to each other as they come up)
+    args = sys.argv[1:]
+    options = {args[i]: args[i + 1] for i in range(len(args) - 1) if args[i] in ("--peers", "--pids")}
+    positional = [arg for i, arg in enumerate(args) if not arg.startswith("--") and (i == 0 or args[i - 1] not in options)]
+    if positional:
+        LOG_NAME = str(positional[0])
+    if "--peers" in options:
+        peers = load_peers(options["--peers"])
+        N_PROCESS = len(peers)
+        hosts = {pid: host for pid, (host, _) in peers.items()}
+        ports = {pid: port for pid, (_, port) in peers.items()}
+        messageQueue = [MessageQueue(MAX_QUEUE_LENGTH, OVERFLOW_POLICY) for _ in range(N_PROCESS)]
+    localPids = [int(pid) for pid in options["--pids"].split(",")] if "--pids" in options else list(range(N_PROCESS))
+    if TRANSPORT == "shm" and len(localPids) < N_PROCESS:
+        print("the shm transport needs every machine on this computer; leave out --pids")
+        sys.exit(1)
+    if TRANSPORT == "shm" and not supported():
+        print(f"the shm transport only runs on x86-64, not {platform.machine()}; use TRANSPORT = \"tcp\"")
+        sys.exit(1)
+    try:
+        check_log_format(N_PROCESS)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
     
+    rings = {}
     try:
-        processes = []
-
-        for i in range(N_PROCESS):
-            # we give the three processes being run pids of 0, 1 and 2
-            processes.append(Process(target=init_process, args=(i,)))
-        
-        # start all processes
-        for process in processes:
-            process.start()
+        # every process must agree on the topology, so it is built once here and handed to each of them
+        neighbors = make_topology(TOPOLOGY, N_PROCESS, TOPOLOGY_SEED)
+
+        # with the shm transport, a ring buffer for each direction of every link, created (and later freed) here
+        ringNames = None
+        if TRANSPORT == "shm":
+            rings = {(i, j): RingBuffer() for i in range(N_PROCESS) for j in neighbors[i]}
+            ringNames = {link: ring.name for link, ring in rings.items()}
+
+        # start all processes (we give the processes being run pids of 0, 1, ..., N_PROCESS - 1), and wait until they
+        # are all connected and ticking
+        start = time.perf_counter()
+        processes = start_machines(localPids, neighbors, ringNames)
+        print(f"started {len(processes)} machine(s) in {time.perf_counter() - start:.2f} seconds")
         
         # join all processes
         for process in processes:
@@ -252,8 +585,12 @@ if __name__ == "__main__":
     # catch interrupts
     except KeyboardInterrupt:
         print("\nExiting...")
+        for ring in rings.values():
+            ring.close()
         os._exit(0)
         
     except:
         print("\nUnexpected error...")
+        for ring in rings.values():
+            ring.close()
         os._exit(1)
\ No newline at end of file
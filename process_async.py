@@ -0,0 +1,154 @@
+import asyncio
+import sys
+import time
+from random import randint
+
+import process
+from process import N_PROCESS, TOPOLOGY, TOPOLOGY_SEED, BATCH_SIZE, MAX_QUEUE_LENGTH, OVERFLOW_POLICY
+from process import receive_messages, get_recipients, get_event_cap, get_clock_ticks, log_message_send, open_log
+from message_queue import MessageQueue, BLOCK
+from topology import make_topology
+from wire import FrameDecoder, RECV_SIZE, SEQ_MOD, encode_frame
+from scheduler import TickScheduler
+from tracing import get_tracer
+
+# asyncio alternative to process.py: instead of one OS process per machine, each with a thread per incoming connection,
+# a single event loop hosts every machine. Each machine has its own server (asyncio.start_server), its own queue and a
+# coroutine running its tick loop, and the machines still only talk to each other over sockets, so none of them ever
+# looks at another's queue
+
+# how long to wait between checks when a full queue under the BLOCK policy has no room for an incoming message
+BLOCKED_POLL = 0.001
+
+async def service_connection(pid: int, queue: MessageQueue, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Adds messages sent to a machine's server by one of its neighbors to the machine's message queue.
+
+    Args:
+    pid - the id of the machine the server belongs to
+    queue - the machine's message queue
+    reader, writer - the streams for the connection, from asyncio.start_server
+    """
+    decoder = FrameDecoder()
+    try:
+        while True:
+            rec = await reader.read(RECV_SIZE)
+            if not rec:
+                get_tracer(pid).info("client disconnected")
+                return
+            # each frame carries one or more clock values of the sender machine (see wire.py)
+            for sender, seq, clocks in decoder.feed(rec):
+                for message in clocks:
+                    # a full queue under the BLOCK policy stops this coroutine from reading the socket until there is
+                    # room, without blocking the event loop the other machines run on
+                    while not queue.put(message, timeout=0):
+                        if queue.policy != BLOCK:
+                            break
+                        await asyncio.sleep(BLOCKED_POLL)
+    # the event loop is shutting down; stop reading quietly (streams report a cancelled handler as an error)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        writer.close()
+
+
+async def process_messages(pid: int, sleepDuration: float, neighbors: list, queue: MessageQueue, ports: dict):
+    """
+    The tick loop of a machine as a coroutine: the same events as process.process_messages, but sleeping and sending
+    yield to the event loop instead of blocking a thread.
+
+    Args:
+    pid - the machine id (must be in [0, N_PROCESS) and must be unique)
+    sleepDuration - how long the machine sleeps for between responding to events; equal to 1/(# ticks per second)
+    neighbors - sorted pids of the machines this machine sends to
+    queue - the machine's message queue
+    ports - the port of every machine's server, by pid
+    """
+    clock = 1
+    otherProcesses = list(neighbors)
+    eventCap = get_event_cap(len(otherProcesses))
+
+    # every server is listening before any tick loop starts, so the connections succeed on the first try
+    writers = {}
+    seqs = dict.fromkeys(otherProcesses, 0)
+    for other in otherProcesses:
+        _, writers[other] = await asyncio.open_connection("localhost", ports[other])
+
+    try:
+        with open_log(pid, 1/sleepDuration) as logFile:
+            scheduler = TickScheduler(1/sleepDuration)
+
+            while True:
+                await scheduler.wait_async()
+
+                # process message(s) from the message queue if they exist
+                if queue:
+                    clock, _ = receive_messages(queue, clock, logFile, BATCH_SIZE)
+                    continue
+
+                # send to one or all of the other machines (or none) depending on number generated
+                toSend = get_recipients(randint(1, eventCap), len(otherProcesses))
+                for rec in toSend:
+                    other = otherProcesses[rec]
+                    writers[other].write(encode_frame(pid, seqs[other], [clock]))
+                    seqs[other] = (seqs[other] + 1) % SEQ_MOD
+                for rec in toSend:
+                    await writers[otherProcesses[rec]].drain()
+
+                # update logical clock (IR1) and log the event
+                clock += 1
+                log_message_send(toSend, otherProcesses, clock, logFile)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+async def run(n: int = N_PROCESS, topology: str = TOPOLOGY, duration: float = None):
+    """
+    Starts n machines on the running event loop and runs them for duration seconds (forever if None).
+
+    Args:
+    n - number of machines
+    topology - name of a topology from topology.py
+    duration - how long to run the machines for, in seconds
+    """
+    process.check_log_format(n)
+    neighbors = make_topology(topology, n, TOPOLOGY_SEED)
+    queues = [MessageQueue(MAX_QUEUE_LENGTH, OVERFLOW_POLICY) for _ in range(n)]
+    # one server per machine, on consecutive ports (process.ports only covers N_PROCESS machines)
+    ports = {pid: process.BASE_PORT + pid for pid in range(n)}
+
+    servers = []
+    for pid in range(n):
+        # bind the pid (and its queue) now, since the callback runs later
+        handler = lambda reader, writer, pid=pid: service_connection(pid, queues[pid], reader, writer)
+        servers.append(await asyncio.start_server(handler, "localhost", ports[pid]))
+
+    machines = [asyncio.create_task(process_messages(pid, 1/get_clock_ticks(pid), neighbors[pid], queues[pid], ports))
+                for pid in range(n)]
+    try:
+        await asyncio.wait(machines, timeout=duration, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for machine in machines:
+            machine.cancel()
+        for server in servers:
+            server.close()
+    # surface the error of a machine that failed rather than exiting quietly
+    for machine in machines:
+        if machine.done() and not machine.cancelled() and machine.exception():
+            raise machine.exception()
+
+
+if __name__ == "__main__":
+    # usage: python process_async.py [LOG_NAME] [N] [DURATION]
+    if len(sys.argv) >= 2:
+        process.LOG_NAME = str(sys.argv[1])
+    n = int(sys.argv[2]) if len(sys.argv) >= 3 else N_PROCESS
+    duration = float(sys.argv[3]) if len(sys.argv) >= 4 else None
+
+    start, startCpu = time.perf_counter(), time.process_time()
+    try:
+        asyncio.run(run(n, duration=duration))
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    print(f"ran {n} machines for {time.perf_counter() - start:.1f} s using {time.process_time() - startCpu:.1f} s of CPU")
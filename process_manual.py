@@ -4,16 +4,17 @@ import threading
 import time
 from datetime import datetime
 from random import randint
+from process import load_peers, BASE_PORT
+from wire import connect
 
-ports = {0: 21525, 1: 21526, 2: 21527}
+# the same addresses process.py uses, unless a peer file is given (see process.load_peers)
+peers = {pid: ("localhost", BASE_PORT + pid) for pid in range(3)}
 messageQueue = []
 threads = []
 clock = 1
 
 def process_messages(pid: int, sleepDuration: float):
     global clock, messageQueue
-    # give time for the rest of the processes to be started
-    time.sleep(10)
     # open log file (overwriting if one already exists)
     logFile = open(f"process{pid}LOG_manual.txt", "w")
 
@@ -23,19 +24,10 @@ def process_messages(pid: int, sleepDuration: float):
     print(otherProcesses)
     sockets = [None, None, None]
 
+    # the other processes are started by hand, so keep trying (backing off) until each one's server is up
     for process in otherProcesses:
-        connected = False
-        sockets[process] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        while not connected:
-            try:
-                sockets[process].connect(("localhost", ports[process]))
-                connected = True
-                print(f"connected to {process}")
-            # if unable to connect, just try again
-            except Exception as e:
-                print(f"can't connect to {process} - sleeping: {e}")
-                time.sleep(1)
-                continue
+        sockets[process] = connect(peers[process])
+        print(f"connected to {process}")
     
     while True:
         print(f"sleeping for {sleepDuration} seconds")
@@ -96,19 +88,21 @@ def service_connection(clientSocket):
         messageQueue.append(val)
                 
 if __name__ == "__main__":
-    # must specify a host and port to connect to
-    if len(sys.argv) != 2:
-        print(f"usage: {sys.argv[0]} <pid>")
+    # must specify a pid, and optionally a peer file with the address of each process
+    if len(sys.argv) not in (2, 3):
+        print(f"usage: {sys.argv[0]} <pid> [peer file]")
         sys.exit(1)
+    if len(sys.argv) == 3:
+        peers = load_peers(sys.argv[2])
 
-    # get the port corresponding to the process's PID
+    # get the address corresponding to the process's PID
     pid = int(sys.argv[1])
-    serverPort = ports[pid]
+    serverHost, serverPort = peers[pid]
 
     print(serverPort)
     # start the server socket, bind it, and put it into listening mode
     serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    serverSock.bind(("localhost", serverPort))
+    serverSock.bind((serverHost, serverPort))
     serverSock.listen(2)
 
     # calculate sleep duration for this process
@@ -0,0 +1,168 @@
+import heapq
+import sys
+import time
+from collections import deque
+
+from process import receive_messages, log_message_send
+from simulation import NullLog
+from viz import load_log, get_log_files, recipient_lists, RECEIVED, SENT, CACHE_DIR
+
+# replays a recorded run from its logs: every machine's logged events are merged into one global order by their
+# timestamps and re-executed through process.py's clock helpers, with no sockets and no sleeping, checking that each
+# event leaves the machine's clock at the value it logged. The logs already record every choice that was made (which
+# event happened at each tick, who a send went to, how many messages a receive consumed), so they are all that is
+# needed to re-execute a run, and a run of minutes replays in milliseconds; an anomaly seen in a real run can be
+# reproduced and profiled offline, e.g. python -m cProfile -s cumtime replay.py LOG3
+#
+# A machine's send is logged just after its messages go out, so a receiver can log consuming a message before the
+# sender logs sending it. A receive therefore waits until the messages it consumed have been sent in the replay (the
+# other machines keep replaying in the meantime); if they never are, as when a run is killed between a send and its
+# log line, the receive goes ahead with the messages there are and is counted as forced. After a mismatch the replayed
+# clock is reset to the logged value, so every mismatch is reported independently of the ones before it.
+#
+# Timestamps are the only order the logs give between machines, so events logged at the same time are replayed in pid
+# order, which need not be the order they happened in. That matters when two machines send to the same machine at the
+# same time: their messages may be queued the wrong way round, and a receive that consumes one of them can come out
+# differently without anything having gone wrong. A mismatch at such a receive is counted as ambiguous rather than as
+# a mismatch (the simulator logs many equal timestamps, since its machines tick at the same virtual times).
+# usage: python replay.py [LOG_NAME]
+
+LOG_NAME = "LOG"
+# the most mismatches kept in the result (all of them are counted)
+MAX_REPORTED = 20
+
+EVENT_NAMES = {RECEIVED: "received", SENT: "sent"}
+
+def replay(logs: list) -> dict:
+    """
+    Re-executes a run from its parsed logs (see viz.parse_log or viz.load_log; logs[pid] is machine pid's) and checks
+    every clock value against the logged one.
+
+    Returns a dict with the number of events replayed, the number of mismatches and (up to MAX_REPORTED of) the
+    mismatches themselves, each with the machine, its log file line, the event's time and kind, and the logged and
+    replayed clocks; the number of ambiguous mismatches (see the top of this file), which are left out of the
+    mismatches; the number of forced receives and of messages they were missing; every machine's final clock; and how
+    long the replay took in seconds.
+    """
+    start = time.perf_counter()
+    n = len(logs)
+    times = [log["time"].tolist() for log in logs]
+    events = [log["event"].tolist() for log in logs]
+    logged = [log["clock"].tolist() for log in logs]
+    messages = [log["messages"].tolist() for log in logs]
+    recipients = [recipient_lists(log) for log in logs]
+
+    # the times at which more than one machine sent to each machine, whose messages may be replayed out of order
+    senders = {}
+    for pid in range(n):
+        for i in (i for i, event in enumerate(events[pid]) if event == SENT):
+            for rec in recipients[pid][i]:
+                senders.setdefault((rec, times[pid][i]), set()).add(pid)
+    tied = [set() for _ in range(n)]
+    for (rec, t), pids in senders.items():
+        if len(pids) > 1 and rec < n:
+            tied[rec].add(t)
+
+    clocks = [1] * n
+    queues = [deque() for _ in range(n)]
+    # when each queued message was sent, alongside queues
+    sentAt = [deque() for _ in range(n)]
+    cursors = [0] * n
+    nullLog = NullLog()
+    mismatches = []
+    nMismatches = 0
+    ambiguous = 0
+    forced = 0
+    missing = 0
+
+    # machines whose next event is due, by time; a machine waiting for messages is taken out until they are sent
+    due = [(times[pid][0], pid) for pid in range(n) if times[pid]]
+    heapq.heapify(due)
+    waiting = set()
+    replayed = 0
+    while due or waiting:
+        if due:
+            _, pid = heapq.heappop(due)
+        else:
+            # every machine left is waiting for messages that were never logged as sent
+            pid = min(waiting, key=lambda p: times[p][cursors[p]])
+        i = cursors[pid]
+        event = events[pid][i]
+        isTied = False
+
+        if event == RECEIVED:
+            count = messages[pid][i]
+            if len(queues[pid]) < count and pid not in waiting:
+                waiting.add(pid)
+                continue
+            if len(queues[pid]) < count:
+                forced += 1
+                missing += count - len(queues[pid])
+                count = len(queues[pid])
+            waiting.discard(pid)
+            if count:
+                clocks[pid], _ = receive_messages(queues[pid], clocks[pid], nullLog, count)
+                consumed = [sentAt[pid].popleft() for _ in range(count)]
+                isTied = any(t in tied[pid] for t in consumed)
+            else:
+                clocks[pid] += 1
+        elif event == SENT:
+            for rec in recipients[pid][i]:
+                if rec >= n:
+                    continue
+                queues[rec].append(clocks[pid])
+                sentAt[rec].append(times[pid][i])
+                # a machine waiting for this message can go on
+                if rec in waiting and len(queues[rec]) >= messages[rec][cursors[rec]]:
+                    waiting.discard(rec)
+                    heapq.heappush(due, (times[rec][cursors[rec]], rec))
+            clocks[pid] += 1
+            log_message_send(recipients[pid][i], range(n), clocks[pid], nullLog)
+        else:
+            clocks[pid] += 1
+            log_message_send([], range(n), clocks[pid], nullLog)
+
+        if clocks[pid] != logged[pid][i]:
+            if isTied:
+                ambiguous += 1
+            else:
+                nMismatches += 1
+                if len(mismatches) < MAX_REPORTED:
+                    # line 1 of a log is its ticks per second
+                    mismatches.append({"pid": pid, "line": i + 2, "time": times[pid][i],
+                                       "event": EVENT_NAMES.get(event, "internal"), "logged": logged[pid][i],
+                                       "replayed": clocks[pid]})
+            clocks[pid] = logged[pid][i]
+
+        replayed += 1
+        cursors[pid] += 1
+        if cursors[pid] < len(times[pid]):
+            heapq.heappush(due, (times[pid][cursors[pid]], pid))
+
+    return {"events": replayed, "mismatch_count": nMismatches, "mismatches": mismatches, "ambiguous": ambiguous,
+            "forced": forced, "missing": missing, "clocks": clocks, "seconds": time.perf_counter() - start}
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        LOG_NAME = str(sys.argv[1])
+
+    logFiles = get_log_files(LOG_NAME)
+    if not logFiles:
+        print(f"no logs found for {LOG_NAME}")
+        sys.exit(1)
+    # machines are numbered 0 to N - 1, so recipients can be looked up by index
+    logs = [load_log(logFiles[pid], CACHE_DIR) for pid in sorted(logFiles)]
+    result = replay(logs)
+    print(f"replayed {result['events']} events in {result['seconds'] * 1e3:.1f} ms; final clocks {result['clocks']}")
+    if result["forced"]:
+        print(f"{result['forced']} receive(s) replayed without {result['missing']} message(s) that were never logged as sent")
+    if result["ambiguous"]:
+        print(f"{result['ambiguous']} receive(s) of messages sent at the same time by different machines replayed "
+              f"differently, which the logs cannot tell apart from what happened")
+    for m in result["mismatches"]:
+        print(f"machine {m['pid']}, line {m['line']} ({m['event']} at {m['time']:.6f} s): "
+              f"logged clock {m['logged']}, replayed {m['replayed']}")
+    if result["mismatch_count"]:
+        print(f"{result['mismatch_count']} clock mismatch(es)")
+        sys.exit(1)
+    print("every clock value matches")
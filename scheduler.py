@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+# a tick scheduler that keeps a machine at its configured rate. Sleeping for the tick period after doing a tick's work
+# makes every tick last period + work time, so a machine always runs slower than configured and the error adds up.
+# Instead the scheduler keeps absolute deadlines (start + k * period) on the monotonic clock and sleeps until the next
+# one, so the time spent working comes out of the sleep.
+
+# sleep until this close to the deadline and busy-wait the rest, for sub-millisecond accuracy (0 to never spin);
+# spinning burns CPU, so it is off by default
+SPIN_NS = 0
+# a tick that starts more than this fraction of a period after its deadline counts as late
+LATE_FRACTION = 0.1
+
+class TickScheduler:
+    """
+    Wakes a tick loop up every 1/ticksPerSecond seconds on absolute deadlines.
+
+    If a tick starts a whole period or more after its deadline, the deadlines it overran are skipped (and counted in
+    `missed`) rather than run back to back, so an overloaded machine slows down instead of bursting to catch up. Ticks
+    starting more than LATE_FRACTION of a period late are counted in `late`, and the worst lateness is kept in
+    `maxLatenessNs`.
+
+    Args:
+    ticksPerSecond - the configured clock rate
+    spinNs - busy-wait for the last spinNs nanoseconds before each deadline
+    """
+    def __init__(self, ticksPerSecond: float, spinNs: int = SPIN_NS):
+        self.period = int(1e9 / ticksPerSecond)
+        self.spinNs = spinNs
+        self.start = time.monotonic_ns()
+        self.deadline = self.start + self.period
+        self.ticks = 0
+        self.late = 0
+        self.missed = 0
+        self.maxLatenessNs = 0
+
+    # seconds to sleep before the next deadline (leaving spinNs to spin)
+    def sleep_time(self) -> float:
+        return max(self.deadline - self.spinNs - time.monotonic_ns(), 0) / 1e9
+
+    # account for a tick starting now and move on to the next deadline; returns how late the tick is in nanoseconds
+    def advance(self) -> int:
+        while time.monotonic_ns() < self.deadline:
+            pass
+        lateness = time.monotonic_ns() - self.deadline
+        self.ticks += 1
+        if lateness > self.period * LATE_FRACTION:
+            self.late += 1
+        self.maxLatenessNs = max(self.maxLatenessNs, lateness)
+        skipped = lateness // self.period
+        self.missed += skipped
+        self.deadline += self.period * (skipped + 1)
+        return lateness
+
+    def wait(self) -> int:
+        """
+        Blocks until the next tick is due; returns how late it started in nanoseconds.
+        """
+        time.sleep(self.sleep_time())
+        return self.advance()
+
+    async def wait_async(self) -> int:
+        """
+        wait() for asyncio tick loops: sleeping yields to the event loop.
+        """
+        await asyncio.sleep(self.sleep_time())
+        return self.advance()
+
+    def rate(self) -> float:
+        """
+        The measured number of ticks per second since the scheduler was created.
+        """
+        elapsed = time.monotonic_ns() - self.start
+        return self.ticks / elapsed * 1e9 if elapsed else 0.
@@ -0,0 +1,142 @@
+import platform
+import time
+from array import array
+from multiprocessing import shared_memory
+
+# shared-memory transport for machines running on the same host: every directed link gets a single-producer,
+# single-consumer ring buffer of clock values in a multiprocessing.shared_memory block, so a clock update is two
+# memory writes instead of a trip through the kernel's TCP stack. The block is laid out as 64-bit words
+#   word 0: head (total values ever written)   word 1: capacity   word 8: tail (total values ever read)
+#   words 16 ... 16 + capacity - 1: the slots
+# with head and tail on different cache lines, since the producer only writes head and the consumer only writes tail.
+# Slot i % capacity holds the i-th value. Like a TCP link, a ring delivers in order and makes the sender wait when it
+# is full. A value is written to its slot before head is advanced past it; aligned 64-bit stores are atomic and stay
+# in order on x86-64, but Python has no memory fence, so on weaker memory models (e.g. ARM) a consumer could see head
+# move before the slot is written. Rings therefore refuse to be used anywhere but on x86-64.
+
+# slots per ring
+CAPACITY = 1 << 16
+HEADER_WORDS = 16
+HEAD = 0
+CAP = 1
+TAIL = 8
+# how long a sender waits before checking a full ring again
+FULL_WAIT = 0.0001
+# platform.machine() of the architectures whose store ordering the rings rely on
+ORDERED_MACHINES = ("x86_64", "AMD64")
+
+def supported() -> bool:
+    """
+    Whether rings can be used on this machine (see the top of this file).
+    """
+    return platform.machine() in ORDERED_MACHINES
+
+class RingBuffer:
+    """
+    A single-producer, single-consumer ring of unsigned 64-bit values in shared memory.
+
+    Args:
+    capacity - the number of slots, when creating a ring
+    name - the name of an existing ring's shared memory block to attach to (None to create a new one)
+    """
+    def __init__(self, capacity: int = CAPACITY, name: str = None):
+        if not supported():
+            raise RuntimeError(f"shared-memory rings rely on x86-64 store ordering, which {platform.machine()} lacks")
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * (HEADER_WORDS + capacity))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.words = self.shm.buf.cast("Q")
+        if self.owner:
+            self.words[CAP] = capacity
+        self.capacity = self.words[CAP]
+        self.name = self.shm.name
+
+    def __len__(self):
+        return self.words[HEAD] - self.words[TAIL]
+
+    def push(self, values: list) -> int:
+        """
+        Producer side: writes as many of values as there is room for; returns how many were written.
+        """
+        head = self.words[HEAD]
+        n = min(len(values), self.capacity - (head - self.words[TAIL]))
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        self.words[HEADER_WORDS + start:HEADER_WORDS + start + first] = array("Q", values[:first])
+        if n > first:
+            self.words[HEADER_WORDS:HEADER_WORDS + n - first] = array("Q", values[first:n])
+        self.words[HEAD] = head + n
+        return n
+
+    def push_one(self, value: int) -> bool:
+        """
+        Producer side: writes a single value if there is room; returns whether it was written. Cheaper than push for
+        the common case of one clock update at a time.
+        """
+        head = self.words[HEAD]
+        if head - self.words[TAIL] >= self.capacity:
+            return False
+        self.words[HEADER_WORDS + head % self.capacity] = value
+        self.words[HEAD] = head + 1
+        return True
+
+    def pop_all(self) -> list:
+        """
+        Consumer side: removes and returns every value written so far, oldest first.
+        """
+        tail = self.words[TAIL]
+        n = self.words[HEAD] - tail
+        if not n:
+            return []
+        start = tail % self.capacity
+        first = min(n, self.capacity - start)
+        values = self.words[HEADER_WORDS + start:HEADER_WORDS + start + first].tolist()
+        if n > first:
+            values += self.words[HEADER_WORDS:HEADER_WORDS + n - first].tolist()
+        self.words[TAIL] = tail + n
+        return values
+
+    def close(self):
+        """
+        Detaches from the shared memory, and frees it if this ring created it.
+        """
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class ShmLink:
+    """
+    The sending end of a ring buffer, with the same interface as wire.Link, so process.py can use either: clock
+    updates are written straight away (send) or held and written together (add, then flush). A full ring makes the
+    sender wait, as a full socket buffer does.
+
+    Args:
+    ring - the RingBuffer for this link
+    sender - pid of the sending machine
+    """
+    def __init__(self, ring: RingBuffer, sender: int):
+        self.ring = ring
+        self.sender = sender
+        self.pending = []
+
+    def add(self, clock: int):
+        self.pending.append(clock)
+
+    def flush(self):
+        while self.pending:
+            written = self.ring.push(self.pending)
+            self.pending = self.pending[written:]
+            if self.pending:
+                time.sleep(FULL_WAIT)
+
+    def send(self, clock: int):
+        if self.pending or not self.ring.push_one(clock):
+            self.add(clock)
+            self.flush()
+
+    # the ring is freed by whoever created it (the launcher), once every machine is done with it
+    def close(self):
+        pass
@@ -0,0 +1,204 @@
+import heapq
+import os
+import sys
+import time
+from collections import deque
+from itertools import count
+from random import Random
+
+from process import N_PROCESS, LOG_NAME, TOPOLOGY, TOPOLOGY_SEED, BATCH_SIZE
+from process import receive_messages, get_recipients, get_event_cap, get_clock_ticks, log_message_send, log_message_receipt
+from topology import make_topology
+from clocks import LAMPORT, HYBRID, make_clock
+
+# deterministic discrete-event alternative to process.py: instead of real processes sleeping between ticks, every
+# machine's ticks and every message delivery are events in a single priority queue ordered by virtual time, so a
+# run takes as long as the events take to compute rather than as long as the simulated experiment lasts
+
+# default simulated experiment length in (virtual) seconds
+DURATION = 60
+# virtual time between a message being sent and it landing in the recipient's queue (loopback is ~instant)
+LATENCY = 0.0
+# which logical clock the machines keep (see clocks.py); the default scalar Lamport clock runs on process.py's helpers
+CLOCK = LAMPORT
+
+# event kinds; a delivery sorts before a tick at the same virtual time, so a message arriving exactly on a tick
+# boundary is visible to that tick (as it would be to a real process waking up from its sleep)
+DELIVER = 0
+TICK = 1
+
+# log file stand-in when we only want the final clock values and not the logs
+class NullLog:
+    def write(self, s):
+        pass
+
+    def flush(self):
+        pass
+
+# wraps a log file so the per-event flush() in process.py's logging helpers becomes a no-op; nothing is reading
+# the logs of a virtual run until it finishes, so the file is only flushed when it is closed
+class BufferedLog:
+    def __init__(self, f):
+        self.f = f
+        self.write = f.write
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.f.close()
+
+# format virtual seconds since midnight the same way datetime.strftime('%H:%M:%S.%f') would, without building a
+# datetime object per event
+# NOTE: like the real runner, the logs only record hour and below, so keep startTime + duration under a day
+def format_time(seconds):
+    s, us = divmod(int(round(seconds * 1_000_000)), 1_000_000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h % 24:02d}:{m:02d}:{s:02d}.{us:06d}"
+
+# a receive event for a clock from clocks.py, whose queue holds (sender, payload) messages: consume messages according
+# to batchSize, merge them in a single receive and log it like process.py would; returns the clock's new value
+def receive_clock_messages(queue, clock, logFile, batchSize=BATCH_SIZE, globalTime=None):
+    count = len(queue) if batchSize == 0 else min(batchSize, len(queue))
+    clock.receive([queue.popleft() for _ in range(count)])
+    log_message_receipt(len(queue), clock.value, logFile, None if batchSize == 1 else count, globalTime)
+    return clock.value
+
+def simulate(duration=DURATION, seed=None, ticks=None, logName=LOG_NAME, logDir="logs", latency=LATENCY, startTime=0.,
+             n=N_PROCESS, topology=TOPOLOGY, batchSize=BATCH_SIZE, clock=CLOCK):
+    """
+    Runs the same machines as process.py (same IR1/IR2 clock rules, same random choice of events, same log format)
+    in virtual time. Given the same seed and parameters the run is fully reproducible.
+
+    Args:
+    duration - length of the simulated experiment in virtual seconds
+    seed - seed for the random number generator (None to seed from the OS)
+    ticks - ticks per second for each machine; by default chosen like process.py (TICKS or random from TICK_RANGE)
+    logName - suffix for the log files, which are named process<pid><logName>.txt as in process.py
+    logDir - directory to write logs to, or None to skip logging entirely
+    latency - virtual seconds between a message being sent and it being added to the recipient's queue
+    startTime - virtual global time (seconds since midnight) at which the machines start
+    n - number of machines
+    topology - name of a topology from topology.py, or a list of neighbor lists (one per machine)
+    batchSize - messages handled per tick (see BATCH_SIZE in process.py)
+    clock - the kind of logical clock the machines keep, one of the names in clocks.py
+
+    Returns a dict with the ticks per second, final logical clocks (the scalar value the logs record) and number of
+    events for each machine, as well as each machine's queue length averaged over its ticks, its average clock jump on
+    receiving messages, the number of 64-bit words it put on the wire, and, for vector and matrix clocks, the number
+    of messages it received that were concurrent with its own state (None for the other clocks).
+    """
+    rng = Random(seed)
+    if ticks is None:
+        ticks = [get_clock_ticks(pid, rng.randint) for pid in range(n)]
+
+    otherProcesses = make_topology(topology, n, TOPOLOGY_SEED) if isinstance(topology, str) else topology
+    eventCaps = [get_event_cap(len(others)) for others in otherProcesses]
+    clocks = [1] * n
+    # machines that keep a clock from clocks.py instead of the scalar Lamport clock, which the hybrid logical clock
+    # reads the virtual time for
+    virtualNow = [startTime]
+    kwargs = {"now": lambda: virtualNow[0]} if clock == HYBRID else {}
+    clockObjects = None if clock == LAMPORT else [make_clock(clock, pid, n, **kwargs) for pid in range(n)]
+    if clockObjects is not None:
+        clocks = [c.value for c in clockObjects]
+    wordsSent = [0] * n
+    queues = [deque() for _ in range(n)]
+    nEvents = [0] * n
+    queueSums = [0] * n
+    receives = [0] * n
+    jumpSums = [0] * n
+
+    if logDir is None:
+        logFiles = [NullLog() for _ in range(n)]
+    else:
+        logFiles = [BufferedLog(open(os.path.join(logDir, f"process{pid}{logName}.txt"), "w")) for pid in range(n)]
+        for pid in range(n):
+            logFiles[pid].write(f"ticks per second: {float(ticks[pid])}\n")
+
+    # events are (virtual time, kind, sequence number, pid, payload); the sequence number breaks ties in insertion
+    # order so the run does not depend on comparing payloads
+    seq = count()
+    events = []
+    for pid in range(n):
+        # the payload of a tick is its index, so tick times are computed as index/ticks rather than accumulated
+        heapq.heappush(events, (1 / ticks[pid], TICK, next(seq), pid, 1))
+
+    try:
+        while events:
+            t, kind, _, pid, payload = heapq.heappop(events)
+            if t > duration:
+                break
+
+            if kind == DELIVER:
+                queues[pid].append(payload)
+                continue
+
+            # schedule this machine's next tick before handling the current one
+            heapq.heappush(events, ((payload + 1) / ticks[pid], TICK, next(seq), pid, payload + 1))
+            nEvents[pid] += 1
+            queueSums[pid] += len(queues[pid])
+            globalTime = format_time(startTime + t)
+            virtualNow[0] = startTime + t
+
+            # process message(s) from the queue if any exist (IR2, then IR1)
+            if queues[pid]:
+                if clockObjects is None:
+                    value, _ = receive_messages(queues[pid], clocks[pid], logFiles[pid], batchSize, globalTime)
+                else:
+                    value = receive_clock_messages(queues[pid], clockObjects[pid], logFiles[pid], batchSize, globalTime)
+                receives[pid] += 1
+                jumpSums[pid] += value - clocks[pid]
+                clocks[pid] = value
+                continue
+
+            # otherwise send to some, all or none of the other machines depending on the number generated
+            toSend = get_recipients(rng.randint(1, eventCaps[pid]), len(otherProcesses[pid]))
+            for rec in toSend:
+                other = otherProcesses[pid][rec]
+                if clockObjects is None:
+                    message = clocks[pid]
+                    wordsSent[pid] += 1
+                else:
+                    message = (pid, clockObjects[pid].send(other))
+                    wordsSent[pid] += len(message[1])
+                heapq.heappush(events, (t + latency, DELIVER, next(seq), other, message))
+
+            # update logical clock (IR1) and log the event
+            if clockObjects is None:
+                clocks[pid] += 1
+            else:
+                clockObjects[pid].tick()
+                clocks[pid] = clockObjects[pid].value
+            log_message_send(toSend, otherProcesses[pid], clocks[pid], logFiles[pid], globalTime)
+    finally:
+        if logDir is not None:
+            for logFile in logFiles:
+                logFile.close()
+
+    return {"ticks": ticks, "clocks": clocks, "events": nEvents,
+            "meanQueue": [queueSums[pid] / max(nEvents[pid], 1) for pid in range(n)],
+            "meanJump": [jumpSums[pid] / max(receives[pid], 1) for pid in range(n)],
+            "wordsSent": wordsSent,
+            "concurrent": [getattr(c, "concurrent", None) for c in clockObjects] if clockObjects else [None] * n}
+
+
+if __name__ == "__main__":
+    # usage: python simulation.py [LOG_NAME] [DURATION] [SEED] [CLOCK]
+    if len(sys.argv) >= 2:
+        LOG_NAME = str(sys.argv[1])
+    if len(sys.argv) >= 3:
+        DURATION = float(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) >= 4 else None
+    if len(sys.argv) >= 5:
+        CLOCK = str(sys.argv[4])
+
+    start = time.perf_counter()
+    result = simulate(DURATION, seed, logName=LOG_NAME, clock=CLOCK)
+    elapsed = time.perf_counter() - start
+
+    total = sum(result["events"])
+    print(f"simulated {DURATION} s ({total} ticks) in {elapsed:.3f} s of wall time, {total / elapsed:.0f} ticks/s")
+    for pid in range(len(result["ticks"])):
+        print(f"machine {pid}: {result['ticks'][pid]} ticks/s, final clock {result['clocks'][pid]}")
@@ -0,0 +1,156 @@
+import csv
+import itertools
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import process
+from message_queue import MessageQueue
+from topology import make_topology
+from viz import parse_log, RECEIVED
+from analysis import max_behind
+
+# runs a grid of process.py experiments in parallel: every combination of the parameters in GRID is one run, each run
+# gets its own free ports from the OS (so runs can overlap, unlike the fixed BASE_PORT + pid), and up to one run per
+# core executes at a time. When all runs are done, a summary table (one row per machine per run) is printed and
+# written to logs/sweep<SWEEP_NAME>.csv; the logs of run k are logs/process<pid><SWEEP_NAME>_<k>.txt as usual.
+# usage: python sweep.py [SWEEP_NAME] [DURATION]
+
+SWEEP_NAME = "SWEEP"
+# how long each run lasts in seconds, not counting the time the processes take to start up and connect
+DURATION = 60
+# process.py constants to sweep over; every combination is run (any constant works, e.g. "FIXED_TICKS": [True] with
+# "TICKS": [[1, 5, 6], [2, 2, 2]] for fixed rates)
+GRID = {
+    "TICK_RANGE": [[1, 6], [1, 3]],
+    "INTERNAL_EVENT_CAP": [10, 5],
+    "N_PROCESS": [3],
+}
+# the most runs executing at the same time
+WORKERS = os.cpu_count() or 1
+
+SUMMARY_FIELDS = ["run", "pid", "ticks", "events", "max_drift", "max_queue", "mean_jump"]
+
+def grid(params: dict) -> list:
+    """
+    Expands a dict from parameter name to the list of values to try into a list of configurations (dicts from parameter
+    name to value), one per combination.
+    """
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+
+# n distinct ports the OS considers free right now (all bound at once, so they are different from each other); anything
+# can take them once they are released, which is why the machines of a run bind port 0 instead
+def free_ports(n: int) -> list:
+    socks = []
+    try:
+        for _ in range(n):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            socks.append(sock)
+        return [sock.getsockname()[1] for sock in socks]
+    finally:
+        for sock in socks:
+            sock.close()
+
+def run(config: dict, logName: str, duration: float = DURATION) -> list:
+    """
+    Runs one experiment: sets process.py's constants from config, starts its machines as process.py does (one OS
+    process each) on free ports, stops them after duration seconds and returns the paths of their logs.
+
+    Args:
+    config - values for process.py constants, e.g. {"TICK_RANGE": [1, 3], "N_PROCESS": 5}
+    logName - the LOG_NAME of the run
+    duration - seconds to run for once the machines are connected and ticking
+    """
+    for name, value in config.items():
+        if not hasattr(process, name):
+            raise ValueError(f"process.py has no constant {name}")
+        setattr(process, name, value)
+    n = process.N_PROCESS
+    process.LOG_NAME = logName
+    process.LOG_FORMAT = "text"
+    # every machine's server takes a free port when it starts listening (see process.start_machines), so overlapping
+    # runs can't be handed the same port
+    process.ports = dict.fromkeys(range(n), 0)
+    process.hosts = {pid: "localhost" for pid in range(n)}
+    process.messageQueue = [MessageQueue(process.MAX_QUEUE_LENGTH, process.OVERFLOW_POLICY) for _ in range(n)]
+    neighbors = make_topology(process.TOPOLOGY, n, process.TOPOLOGY_SEED)
+
+    # the machines trace their startup and connections to stdout; keep that out of the sweep's output
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        machines = process.start_machines(range(n), neighbors)
+        time.sleep(duration)
+        for machine in machines:
+            machine.terminate()
+        for machine in machines:
+            machine.join()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return [f"logs/process{pid}{logName}.txt" for pid in range(n)]
+
+def summarize(logFiles: list) -> list:
+    """
+    Per machine of a run: its ticks per second, number of logged events, the largest amount its clock fell behind the
+    fastest clock in the system at any logged event (see analysis.max_behind), its largest queue length and its mean
+    clock jump between events. analysis.py has more detailed statistics.
+    """
+    # the machines were terminated, so a log can end in a partly written line
+    logs = [parse_log(f, complete=False) for f in logFiles]
+    behind = max_behind(logs)
+    rows = []
+    for pid, log in enumerate(logs):
+        clocks = log["clock"]
+        received = log["queue"][log["event"] == RECEIVED]
+        rows.append({
+            "pid": pid,
+            "ticks": log["ticks"],
+            "events": len(clocks),
+            "max_drift": behind[pid],
+            "max_queue": int(received.max()) if len(received) else 0,
+            "mean_jump": float(np.diff(clocks).mean()) if len(clocks) > 1 else 0.,
+        })
+    return rows
+
+def run_and_summarize(index: int, config: dict, name: str, duration: float) -> list:
+    rows = summarize(run(config, f"{name}_{index}", duration))
+    return [{"run": index, **config, **row} for row in rows]
+
+def sweep(params: dict, name: str = SWEEP_NAME, duration: float = DURATION, workers: int = WORKERS) -> list:
+    """
+    Runs every configuration in grid(params) with at most workers runs at a time; returns the summary rows of all runs.
+    Run k logs to logs/process<pid><name>_<k>.txt.
+    """
+    configs = grid(params)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_and_summarize, i, config, name, duration) for i, config in enumerate(configs)]
+        return [row for future in futures for row in future.result()]
+
+def write_summary(rows: list, path: str):
+    fields = SUMMARY_FIELDS[:1] + [f for f in rows[0] if f not in SUMMARY_FIELDS] + SUMMARY_FIELDS[1:]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return fields
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        SWEEP_NAME = str(sys.argv[1])
+    if len(sys.argv) >= 3:
+        DURATION = float(sys.argv[2])
+
+    start = time.time()
+    rows = sweep(GRID, SWEEP_NAME, DURATION)
+    fields = write_summary(rows, f"logs/sweep{SWEEP_NAME}.csv")
+    print(" | ".join(fields))
+    for row in rows:
+        print(" | ".join(f"{row[f]:.2f}" if isinstance(row[f], float) else str(row[f]) for f in fields))
+    print(f"{len(rows)} machines in {len(grid(GRID))} runs, {time.time() - start:.0f}s; summary in logs/sweep{SWEEP_NAME}.csv")
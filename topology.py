@@ -0,0 +1,50 @@
+from random import Random
+
+# communication topologies between machines; each function returns, for every pid, the sorted list of pids it
+# shares a link with (links are two-way, so if b is in a's list then a is in b's list)
+
+# every machine talks to every other machine (the original three-machine setup)
+def full_mesh(n):
+    return [[other for other in range(n) if other != pid] for pid in range(n)]
+
+# every machine talks to the machines on either side of it
+def ring(n):
+    return [sorted({(pid - 1) % n, (pid + 1) % n} - {pid}) for pid in range(n)]
+
+# machine 0 is the hub that every other machine talks to; the other machines only talk to the hub
+def star(n):
+    return [list(range(1, n))] + [[0] for _ in range(1, n)]
+
+# each pair of machines is linked with probability p (Erdos-Renyi); a machine left without any links is linked to a
+# random other machine so that every machine can send messages
+def random_graph(n, p=0.1, seed=None):
+    rng = Random(seed)
+    neighbors = [set() for _ in range(n)]
+    for a in range(n):
+        for b in range(a + 1, n):
+            if rng.random() < p:
+                neighbors[a].add(b)
+                neighbors[b].add(a)
+    for a in range(n):
+        if not neighbors[a] and n > 1:
+            b = rng.choice([other for other in range(n) if other != a])
+            neighbors[a].add(b)
+            neighbors[b].add(a)
+    return [sorted(s) for s in neighbors]
+
+TOPOLOGIES = {"mesh": full_mesh, "ring": ring, "star": star, "random": random_graph}
+
+def make_topology(name, n, seed=None):
+    """
+    Builds the neighbor lists for n machines connected in the named topology.
+
+    Args:
+    name - one of "mesh", "ring", "star" or "random"
+    n - number of machines
+    seed - seed for the random graph (ignored by the other topologies)
+    """
+    if name not in TOPOLOGIES:
+        raise ValueError(f"unknown topology {name}, expected one of {sorted(TOPOLOGIES)}")
+    if name == "random":
+        return random_graph(n, seed=seed)
+    return TOPOLOGIES[name](n)
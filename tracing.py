@@ -0,0 +1,81 @@
+import sys
+import threading
+import time
+
+# leveled console tracing for the machines. Each machine gets a Tracer (see get_tracer) whose debug/info/warning/error
+# methods are replaced by a no-op when their level is disabled, so a disabled trace costs one call that returns straight
+# away: messages take printf-style arguments, e.g. trace.debug("sleeping for %.3f seconds", t), and are only formatted
+# if they are printed. Debug traces (one or more per tick and per message) are also rate limited, so turning them on at
+# high tick rates does not let terminal output take over the process.
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error", OFF: "off"}
+
+# the lowest level printed
+LEVEL = INFO
+# the most debug traces a machine prints per second (None for no limit); the rest are counted and skipped
+DEBUG_RATE = 100
+
+def noop(*args):
+    pass
+
+class Tracer:
+    """
+    Prints trace lines prefixed with "[name]" to out, one write per line so lines from different threads do not mix.
+
+    Args:
+    name - shown at the start of every line (the pid for the machines)
+    level - the lowest level printed
+    debugRate - the most debug lines printed per second (None for no limit); when lines had to be skipped, the next
+                line printed says how many
+    out - the stream to write to (sys.stdout at the time of each write by default)
+    """
+    def __init__(self, name, level: int = LEVEL, debugRate: float = DEBUG_RATE, out=None):
+        self.name = name
+        self.debugRate = debugRate
+        self.out = out
+        self.suppressed = 0
+        # token bucket for debug lines: refills at debugRate tokens per second, holding at most debugRate
+        self.tokens = debugRate or 0
+        self.refilled = time.monotonic()
+        self.lock = threading.Lock()
+        self.set_level(level)
+
+    def set_level(self, level: int):
+        self.level = level
+        self.debug = self.emit_debug if level <= DEBUG else noop
+        self.info = (lambda msg, *args: self.emit(msg, args)) if level <= INFO else noop
+        self.warning = (lambda msg, *args: self.emit(msg, args)) if level <= WARNING else noop
+        self.error = (lambda msg, *args: self.emit(msg, args)) if level <= ERROR else noop
+
+    def emit(self, msg: str, args: tuple, suffix: str = ""):
+        (self.out or sys.stdout).write(f"[{self.name}] {msg % args if args else msg}{suffix}\n")
+
+    def emit_debug(self, msg: str, *args):
+        if self.debugRate is None:
+            self.emit(msg, args)
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.debugRate, self.tokens + (now - self.refilled) * self.debugRate)
+            self.refilled = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+        self.emit(msg, args, f" ({suppressed} debug lines skipped)" if suppressed else "")
+
+tracers = {}
+
+def get_tracer(name) -> Tracer:
+    """
+    The Tracer for name (created with the module's LEVEL and DEBUG_RATE the first time it is asked for).
+    """
+    if name not in tracers:
+        tracers[name] = Tracer(name)
+    return tracers[name]
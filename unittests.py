@@ -1,12 +1,45 @@
 import unittest
+import os
+import shutil
 import sys
+import time
+import threading
+import asyncio
+import numpy as np
+from unittest import mock
+from collections import deque
 from datetime import datetime
-from process import handle_message_receipt, get_recipients, log_message_send 
+from process import handle_message_receipt, handle_message_batch, receive_messages, get_recipients, get_event_cap, log_message_send 
 from viz import get_clock_updates, get_queue_lengths, get_start_time, get_ticks, get_datetime, get_diff
+from viz import parse_log, parse_log_bytes, load_log, follow_log, thin, Series, downsample, recipient_lists, recipient_rows
+from simulation import simulate, format_time
+from replay import replay
+from export import get_runs, export, Dataset, queue_vs_tick_ratio
+from sweep import grid, free_ports, summarize
+from analysis import analyze, wait_times, clock_jumps, drift, machine_rows, max_behind
+from metrics import Histogram, SnapshotWriter
+from process import make_metrics
+from tracing import Tracer, DEBUG, WARNING, noop
+import io
+import json
+from topology import full_mesh, ring, star, random_graph
+from message_queue import MessageQueue, DROP_OLDEST, DROP_NEWEST
+import process_async
+from wire import encode_frame, FrameDecoder, Link, HEADER, connect, ReconnectingLink
+import socket
+from process import load_peers
+import process
+import subprocess
+from clocks import LamportClock, VectorClock, MatrixClock, HybridLogicalClock, compare, encode_delta, apply_delta
+from clocks import BEFORE, AFTER, EQUAL, CONCURRENT
+from binlog import BinaryLog, read_log, to_text, RECEIVED, SENT, INTERNAL
+from log_writer import AsyncLogWriter
+from scheduler import TickScheduler
+from shm_ring import RingBuffer, ShmLink, supported
 
 class Tests(unittest.TestCase):
     def test_handle_message_receipt_clock_update(self):
-        queue = [5]
+        queue = deque([5])
         with open("testlog.txt", "w") as logFile:
             updated_clock = handle_message_receipt(queue, 3, logFile)
             self.assertEqual(updated_clock, 6)
@@ -18,7 +51,7 @@ class Tests(unittest.TestCase):
             self.assertTrue("Clock Time - 6" in l)
         
     def test_handle_message_receipt_clock_no_update(self):
-        queue = [1]
+        queue = deque([1])
         with open("testlog.txt", "w") as logFile:
             updated_clock = handle_message_receipt(queue, 3, logFile)
             self.assertEqual(updated_clock, 4)
@@ -30,7 +63,7 @@ class Tests(unittest.TestCase):
             self.assertTrue("Clock Time - 4" in l)
             
     def test_handle_message_receipt_clock_larger_queue(self):
-        queue = [4, 6, 7]
+        queue = deque([4, 6, 7])
         with open("testlog.txt", "w") as logFile:
             updated_clock = handle_message_receipt(queue, 1, logFile)
             self.assertEqual(updated_clock, 5)
@@ -41,12 +74,232 @@ class Tests(unittest.TestCase):
             self.assertTrue("Queue Length - 2" in l)
             self.assertTrue("Clock Time - 5" in l)
     
+    def test_handle_message_receipt_message_queue(self):
+        queue = MessageQueue()
+        for message in [4, 6]:
+            queue.put(message)
+        with open("testlog.txt", "w") as logFile:
+            self.assertEqual(handle_message_receipt(queue, 1, logFile), 5)
+        self.assertEqual(len(queue), 1)
+
+    def test_handle_message_batch(self):
+        queue = deque([4, 9, 7])
+        with open("testlog.txt", "w") as logFile:
+            logFile.write("ticks per second: 1.0\n")
+            updated_clock, consumed = handle_message_batch(queue, 3, logFile, 2)
+            self.assertEqual((updated_clock, consumed), (10, 2))
+        self.assertEqual(list(queue), [7])
+        with open("testlog.txt", "r") as logFile:
+            l = logFile.readlines()[-1]
+            self.assertTrue("[MESSAGE RECEIVED]" in l)
+            self.assertTrue("Queue Length - 1" in l)
+            self.assertTrue("Messages - 2" in l)
+            self.assertTrue("Clock Time - 10" in l)
+        # the batch log line still parses like a single receive
+        res = get_queue_lengths("testlog.txt", get_datetime("00:00:00.000000"))
+        self.assertEqual(res[0][1], 1)
+
+    def test_receive_messages_drain_all(self):
+        queue = deque([4, 9, 7])
+        with open("testlog.txt", "w") as logFile:
+            self.assertEqual(receive_messages(queue, 12, logFile, 0), (13, 3))
+            self.assertFalse(queue)
+            queue.extend([5, 6])
+            self.assertEqual(receive_messages(queue, 1, logFile, 1), (6, 1))
+        self.assertEqual(list(queue), [6])
+
+    def test_receive_messages_count_with_producer(self):
+        # a sender refilling the queue while it is drained (as a blocked connection thread does) doesn't change the
+        # count of consumed messages
+        class Refilled(deque):
+            def popleft(self):
+                self.append(0)
+                return super().popleft()
+        with open("testlog.txt", "w") as logFile:
+            self.assertEqual(receive_messages(Refilled([4, 9, 7]), 1, logFile, 2), (10, 2))
+            self.assertEqual(receive_messages(Refilled([4]), 1, logFile, 1), (5, 1))
+
+    def test_message_queue_drop_oldest(self):
+        queue = MessageQueue(2, DROP_OLDEST)
+        for message in [1, 2, 3]:
+            self.assertTrue(queue.put(message))
+        self.assertEqual([queue.popleft(), queue.popleft()], [2, 3])
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.highWater, 2)
+
+    def test_message_queue_drop_newest(self):
+        queue = MessageQueue(2, DROP_NEWEST)
+        self.assertEqual([queue.put(message) for message in [1, 2, 3]], [True, True, False])
+        self.assertEqual([queue.popleft(), queue.popleft()], [1, 2])
+        self.assertEqual(queue.dropped, 1)
+        self.assertFalse(queue)
+
+    def test_message_queue_block(self):
+        queue = MessageQueue(1)
+        queue.put(1)
+        self.assertFalse(queue.put(2, timeout=0.01))
+        # a blocked sender resumes once the consumer makes room
+        sender = threading.Thread(target=queue.put, args=(3,))
+        sender.start()
+        self.assertEqual(queue.popleft(), 1)
+        sender.join(1)
+        self.assertEqual(queue.popleft(), 3)
+        self.assertEqual(queue.dropped, 0)
+
+    def test_async_service_connection(self):
+        async def feed():
+            reader = asyncio.StreamReader()
+            # one frame split across two reads, then a frame carrying two clocks
+            frame = encode_frame(1, 0, [3])
+            reader.feed_data(frame[:5])
+            reader.feed_data(frame[5:] + encode_frame(1, 1, [70000, 2**40]))
+            reader.feed_eof()
+            await process_async.service_connection(0, queue, reader, writer)
+        queue = MessageQueue()
+        writer = mock.Mock()
+        asyncio.run(feed())
+        self.assertEqual([queue.popleft(), queue.popleft(), queue.popleft()], [3, 70000, 2**40])
+        writer.close.assert_called_once()
+
+    def test_encode_frame(self):
+        frame = encode_frame(2, 7, [1, 2**63])
+        self.assertEqual(len(frame), HEADER.size + 16)
+        self.assertEqual(FrameDecoder().feed(frame), [(2, 7, [1, 2**63])])
+
+    def test_frame_decoder_partial_reads(self):
+        stream = encode_frame(0, 0, [5]) + encode_frame(0, 1, [6, 7]) + encode_frame(0, 2, [])
+        decoder = FrameDecoder()
+        frames = []
+        # feed the stream one byte at a time, as the worst case of short reads
+        for i in range(len(stream)):
+            frames += decoder.feed(stream[i:i + 1])
+        self.assertEqual(frames, [(0, 0, [5]), (0, 1, [6, 7]), (0, 2, [])])
+        self.assertFalse(decoder.buffer)
+
+    def test_frame_decoder_corrupt(self):
+        with self.assertRaises(ValueError):
+            FrameDecoder().feed(b"\x00\x00\x00\x03" + bytes(8))
+
+    def test_link_coalesces(self):
+        sock = mock.Mock()
+        link = Link(sock, 1)
+        for clock in [4, 5, 6]:
+            link.add(clock)
+        link.flush()
+        link.send(9)
+        self.assertEqual(sock.sendall.call_count, 2)
+        frames = FrameDecoder().feed(b"".join(call.args[0] for call in sock.sendall.call_args_list))
+        self.assertEqual(frames, [(1, 0, [4, 5, 6]), (1, 1, [9])])
+
+    def test_lamport_clock(self):
+        clock = LamportClock(0, 3)
+        self.assertEqual(clock.send(1), [1])
+        clock.tick()
+        clock.receive([(1, [7]), (2, [4])])
+        self.assertEqual(clock.value, 8)
+
+    def test_compare(self):
+        self.assertEqual(compare([1, 0], [1, 1]), BEFORE)
+        self.assertEqual(compare([2, 1], [1, 1]), AFTER)
+        self.assertEqual(compare([1, 1], [1, 1]), EQUAL)
+        self.assertIs(compare([2, 0], [1, 1]), CONCURRENT)
+
+    def test_delta_encoding(self):
+        previous = [0, 0, 0, 0]
+        self.assertEqual(encode_delta([0, 3, 0, 9], previous), [1, 3, 3, 9])
+        self.assertEqual(previous, [0, 3, 0, 9])
+        self.assertEqual(encode_delta([0, 3, 0, 9], previous), [])
+        remote = [0, 1, 0, 0]
+        apply_delta([1, 3, 3, 9], remote)
+        self.assertEqual(remote, [0, 3, 0, 9])
+
+    def test_vector_clock(self):
+        a, b = VectorClock(0, 3), VectorClock(1, 3)
+        a.tick()
+        b.tick()
+        # both machines ticked independently, so the message is concurrent with the receiver
+        b.receive([(0, a.send(1))])
+        self.assertEqual(list(b.vector), [2, 3, 0])
+        self.assertEqual(b.concurrent, 1)
+        # only the changed entry is sent the second time round
+        a.tick()
+        self.assertEqual(a.send(1), [0, 3])
+        b.receive([(0, [0, 3])])
+        self.assertEqual(list(b.vector), [3, 4, 0])
+        # a has never heard from b, so this message is concurrent too
+        self.assertEqual(b.concurrent, 2)
+        # but a message that follows from everything b has done is not
+        a.receive([(1, b.send(0))])
+        c = VectorClock(2, 3)
+        c.receive([(0, a.send(2))])
+        self.assertEqual(c.concurrent, 1)
+        b.receive([(2, c.send(1))])
+        self.assertEqual(b.concurrent, 2)
+
+    def test_matrix_clock(self):
+        a, b = MatrixClock(0, 2), MatrixClock(1, 2)
+        b.receive([(0, a.send(1))])
+        self.assertEqual(list(b.row(1)), [1, 2])
+        # b knows that a has seen its own first event
+        self.assertEqual(list(b.row(0)), [1, 0])
+        a.receive([(1, b.send(0))])
+        self.assertEqual(list(a.row(0)), [2, 2])
+        self.assertEqual(a.value, 2)
+
+    def test_hybrid_logical_clock(self):
+        now = [1.0]
+        a = HybridLogicalClock(0, 2, lambda: now[0])
+        a.tick()
+        self.assertEqual((a.l, a.c), (1000, 0))
+        a.tick()
+        self.assertEqual((a.l, a.c), (1000, 1))
+        # a message from a machine whose physical clock is ahead pulls l forward
+        a.receive([(1, [(1500 << 16) | 4])])
+        self.assertEqual((a.l, a.c), (1500, 5))
+        now[0] = 2.0
+        a.receive([(1, [(1500 << 16) | 9])])
+        self.assertEqual((a.l, a.c), (2000, 0))
+
+    def test_simulate_clocks(self):
+        lamport = simulate(60, seed=5, logDir=None)
+        vector = simulate(60, seed=5, logDir=None, clock="vector")
+        # the clock kind does not change which events happen
+        self.assertEqual(lamport["events"], vector["events"])
+        self.assertTrue(all(c is not None for c in vector["concurrent"]))
+        self.assertEqual(lamport["concurrent"], [None] * 3)
+
     def test_get_recipients(self):
         self.assertEqual(get_recipients(1), [0])
         self.assertEqual(get_recipients(2), [1])
         self.assertEqual(get_recipients(3), [0, 1])
         self.assertEqual(get_recipients(-1), [])
         self.assertEqual(get_recipients(4), [])
+
+    def test_get_recipients_neighbors(self):
+        self.assertEqual(get_recipients(1, 1), [0])
+        self.assertEqual(get_recipients(2, 1), [0])
+        self.assertEqual(get_recipients(5, 5), [4])
+        self.assertEqual(get_recipients(6, 5), [0, 1, 2, 3, 4])
+        self.assertEqual(get_recipients(7, 5), [])
+
+    def test_get_event_cap(self):
+        self.assertEqual(get_event_cap(2), 10)
+        self.assertEqual(get_event_cap(5), 20)
+        self.assertEqual(get_event_cap(1), 7)
+
+    def test_topologies(self):
+        self.assertEqual(full_mesh(3), [[1, 2], [0, 2], [0, 1]])
+        self.assertEqual(ring(4), [[1, 3], [0, 2], [1, 3], [0, 2]])
+        self.assertEqual(star(4), [[1, 2, 3], [0], [0], [0]])
+        graph = random_graph(50, 0.05, seed=1)
+        self.assertEqual(graph, random_graph(50, 0.05, seed=1))
+        for a, others in enumerate(graph):
+            self.assertTrue(others)
+            self.assertTrue(all(a in graph[b] for b in others))
+
+    def test_simulate_topology(self):
+        res = simulate(10, seed=1, logDir=None, n=50, topology="ring")
+        self.assertEqual(len(res["clocks"]), 50)
         
     def test_log_message_send(self):
         with open("testlog.txt", "w") as logFile:
@@ -88,6 +341,148 @@ class Tests(unittest.TestCase):
             self.assertTrue("No Messages Sent" in l)
             self.assertTrue("Clock Time - 5" in l)
             
+    def test_binary_log(self):
+        with BinaryLog("testlog.bin", 1, 5.0, flushEvery=2) as logFile:
+            handle_message_receipt(deque([7]), 3, logFile)
+            log_message_send([0, 1], [0, 2], 9, logFile)
+            log_message_send([], [0, 2], 10, logFile)
+            # the first two records were flushed as soon as there were two of them
+            self.assertEqual(os.path.getsize("testlog.bin"), 6 + 2 + 8 + 8 + 8 + 2 * 33)
+        header, records = read_log("testlog.bin")
+        self.assertEqual((header["pid"], header["ticks"]), (1, 5.0))
+        self.assertEqual([(r[0], r[3], r[5], r[6]) for r in records],
+                         [(RECEIVED, 0, 8, 0), (SENT, 0, 9, 0b101), (INTERNAL, 0, 10, 0)])
+        os.remove("testlog.bin")
+
+    def test_binary_log_to_text(self):
+        with BinaryLog("testlog.bin", 0, 2.0) as logFile:
+            handle_message_receipt(deque([4, 6]), 1, logFile)
+            log_message_send([1], [1, 2], 6, logFile)
+        to_text("testlog.bin", "testlog.txt")
+        os.remove("testlog.bin")
+        self.assertEqual(get_ticks("testlog.txt"), 2)
+        with open("testlog.txt", "r") as logFile:
+            lines = logFile.readlines()
+            self.assertTrue("[MESSAGE RECEIVED]" in lines[1] and "Queue Length - 1" in lines[1])
+            self.assertTrue("Receiver(s) - [2]" in lines[2])
+        self.assertEqual([c for _, c in get_clock_updates("testlog.txt", get_start_time("testlog.txt"))], [5, 6])
+
+    def test_binary_log_run_size(self):
+        # a run too large for binary logs is refused before any machine starts
+        with mock.patch.object(process, "LOG_FORMAT", "binary"):
+            process.check_log_format(64)
+            self.assertRaises(ValueError, process.start_machines, range(65), [[] for _ in range(65)])
+            self.assertRaises(ValueError, asyncio.run, process_async.run(65))
+        process.check_log_format(65)
+
+    def test_async_log_writer(self):
+        with AsyncLogWriter(open("testlog.txt", "w")) as logFile:
+            logFile.write("ticks per second: 1.0\n")
+            for clock in range(100):
+                log_message_send([0], [1, 2], clock, logFile)
+        with open("testlog.txt", "r") as logFile:
+            lines = logFile.readlines()
+        self.assertEqual(len(lines), 101)
+        self.assertTrue("Clock Time - 99" in lines[-1])
+
+    def test_async_log_writer_bounded(self):
+        # with the writer asleep for a long time, a full queue makes write() wake it up and wait
+        with AsyncLogWriter(open("testlog.txt", "w"), maxPending=10, interval=60) as logFile:
+            for i in range(25):
+                logFile.write(f"{i}\n")
+                self.assertTrue(len(logFile.pending) < 10)
+            self.assertEqual(logFile.stalls, 2)
+        with open("testlog.txt", "r") as logFile:
+            self.assertEqual(logFile.read().split(), [str(i) for i in range(25)])
+
+    def test_async_log_writer_error(self):
+        # a writer thread that fails (here, a full disk) makes write() raise instead of waiting for it forever
+        class FullDisk:
+            def write(self, s):
+                raise OSError(28, "No space left on device")
+            def close(self):
+                pass
+        logFile = AsyncLogWriter(FullDisk(), maxPending=10, interval=60)
+        with self.assertRaises(OSError):
+            for i in range(25):
+                logFile.write(f"{i}\n")
+        self.assertRaises(OSError, logFile.flush)
+        logFile.close()
+
+    def test_async_log_writers_share_thread(self):
+        # however many logs a process writes, they are drained by one thread
+        with AsyncLogWriter(open("testlog.txt", "w")) as a, AsyncLogWriter(open("testlog2.txt", "w")) as b:
+            self.assertIs(a.thread, b.thread)
+            a.write("a\n")
+            b.write("b\n")
+        with open("testlog.txt") as f, open("testlog2.txt") as g:
+            self.assertEqual((f.read(), g.read()), ("a\n", "b\n"))
+        os.remove("testlog2.txt")
+
+    def test_histogram(self):
+        histogram = Histogram([1, 10])
+        for value in [0.5, 1, 3, 20]:
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot(), {"buckets": {"1": 2, "10": 1, "inf": 1}, "count": 4, "mean": 6.125,
+                                                "max": 20})
+
+    def test_metrics_snapshot(self):
+        queue = MessageQueue(1, DROP_NEWEST)
+        metrics = make_metrics(queue)
+        queue.put(3)
+        queue.put(4)
+        metrics.counters["messages_sent"].inc(2)
+        metrics.histograms["send_latency_us"].observe(42)
+        writer = SnapshotWriter(metrics, "testlog.txt", interval=60)
+        writer.close()
+        with open("testlog.txt") as f:
+            snapshot = json.load(f)
+        self.assertEqual((snapshot["messages_sent"], snapshot["messages_arrived"], snapshot["messages_dropped"],
+                          snapshot["queue_high_water"]), (2, 1, 1, 1))
+        self.assertEqual(snapshot["send_latency_us"]["buckets"]["50"], 1)
+
+    def test_tracer_levels(self):
+        out = io.StringIO()
+        trace = Tracer(3, WARNING, out=out)
+        self.assertIs(trace.debug, noop)
+        self.assertIs(trace.info, noop)
+        trace.info("connected to %d", 1)
+        trace.warning("tick started %.1f ms late", 2.25)
+        self.assertEqual(out.getvalue(), "[3] tick started 2.2 ms late\n")
+
+    def test_tracer_rate_limit(self):
+        out = io.StringIO()
+        trace = Tracer(0, DEBUG, debugRate=5, out=out)
+        for i in range(20):
+            trace.debug("generated number %d", i)
+        # the first 5 lines use up the bucket; the rest are counted until it refills
+        self.assertEqual(out.getvalue().count("\n"), 5)
+        self.assertEqual(trace.suppressed, 15)
+        trace.refilled -= 1
+        trace.debug("generated number %d", 20)
+        self.assertTrue(out.getvalue().endswith("[0] generated number 20 (15 debug lines skipped)\n"))
+
+    def test_tick_scheduler_deadlines(self):
+        scheduler = TickScheduler(100)
+        start = time.monotonic()
+        for _ in range(10):
+            scheduler.wait()
+            # work that would stretch every tick under a plain sleep
+            time.sleep(0.004)
+        # ten ticks at 100 per second end at 0.1 s plus the last tick's work, not 10 * (0.01 + 0.004)
+        self.assertLess(time.monotonic() - start, 0.13)
+        self.assertEqual(scheduler.ticks, 10)
+
+    def test_tick_scheduler_missed(self):
+        scheduler = TickScheduler(100)
+        time.sleep(0.035)
+        lateness = scheduler.wait()
+        self.assertGreaterEqual(lateness, 25_000_000)
+        self.assertEqual(scheduler.missed, lateness // scheduler.period)
+        self.assertEqual(scheduler.late, 1)
+        # the deadlines that were overrun are skipped rather than run back to back
+        self.assertGreater(scheduler.deadline, time.monotonic_ns())
+
     def test_get_datetime(self):
         self.assertEqual(datetime.strftime(get_datetime("00:00:00.001000"), "%H-%M-%S:%f"), "00-00-00:001000")
     
@@ -107,6 +502,384 @@ class Tests(unittest.TestCase):
         self.assertEqual(len(res), 1)
         self.assertEqual(len(res[0]), 2)
         self.assertEqual(res, [(35.8, 0)])
+
+    def test_parse_log(self):
+        res = parse_log("testlogread.txt")
+        self.assertEqual(res["ticks"], 5)
+        self.assertEqual(list(res["time"]), [34., 34.4, 35.2, 35.8])
+        self.assertEqual(list(res["event"]), [SENT, INTERNAL, SENT, RECEIVED])
+        self.assertEqual(list(res["clock"]), [2, 4, 8, 11])
+        self.assertEqual(list(res["queue"]), [-1, -1, -1, 0])
+        self.assertEqual(list(res["recipient_count"]), [1, 0, 1, 0])
+        self.assertEqual(recipient_lists(res), [[1], [], [1], []])
+
+    def test_parse_log_bytes(self):
+        data = b"[MESSAGE(S) SENT] | Global Time - 01:02:03.250000 | Receiver(s) - [0, 2, 11] | Clock Time - 1234\n" \
+               b"[MESSAGE RECEIVED] | Global Time - 01:02:04.000001 | Queue Length - 17 | Messages - 3 | Clock Time - 1240\n" \
+               b"[MESSAGE(S) SENT] | Global Time - 01:02:05.000000 | Receiver(s) - [130, 64] | Clock Time - 1241\n" \
+               b"[INTERNAL] | Global Time - 01:02:0"
+        res = parse_log_bytes(data, complete=False)
+        # the cut-off last line is skipped
+        self.assertEqual(list(res["clock"]), [1234, 1240, 1241])
+        self.assertEqual(list(res["time"]), [3723.25, 3724.000001, 3725.])
+        # pids of 64 and more are kept as they are
+        self.assertEqual(recipient_lists(res), [[0, 2, 11], [], [130, 64]])
+        self.assertEqual(list(recipient_rows(res)), [0, 0, 0, 2, 2])
+        self.assertEqual(list(res["queue"]), [-1, 17, -1])
+        self.assertEqual(list(res["messages"]), [0, 3, 0])
+
+    def test_load_log_incremental(self):
+        with open("testlogread.txt") as f:
+            lines = f.read().rstrip("\n").split("\n")
+        with open("testlog.txt", "w") as f:
+            f.write("\n".join(lines[:3]) + "\n" + lines[3][:20])
+        res = load_log("testlog.txt", "testcache")
+        # the unfinished last line waits until it is complete
+        self.assertEqual(list(res["clock"]), [2, 4])
+        self.assertEqual(res["ticks"], 5)
+        with open("testlog.txt", "a") as f:
+            f.write(lines[3][20:] + "\n" + lines[4] + "\n")
+        with mock.patch("viz.parse_log_bytes", wraps=parse_log_bytes) as parse:
+            res = load_log("testlog.txt", "testcache")
+            # only the bytes appended since the last call are parsed
+            self.assertEqual(parse.call_args[0][0], ("\n".join(lines[3:]) + "\n").encode())
+            self.assertEqual(list(res["clock"]), [2, 4, 8, 11])
+            # the recipients of both parts line up with their lines
+            self.assertEqual(recipient_lists(res), [[1], [], [1], []])
+            self.assertEqual(list(load_log("testlog.txt", "testcache")["clock"]), [2, 4, 8, 11])
+            self.assertEqual(parse.call_count, 1)
+        # a log overwritten by a new run is parsed from scratch
+        with open("testlog.txt", "w") as f:
+            f.write("ticks per second: 2.0\n" + lines[1] + "\n")
+        res = load_log("testlog.txt", "testcache")
+        self.assertEqual((res["ticks"], list(res["clock"])), (2, [2]))
+        shutil.rmtree("testcache")
+
+    def test_follow_log(self):
+        with open("testlogread.txt") as f:
+            lines = f.read().rstrip("\n").split("\n")
+        follower = follow_log("testlog.txt")
+        with open("testlog.txt", "w") as f:
+            f.write(lines[0][:5])
+            f.flush()
+            self.assertIsNone(next(follower))
+            f.write(lines[0][5:] + "\n" + lines[1] + "\n" + lines[2][:10])
+            f.flush()
+            chunk = next(follower)
+            self.assertEqual((chunk["ticks"], list(chunk["clock"])), (5, [2]))
+            self.assertEqual(len(next(follower)["clock"]), 0)
+            f.write(lines[2][10:] + "\n" + lines[3] + "\n")
+            f.flush()
+            self.assertEqual(list(next(follower)["clock"]), [4, 8])
+
+    def test_thin(self):
+        xs, ys = thin(np.arange(100.), np.arange(100), 10)
+        # the newest half is kept as is and the rest downsampled (a straight line only needs its ends)
+        self.assertEqual(list(ys), [0, 94, 95, 96, 97, 98, 99])
+        series = Series()
+        for start in range(0, 5000, 7):
+            series.append(np.arange(start, start + 7.), np.arange(start, start + 7))
+        self.assertEqual(series.n, 5005)
+        self.assertEqual(list(series.view(10000)[1]), list(range(5005)))
+
+    def test_downsample(self):
+        xs = np.arange(10000.)
+        clock = np.arange(10000) // 10
+        clock[5000:] += 300
+        queue = np.zeros(10000, dtype=np.int64)
+        queue[7777] = 9
+        for method in ["minmax", "lttb"]:
+            cx, cy = downsample(xs, clock, 200, method)
+            qx, qy = downsample(xs, queue, 200, method)
+            self.assertLessEqual(len(cx), 200)
+            self.assertEqual((cx[0], cx[-1]), (0., 9999.))
+            # the clock jump and the queue length peak are kept
+            self.assertIn(4999., cx)
+            self.assertIn(5000., cx)
+            self.assertIn(7777., qx)
+            self.assertEqual(qy.max(), 9)
+        self.assertEqual(len(downsample(xs, queue, None)[0]), 10000)
+        with self.assertRaises(ValueError):
+            downsample(xs, queue, 200, "every-other")
+
+    def test_sweep_grid(self):
+        configs = grid({"TICK_RANGE": [[1, 6], [1, 3]], "N_PROCESS": [3, 5]})
+        self.assertEqual(len(configs), 4)
+        self.assertIn({"TICK_RANGE": [1, 3], "N_PROCESS": 5}, configs)
+        ports = free_ports(3)
+        self.assertEqual(len(set(ports)), 3)
+
+    def test_sweep_summarize(self):
+        with open("testlogread.txt") as f:
+            lines = f.read().rstrip("\n").split("\n")
+        # the first machine was killed in the middle of writing a line, which is left out
+        with open("testlog.txt", "w") as f:
+            f.write("\n".join(lines) + "\n" + lines[1][:30])
+        # a second machine with a single event, 7 ahead of the first machine's clock at the time
+        with open("testlog2.txt", "w") as f:
+            f.write("ticks per second: 1.0\n" + lines[1].replace("Time - 2", "Time - 9") + "\n")
+        rows = summarize(["testlog.txt", "testlog2.txt"])
+        os.remove("testlog2.txt")
+        self.assertEqual(rows[0], {"pid": 0, "ticks": 5, "events": 4, "max_drift": 7, "max_queue": 0, "mean_jump": 3.})
+        self.assertEqual(rows[1]["max_drift"], 0)
+
+    def test_analysis(self):
+        logs = {
+            0: parse_log_bytes(b"[MESSAGE(S) SENT] | Global Time - 00:00:01.000000 | Receiver(s) - [1] | Clock Time - 2\n"
+                               b"[MESSAGE(S) SENT] | Global Time - 00:00:02.000000 | Receiver(s) - [1] | Clock Time - 3\n"
+                               b"[INTERNAL] | Global Time - 00:00:03.000000 | No Messages Sent | Clock Time - 4\n"),
+            1: parse_log_bytes(b"[INTERNAL] | Global Time - 00:00:01.500000 | No Messages Sent | Clock Time - 2\n"
+                               b"[MESSAGE RECEIVED] | Global Time - 00:00:02.500000 | Queue Length - 0 | Messages - 2 | Clock Time - 4\n"),
+        }
+        # both messages to machine 1 are consumed by its batched receive
+        self.assertEqual(list(wait_times(list(logs.values()), 1)), [1.5, 0.5])
+        self.assertEqual(clock_jumps(logs[1])["histogram"], {2: 1})
+        # machine 0 minus machine 1 is 0 at 1.5s, 3 - 2 at 2s, 3 - 4 at 2.5s and 0 at 3s
+        self.assertEqual(drift(logs[0], logs[1], 1.5), {"max": 1, "mean": 0.5, "final": 0})
+        for log in logs.values():
+            log["ticks"] = 1
+        result = analyze(logs)
+        # neither machine is behind at its own events
+        self.assertEqual([m["max_behind"] for m in result["machines"].values()], [0, 0])
+        self.assertEqual(result["machines"][0]["throughput"]["messages_sent_per_second"], 1.)
+        self.assertEqual(result["machines"][1]["wait"]["matched"], 2)
+        self.assertEqual(machine_rows(result)[1]["wait_max"], 1.5)
+        # machine 0 never receives, so it never had anything queued
+        self.assertEqual([m["max_queue"] for m in result["machines"].values()], [0, 0])
+
+    def test_max_behind_ties(self):
+        a = parse_log_bytes(b"[INTERNAL] | Global Time - 00:00:01.000000 | No Messages Sent | Clock Time - 2\n"
+                            b"[INTERNAL] | Global Time - 00:00:02.000000 | No Messages Sent | Clock Time - 10\n")
+        b = parse_log_bytes(b"[INTERNAL] | Global Time - 00:00:01.000000 | No Messages Sent | Clock Time - 20\n"
+                            b"[INTERNAL] | Global Time - 00:00:02.000000 | No Messages Sent | Clock Time - 21\n")
+        # events logged at the same time count as simultaneous, whichever machine comes first
+        self.assertEqual(max_behind([a, b]), [18, 0])
+        self.assertEqual(max_behind([b, a]), [0, 18])
+
+    @unittest.skipUnless(supported(), "shared-memory rings need x86-64")
+    def test_ring_buffer(self):
+        ring = RingBuffer(4)
+        reader = RingBuffer(name=ring.name)
+        self.assertEqual(reader.capacity, 4)
+        self.assertEqual(ring.push([1, 2, 3]), 3)
+        self.assertEqual(reader.pop_all(), [1, 2, 3])
+        # only as many values as there is room for are written, wrapping around the end of the slots
+        self.assertEqual(ring.push([4, 5, 6, 7, 8]), 4)
+        self.assertFalse(ring.push_one(8))
+        self.assertEqual(len(reader), 4)
+        self.assertEqual(reader.pop_all(), [4, 5, 6, 7])
+        self.assertEqual(reader.pop_all(), [])
+        self.assertTrue(ring.push_one(2 ** 64 - 1))
+        self.assertEqual(reader.pop_all(), [2 ** 64 - 1])
+        reader.close()
+        ring.close()
+
+    @unittest.skipUnless(supported(), "shared-memory rings need x86-64")
+    def test_shm_link(self):
+        ring = RingBuffer(2)
+        link = ShmLink(ring, 0)
+        link.add(1)
+        link.add(2)
+        link.flush()
+        self.assertEqual(ring.pop_all(), [1, 2])
+        # a full ring makes the sender wait until the reader makes room
+        link.send(3)
+        link.send(4)
+        sender = threading.Thread(target=link.send, args=(5,))
+        sender.start()
+        time.sleep(0.05)
+        self.assertTrue(sender.is_alive())
+        self.assertEqual(ring.pop_all(), [3, 4])
+        sender.join()
+        self.assertEqual(ring.pop_all(), [5])
+        ring.close()
+
+    def test_load_peers(self):
+        with open("testlog.txt", "w") as f:
+            f.write("# comment\n1 10.0.0.2:23523\n\n0 localhost:23522\n")
+        self.assertEqual(load_peers("testlog.txt"), {0: ("localhost", 23522), 1: ("10.0.0.2", 23523)})
+        with open("testlog.txt", "w") as f:
+            f.write("0 localhost\n")
+        self.assertRaises(ValueError, load_peers, "testlog.txt")
+        with open("testlog.txt", "w") as f:
+            f.write("0 localhost:1\n2 localhost:2\n")
+        self.assertRaises(ValueError, load_peers, "testlog.txt")
+
+    def test_connect_backoff(self):
+        port = free_ports(1)[0]
+        self.assertRaises(OSError, connect, ("localhost", port), 0.1)
+        # the server only starts listening after a few failed attempts
+        serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        threading.Timer(0.2, lambda: (serverSock.bind(("localhost", port)), serverSock.listen(1))).start()
+        sock = connect(("localhost", port), 5)
+        c, _ = serverSock.accept()
+        sock.close()
+        c.close()
+        serverSock.close()
+
+    def test_reconnecting_link(self):
+        serverSock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        serverSock.bind(("localhost", 0))
+        serverSock.listen(2)
+        link = ReconnectingLink(serverSock.getsockname(), 0, 5)
+        c, _ = serverSock.accept()
+        link.send(1)
+        self.assertEqual(FrameDecoder().feed(c.recv(1024))[0][2], [1])
+        # the server drops the connection; sends fail once the peer's reset arrives, and the link reconnects
+        c.close()
+        time.sleep(0.05)
+        received = []
+        accepted = threading.Thread(target=lambda: received.append(serverSock.accept()[0]))
+        accepted.start()
+        for clock in range(2, 100):
+            link.send(clock)
+            if link.reconnects:
+                break
+        accepted.join()
+        self.assertEqual(link.reconnects, 1)
+        # the update whose send failed arrives over the new connection
+        self.assertEqual(FrameDecoder().feed(received[0].recv(1024))[-1][2], [clock])
+        received[0].close()
+        link.close()
+        serverSock.close()
+
+    def test_start_machines(self):
+        # port 0: each server takes a free port and reports it back
+        ports = {0: 0, 1: 0}
+        with mock.patch.multiple(process, ports=ports, hosts={0: "localhost", 1: "localhost"}, LOG_NAME="TESTSTART",
+                                 METRICS=False, messageQueue=[MessageQueue(), MessageQueue()]), \
+                mock.patch("sys.stdout", io.StringIO()):
+            machines = process.start_machines([0, 1], [[1], [0]])
+            # both are connected and ticking by the time start_machines returns
+            self.assertTrue(all(machine.is_alive() for machine in machines))
+            self.assertTrue(ports[0] and ports[1] and ports[0] != ports[1])
+            for machine in machines:
+                machine.terminate()
+                machine.join()
+            # a machine that can't start its server makes start_machines fail instead of waiting forever
+            with socket.socket() as taken:
+                taken.bind(("localhost", 0))
+                taken.listen(1)
+                ports[0] = taken.getsockname()[1]
+                self.assertRaises(EOFError, process.start_machines, [0, 1], [[1], [0]])
+        for pid in range(2):
+            if os.path.exists(f"logs/process{pid}TESTSTART.txt"):
+                os.remove(f"logs/process{pid}TESTSTART.txt")
+
+    def test_viz_imports_without_matplotlib(self):
+        code = "import sys, viz; sys.exit('matplotlib' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code]).returncode, 0)
+
+    def test_replay(self):
+        # with a delivery latency no two events the replay has to order are logged at the same time
+        simulate(20, seed=5, ticks=[2, 5, 9], logName="TESTREPLAY", logDir=".", latency=0.001)
+        logs = [parse_log(f"process{pid}TESTREPLAY.txt") for pid in range(3)]
+        for pid in range(3):
+            os.remove(f"process{pid}TESTREPLAY.txt")
+        result = replay(logs)
+        self.assertEqual(result["events"], 20 * (2 + 5 + 9))
+        self.assertEqual(result["mismatch_count"], 0)
+        self.assertEqual(result["clocks"], [int(log["clock"][-1]) for log in logs])
+        # a wrong clock value is reported with the line it was logged on
+        logs[2]["clock"][-1] += 1
+        result = replay(logs)
+        self.assertEqual(result["mismatch_count"], 1)
+        self.assertEqual(result["mismatches"][0]["pid"], 2)
+        self.assertEqual(result["mismatches"][0]["line"], 20 * 9 + 1)
+        self.assertEqual(result["mismatches"][0]["replayed"], logs[2]["clock"][-1] - 1)
+
+    def test_replay_ties(self):
+        line = lambda event, t, clock: {
+            SENT: f"[MESSAGE(S) SENT] | Global Time - 00:00:0{t} | Receiver(s) - [2] | Clock Time - {clock}\n",
+            INTERNAL: f"[INTERNAL] | Global Time - 00:00:0{t} | No Messages Sent | Clock Time - {clock}\n",
+            RECEIVED: f"[MESSAGE RECEIVED] | Global Time - 00:00:0{t} | Queue Length - 0 | Clock Time - {clock}\n"}[event]
+        # machines 0 and 1 send to machine 2 at the same time, and machine 1's message (3) was queued first
+        logs = [parse_log_bytes(line(SENT, "1.000000", 2).encode()),
+                parse_log_bytes((line(INTERNAL, "0.500000", 2) + line(INTERNAL, "0.600000", 3) +
+                                 line(SENT, "1.000000", 4)).encode()),
+                parse_log_bytes((line(RECEIVED, "2.000000", 4) + line(RECEIVED, "3.000000", 5)).encode())]
+        result = replay(logs)
+        self.assertEqual((result["mismatch_count"], result["ambiguous"]), (0, 1))
+        # the simulator's machines tick at the same virtual times, which makes ties common
+        simulate(60, seed=6, logName="TESTREPLAY", logDir=".")
+        logs = [parse_log(f"process{pid}TESTREPLAY.txt") for pid in range(3)]
+        for pid in range(3):
+            os.remove(f"process{pid}TESTREPLAY.txt")
+        result = replay(logs)
+        self.assertEqual(result["mismatch_count"], 0)
+        self.assertTrue(result["ambiguous"])
+
+    def test_replay_send_logged_late(self):
+        def log(rows):
+            time, event, clock, messages, recipients = zip(*rows)
+            return {"time": np.array(time), "event": np.array(event), "clock": np.array(clock),
+                    "messages": np.array(messages), "recipient_count": np.array([len(r) for r in recipients]),
+                    "recipient_pids": np.array([pid for r in recipients for pid in r], dtype=np.int64)}
+        # machine 0 sends its clock (5) to machine 1 and logs it at 1.0, after machine 1 logged consuming it at 0.9
+        logs = [log([(0.1, INTERNAL, 2, 0, []), (0.2, INTERNAL, 3, 0, []), (0.3, INTERNAL, 4, 0, []),
+                     (0.4, INTERNAL, 5, 0, []), (1.0, SENT, 6, 0, [1])]),
+                log([(0.5, INTERNAL, 2, 0, []), (0.9, RECEIVED, 6, 1, []), (1.5, INTERNAL, 7, 0, [])])]
+        result = replay(logs)
+        self.assertEqual((result["mismatch_count"], result["forced"], result["clocks"]), (0, 0, [6, 7]))
+        # without the send (as if machine 0 was killed before logging it), the receive goes ahead without the message
+        logs[0] = {name: column[:4] for name, column in logs[0].items()}
+        logs[0]["recipient_pids"] = logs[0]["recipient_pids"][:0]
+        result = replay(logs)
+        self.assertEqual((result["forced"], result["missing"], result["mismatch_count"]), (1, 1, 1))
+        self.assertEqual(result["events"], 7)
+
+    def test_export(self):
+        os.makedirs("testexport", exist_ok=True)
+        simulate(10, seed=1, ticks=[1, 2, 4], logName="A", logDir="testexport")
+        simulate(10, seed=2, ticks=[3, 3], n=2, logName="B", logDir="testexport")
+        runs = get_runs("testexport")
+        self.assertEqual(list(runs), ["A", "B"])
+        self.assertEqual(list(runs["B"]), [0, 1])
+        export(runs, "testexport/runs.npz", cache_dir=None)
+        dataset = Dataset("testexport/runs.npz")
+        self.assertEqual(dataset.run_names, ["A", "B"])
+        self.assertEqual(len(dataset.column("time")), 10 * (1 + 2 + 4 + 3 + 3))
+        # a machine's rows hold exactly its log
+        log = parse_log("testexport/process2A.txt")
+        rows = dataset.rows("A", 2)
+        for name in ["time", "event", "clock", "queue", "messages", "recipient_count"]:
+            np.testing.assert_array_equal(dataset.column(name)[rows], log[name])
+        np.testing.assert_array_equal(dataset.recipient_pids(rows), log["recipient_pids"])
+        self.assertTrue((dataset.column("ticks")[rows] == 4).all())
+        self.assertTrue((dataset.column("run")[dataset.rows("B", 1)] == 1).all())
+        self.assertRaises(KeyError, dataset.rows, "B", 2)
+        np.testing.assert_array_equal(dataset.per_machine("clock"), [int(parse_log(f)["clock"][-1])
+                                                                     for files in runs.values() for f in files.values()])
+        ratios = queue_vs_tick_ratio(dataset)
+        self.assertEqual([row["tick_ratio"] for row in ratios], [4., 1.])
+        # only receives log a queue length
+        receivedQueues = [log["queue"][log["event"] == RECEIVED] for log in map(parse_log, runs["A"].values())]
+        self.assertEqual(ratios[0]["max_queue"], max(int(queue.max(initial=0)) for queue in receivedQueues))
+        np.testing.assert_array_equal(dataset.per_machine("queue", mask=dataset.column("event") == RECEIVED)[:3],
+                                      [queue.max(initial=0) for queue in receivedQueues])
+        dataset.close()
+        shutil.rmtree("testexport")
+
+    def test_format_time(self):
+        self.assertEqual(format_time(0.), "00:00:00.000000")
+        self.assertEqual(format_time(3723.25), "01:02:03.250000")
+
+    def test_simulate_deterministic(self):
+        res1 = simulate(30, seed=7, logDir=None)
+        res2 = simulate(30, seed=7, logDir=None)
+        self.assertEqual(res1, res2)
+        # every machine ticks once per 1/ticks seconds of virtual time
+        self.assertEqual(res1["events"], [30 * t for t in res1["ticks"]])
+
+    def test_simulate_logs(self):
+        simulate(10, seed=3, ticks=[1, 3, 6], logName="TESTSIM", logDir=".")
+        self.assertEqual(get_ticks("process2TESTSIM.txt"), 6)
+        res = get_clock_updates("process2TESTSIM.txt", get_start_time("process2TESTSIM.txt"))
+        self.assertEqual(len(res), 60)
+        # logical clocks never go backwards
+        self.assertTrue(all(a[1] < b[1] for a, b in zip(res, res[1:])))
+        for pid in range(3):
+            os.remove(f"process{pid}TESTSIM.txt")
     
 if __name__ == "__main__":
     unittest.main()
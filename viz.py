@@ -1,13 +1,29 @@
-import matplotlib.pyplot as plt
+import numpy as np
 from datetime import datetime
+import json
+import os
+import re
 import sys
+import time
+import zlib
 
 # code to visualize everything
+# matplotlib is only imported when a figure is drawn, since importing it takes most of a second and the
+# parsers here are also used by analysis.py, sweep.py and the tests
 
 # variable to indicate the suffix of the log file from which to read data
 LOG_NAME = "LOG"
 # variable to indicate the suffix of the names for the charts
 CHART_TAG = ""
+# how often (in seconds) the live dashboard (python viz.py LOG_NAME --live) reads new log lines and redraws
+REFRESH_INTERVAL = 1.0
+# the most points the live dashboard draws per line; older points are thinned out to stay under it
+MAX_LIVE_POINTS = 5000
+# the most points plotted per line in the saved figures (None to plot every logged event), and how they are picked:
+# "minmax" (the first, last, lowest and highest point of each slice of the time axis) or "lttb" (largest triangle three
+# buckets), see downsample
+PLOT_POINTS = 4000
+DOWNSAMPLE = "minmax"
 
 # function to read in a date time string and convert it to a datetime object
 # NOTE: don't run simulations across changes in days (across midnight), since we only record hour and below!
@@ -64,47 +80,474 @@ def get_ticks(log_file):
         data = line.split(':')
         return int(float(data[-1].strip()))
 
+# event types in parsed logs (the same codes as binlog.py)
+RECEIVED = 0
+SENT = 1
+INTERNAL = 2
+
+# where the timestamp starts in each kind of line, e.g. "[MESSAGE RECEIVED] | Global Time - " is 35 characters
+TIME_OFFSETS = {RECEIVED: 35, SENT: 34, INTERNAL: 27}
+# where the queue length starts in a receive line, after the timestamp and " | Queue Length - "
+QUEUE_OFFSET = 68
+# where the receiver list starts in a send line, after the timestamp and " | Receiver(s) - ["
+RECEIVERS_OFFSET = 67
+# " | Messages - " follows the queue length in batched receive lines (see BATCH_SIZE in process.py)
+MESSAGES_FIELD = b" | Messages - "
+# the most digits parsed for a single number
+MAX_DIGITS = 19
+
+# read the unsigned integers starting at positions pos of buf (stopping at the first non-digit, or at limit);
+# returns the values and the positions just past their last digits
+def read_int_forward(buf, pos, limit):
+    values = np.zeros(len(pos), dtype=np.int64)
+    pos = pos.copy()
+    active = pos < limit
+    for _ in range(MAX_DIGITS):
+        digit = buf[np.minimum(pos, len(buf) - 1)].astype(np.int64) - 48
+        active &= (digit >= 0) & (digit <= 9) & (pos < limit)
+        if not active.any():
+            break
+        values[active] = values[active] * 10 + digit[active]
+        pos[active] += 1
+    return values, pos
+
+# read the unsigned integers ending just before positions end of buf
+def read_int_backward(buf, end):
+    values = np.zeros(len(end), dtype=np.int64)
+    scale = np.ones(len(end), dtype=np.int64)
+    active = np.ones(len(end), dtype=bool)
+    for k in range(1, MAX_DIGITS + 1):
+        digit = buf[np.maximum(end - k, 0)].astype(np.int64) - 48
+        active &= (digit >= 0) & (digit <= 9) & (end - k >= 0)
+        if not active.any():
+            break
+        values[active] += digit[active] * scale[active]
+        scale[active] *= 10
+    return values
+
+def parse_log_bytes(data, complete=True):
+    """
+    Parses the event lines of a log (everything after the "ticks per second" header) in one vectorized pass. Every
+    field sits at a fixed position for its kind of line, except the clock, which ends each line, and the queue length
+    and receiver list, which follow fixed prefixes, so each column is read for all lines at once with NumPy. A trailing
+    line without a newline is parsed as the last event if complete is set, and is ignored otherwise (for logs still
+    being written, where it may be cut short).
+
+    Returns a dict of equal-length arrays: "time" (seconds since midnight), "event" (RECEIVED, SENT or INTERNAL),
+    "clock", "queue" (queue length, -1 for lines that are not receives), "messages" (messages consumed by a receive,
+    0 otherwise) and "recipient_count" (how many machines a send went to, 0 otherwise); plus "recipient_pids", the pids
+    every send went to, one after another in the order of the lines (see recipient_lists and recipient_rows).
+    """
+    if complete and data and not data.endswith(b"\n"):
+        data = bytes(data) + b"\n"
+    buf = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], ends[:-1] + 1))[:len(ends)]
+    n = len(ends)
+
+    event = np.full(n, RECEIVED, dtype=np.int8)
+    event[buf[starts + 8] == ord("(")] = SENT
+    event[buf[starts + 1] == ord("I")] = INTERNAL
+
+    offset = starts + np.select([event == SENT, event == INTERNAL], [TIME_OFFSETS[SENT], TIME_OFFSETS[INTERNAL]],
+                                TIME_OFFSETS[RECEIVED])
+    digit = lambda k: buf[offset + k].astype(np.int64) - 48
+    hours = digit(0) * 10 + digit(1)
+    minutes = digit(3) * 10 + digit(4)
+    seconds = digit(6) * 10 + digit(7)
+    micros = np.zeros(n, dtype=np.int64)
+    for k in range(9, 15):
+        micros = micros * 10 + digit(k)
+    time = hours * 3600 + minutes * 60 + seconds + micros / 1e6
+
+    clock = read_int_backward(buf, ends)
+
+    queue = np.full(n, -1, dtype=np.int64)
+    messages = np.zeros(n, dtype=np.int64)
+    received = np.flatnonzero(event == RECEIVED)
+    if len(received):
+        queue[received], after = read_int_forward(buf, starts[received] + QUEUE_OFFSET, ends[received])
+        messages[received] = 1
+        # batched receives carry a message count after the queue length
+        batched = np.ones(len(received), dtype=bool)
+        for k, c in enumerate(MESSAGES_FIELD):
+            batched &= buf[np.minimum(after + k, len(buf) - 1)] == c
+        if batched.any():
+            messages[received[batched]], _ = read_int_forward(buf, after[batched] + len(MESSAGES_FIELD), ends[received[batched]])
+
+    sent = np.flatnonzero(event == SENT)
+    pos = starts[sent] + RECEIVERS_OFFSET
+    active = np.ones(len(sent), dtype=bool)
+    rows, pids = [], []
+    # the receiver list is "p, q, ...]"; read one pid per pass until every list has hit its closing bracket
+    while active.any():
+        found, pos = read_int_forward(buf, pos, ends[sent])
+        rows.append(sent[active])
+        pids.append(found[active])
+        active &= buf[np.minimum(pos, len(buf) - 1)] == ord(",")
+        pos += 2
+    # the passes hold each list's first pid, then its second, ...; a stable sort by line puts every list back together
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    order = np.argsort(rows, kind="stable")
+    recipient_pids = np.concatenate(pids)[order] if pids else np.zeros(0, dtype=np.int64)
+    recipient_count = np.bincount(rows, minlength=n).astype(np.int64)
+
+    return {"time": time, "event": event, "clock": clock, "queue": queue, "messages": messages,
+            "recipient_count": recipient_count, "recipient_pids": recipient_pids}
+
+def recipient_rows(log) -> np.ndarray:
+    """
+    The line (index into the other columns) of every entry of a parsed log's "recipient_pids".
+    """
+    return np.repeat(np.arange(len(log["recipient_count"])), log["recipient_count"])
+
+def recipient_lists(log) -> list:
+    """
+    The pids every line of a parsed log sent to, as a list of lists (empty for lines that are not sends).
+    """
+    if not len(log["recipient_count"]):
+        return []
+    return [pids.tolist() for pids in np.split(log["recipient_pids"], np.cumsum(log["recipient_count"])[:-1])]
+
+def parse_log(log_file, complete=True):
+    """
+    Loads a log file once and parses it with parse_log_bytes; the result also has the file's "ticks" per second.
+    complete is passed on to parse_log_bytes; pass False for the log of a machine that may have been killed mid-line.
+    """
+    with open(log_file, 'rb') as f:
+        header = f.readline()
+        data = f.read()
+    parsed = parse_log_bytes(data, complete)
+    parsed["ticks"] = int(float(header.split(b':')[-1].strip()))
+    return parsed
+
+# where load_log keeps parsed columns between runs (None to always parse from scratch)
+CACHE_DIR = "logs/.cache"
+# the arrays parse_log_bytes returns and the types they are stored with
+COLUMNS = {"time": np.float64, "event": np.int8, "clock": np.int64, "queue": np.int64, "messages": np.int64,
+           "recipient_count": np.int64, "recipient_pids": np.int64}
+# the arrays that do not hold one entry per line, and the cache metadata field counting their entries
+LIST_COLUMNS = {"recipient_pids": "pids"}
+# bumped when the cached arrays change, so caches written by older code are rebuilt
+CACHE_FORMAT = 2
+# how many bytes at the start of a log are checksummed to tell a log that grew apart from one that was rewritten
+HEAD_BYTES = 4096
+
+def cache_paths(log_file, cache_dir):
+    path = os.path.abspath(log_file)
+    stem = os.path.join(cache_dir, f"{os.path.basename(path)}.{zlib.crc32(path.encode()):08x}")
+    return path, stem + ".json", {name: f"{stem}.{name}" for name in COLUMNS}
+
+def column_length(meta, name):
+    return meta[LIST_COLUMNS.get(name, "rows")]
+
+def read_columns(columns, meta):
+    return {name: np.memmap(path, dtype=COLUMNS[name], mode='r', shape=(column_length(meta, name),))
+            if column_length(meta, name) else np.zeros(0, dtype=COLUMNS[name]) for name, path in columns.items()}
+
+def load_log(log_file, cache_dir=CACHE_DIR):
+    """
+    parse_log with a cache for logs that are read repeatedly, e.g. to redraw the figures of a run that is still going.
+    The parsed columns are kept in cache_dir as raw arrays (memory-mapped when loaded) alongside the file's path, size,
+    modification time and how many bytes of it have been parsed. If the size and modification time are unchanged the
+    cached columns are used as they are; if the log has grown, only the bytes appended since the last call are parsed
+    and added to the cache. A log whose first bytes changed (e.g. overwritten by a new run with the same LOG_NAME) is
+    parsed from scratch. Unlike parse_log, a last line without a newline is taken to be still being written and left
+    out until it is finished (process.py ends every line with one).
+
+    Args:
+    log_file - the log to load
+    cache_dir - the cache directory (created if needed); None to skip the cache
+    """
+    if cache_dir is None:
+        return parse_log(log_file)
+    os.makedirs(cache_dir, exist_ok=True)
+    path, meta_file, columns = cache_paths(log_file, cache_dir)
+    stat = os.stat(path)
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+    if meta is not None and meta.get("format") != CACHE_FORMAT:
+        meta = None
+
+    with open(path, 'rb') as f:
+        if meta is not None and meta["path"] == path and meta["size"] == stat.st_size and \
+                meta["mtime"] == stat.st_mtime_ns:
+            f.seek(meta["offset"])
+            new = b""
+        else:
+            head = f.read(HEAD_BYTES)
+            if meta is None or meta["path"] != path or stat.st_size < meta["offset"] or \
+                    zlib.crc32(head[:meta["head_size"]]) != meta["head"]:
+                header = head.split(b"\n", 1)[0]
+                if len(header) == len(head):
+                    # not even the header line has been written yet
+                    parsed = parse_log_bytes(b"")
+                    parsed["ticks"] = 0
+                    return parsed
+                meta = {"format": CACHE_FORMAT, "path": path, "ticks": int(float(header.split(b':')[-1].strip())),
+                        "offset": len(header) + 1, "rows": 0, "pids": 0}
+                for column in columns.values():
+                    open(column, 'wb').close()
+            f.seek(meta["offset"])
+            new = f.read()
+        # everything after the last newline is a line still being written, left for a later call once it is finished
+        complete = new.rfind(b"\n") + 1
+    if complete:
+        parsed = parse_log_bytes(new[:complete], complete=False)
+        for name, column in columns.items():
+            with open(column, 'r+b') as c:
+                # drop anything past the entries the metadata knows about, in case an earlier call was interrupted
+                c.truncate(column_length(meta, name) * np.dtype(COLUMNS[name]).itemsize)
+                c.seek(0, os.SEEK_END)
+                parsed[name].astype(COLUMNS[name]).tofile(c)
+        meta["offset"] += complete
+        meta["rows"] += len(parsed["clock"])
+        meta["pids"] += len(parsed["recipient_pids"])
+    meta["size"] = stat.st_size
+    meta["mtime"] = stat.st_mtime_ns
+    meta["head_size"] = min(meta["offset"], HEAD_BYTES)
+    with open(path, 'rb') as f:
+        meta["head"] = zlib.crc32(f.read(meta["head_size"]))
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f)
+
+    result = read_columns(columns, meta)
+    result["ticks"] = meta["ticks"]
+    return result
+
+# the text logs for LOG_NAME in log_dir, as a dict from pid to file name, for however many processes were run
+def get_log_files(log_name, log_dir="logs"):
+    pattern = re.compile(r"process(\d+)" + re.escape(log_name) + r"\.txt")
+    files = {}
+    for name in os.listdir(log_dir):
+        match = pattern.fullmatch(name)
+        if match:
+            files[int(match.group(1))] = os.path.join(log_dir, name)
+    return dict(sorted(files.items()))
+
+def follow_log(log_file):
+    """
+    Generator that tails a log as it is written. Each next() reads whatever has been appended since the last one and
+    yields its complete lines parsed by parse_log_bytes, plus the file's "ticks" per second (an empty chunk if nothing
+    new was written). Yields None until the file and its header line exist.
+    """
+    while not os.path.exists(log_file):
+        yield None
+    with open(log_file, 'rb') as f:
+        pending = b""
+        while not pending.endswith(b"\n"):
+            pending += f.readline()
+            if not pending.endswith(b"\n"):
+                yield None
+        ticks = int(float(pending.split(b':')[-1].strip()))
+        pending = b""
+        while True:
+            pending += f.read()
+            complete = pending.rfind(b"\n") + 1
+            chunk = parse_log_bytes(pending[:complete], complete=False)
+            chunk["ticks"] = ticks
+            pending = pending[complete:]
+            yield chunk
+
+# indices of at most n points of (xs, ys), with xs sorted, that keep the shape of a step plot: the time axis is cut
+# into n // 4 equal slices (roughly one per pixel column) and each slice keeps its first, last, lowest and highest
+# point, so every clock jump and queue length peak survives
+def minmax_indices(xs, ys, n):
+    slices = max(n // 4, 1)
+    span = xs[-1] - xs[0]
+    if span > 0:
+        bucket = np.minimum(((xs - xs[0]) / span * slices).astype(np.int64), slices - 1)
+    else:
+        bucket = np.arange(len(xs)) * slices // len(xs)
+    # sorting by slice, then value, puts each slice's lowest point first and highest point last
+    order = np.lexsort((ys, bucket))
+    boundaries = np.flatnonzero(np.diff(bucket)) + 1
+    firsts = np.concatenate(([0], boundaries))
+    lasts = np.concatenate((boundaries - 1, [len(xs) - 1]))
+    return np.unique(np.concatenate((firsts, lasts, order[firsts], order[lasts])))
+
+# indices of n points of (xs, ys) picked by largest triangle three buckets (Steinarsson, 2013): the first and last
+# points are kept, the rest are split into n - 2 buckets, and from each bucket the point forming the largest triangle
+# with the previously picked point and the average of the next bucket is kept
+def lttb_indices(xs, ys, n):
+    ys = ys.astype(np.float64)
+    edges = (np.arange(n - 1) * ((len(xs) - 2) / (n - 2))).astype(np.int64) + 1
+    edges[-1] = len(xs) - 1
+    keep = np.zeros(n, dtype=np.int64)
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(end, edges[i + 2]) if i + 2 < n - 1 else slice(len(xs) - 1, len(xs))
+        avg_x, avg_y = xs[following].mean(), ys[following].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a]) - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = len(xs) - 1
+    return keep
+
+DOWNSAMPLERS = {"minmax": minmax_indices, "lttb": lttb_indices}
+
+def downsample(xs, ys, n=PLOT_POINTS, method=DOWNSAMPLE):
+    """
+    Reduces the series (xs, ys), with xs sorted, to at most n points for plotting.
+
+    Args:
+    xs, ys - the series, as NumPy arrays
+    n - the most points to keep (None to keep them all)
+    method - one of DOWNSAMPLERS
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"unknown downsampling method {method}, expected one of {sorted(DOWNSAMPLERS)}")
+    if n is None or len(xs) <= n or n < 4:
+        return xs, ys
+    keep = DOWNSAMPLERS[method](xs, ys, n)
+    return xs[keep], ys[keep]
+
+# the most recent points of the series (xs, ys) at full resolution, and the rest downsampled, for at most max_points in
+# all, so redrawing takes the same time however long the run is
+def thin(xs, ys, max_points, method=DOWNSAMPLE):
+    if len(xs) <= max_points:
+        return xs, ys
+    recent = max_points // 2
+    old = len(xs) - recent
+    old_xs, old_ys = downsample(xs[:old], ys[:old], max_points - recent, method)
+    return np.concatenate((old_xs, xs[old:])), np.concatenate((old_ys, ys[old:]))
+
+class Series:
+    """
+    A growing (time, value) series for the live dashboard, stored in arrays that double in size when full so appending
+    a chunk does not copy everything logged so far.
+    """
+    def __init__(self, dtype=np.int64):
+        self.xs = np.zeros(1024)
+        self.ys = np.zeros(1024, dtype=dtype)
+        self.n = 0
+
+    def append(self, xs, ys):
+        while self.n + len(xs) > len(self.xs):
+            self.xs = np.resize(self.xs, 2 * len(self.xs))
+            self.ys = np.resize(self.ys, 2 * len(self.ys))
+        self.xs[self.n:self.n + len(xs)] = xs
+        self.ys[self.n:self.n + len(ys)] = ys
+        self.n += len(xs)
+
+    def view(self, max_points):
+        return thin(self.xs[:self.n], self.ys[:self.n], max_points)
+
+def live(log_name, refresh=REFRESH_INTERVAL, max_points=MAX_LIVE_POINTS, frames=None):
+    """
+    Live dashboard: tails logs/process<pid><log_name>.txt for every process (including ones whose logs appear after it
+    starts) and redraws the clock value and queue length step plots every refresh seconds until the window is closed.
+
+    Args:
+    log_name - the LOG_NAME of the run
+    refresh - seconds between redraws
+    max_points - the most points drawn per line (see thin)
+    frames - stop after this many redraws (None to run until the window is closed)
+    """
+    import matplotlib.pyplot as plt
+    fig, (clock_ax, queue_ax) = plt.subplots(2, 1, figsize=(8, 8))
+    clock_ax.set_xlabel("Global Time (s)")
+    clock_ax.set_ylabel("Logical Clock Value")
+    clock_ax.set_title("Machine Logical Clock Values")
+    queue_ax.set_xlabel("Global Time (s)")
+    queue_ax.set_ylabel("Queue Length")
+    queue_ax.set_title("Machine Message Queue Lengths")
+    fig.tight_layout()
+    plt.ion()
+    plt.show()
+
+    # per pid: the log's generator, its plotted lines, and the series for each line
+    followers, lines, clocks, queues = {}, {}, {}, {}
+    st = None
+    frame = 0
+    while plt.fignum_exists(fig.number) and (frames is None or frame < frames):
+        for pid, log_file in get_log_files(log_name).items():
+            if pid not in followers:
+                followers[pid] = follow_log(log_file)
+                clocks[pid], queues[pid] = Series(), Series()
+        for pid, follower in followers.items():
+            chunk = next(follower)
+            if chunk is None:
+                continue
+            if pid not in lines:
+                label = f"Machine {pid}, {chunk['ticks']} ticks/s"
+                lines[pid] = (clock_ax.step([], [], label=label)[0], queue_ax.step([], [], label=label)[0])
+                clock_ax.legend(loc=2)
+                queue_ax.legend(loc=2)
+            received = chunk["event"] == RECEIVED
+            clocks[pid].append(chunk["time"], chunk["clock"])
+            queues[pid].append(chunk["time"][received], chunk["queue"][received])
+        # the start time for the whole system is the earliest timestamp seen in any log
+        starts = [c.xs[0] for c in clocks.values() if c.n]
+        if starts and st is None:
+            st = min(starts)
+        if st is not None:
+            for pid, (clock_line, queue_line) in lines.items():
+                xs, ys = clocks[pid].view(max_points)
+                clock_line.set_data(xs - st, ys)
+                xs, ys = queues[pid].view(max_points)
+                queue_line.set_data(xs - st, ys)
+            for ax in (clock_ax, queue_ax):
+                ax.relim()
+                ax.autoscale_view()
+        fig.canvas.draw_idle()
+        plt.pause(refresh)
+        frame += 1
+    return fig
+
 if __name__ == "__main__":
     # optionally specify the log file suffix
-    if len(sys.argv) >= 2:
+    if len(sys.argv) >= 2 and sys.argv[1] != "--live":
         LOG_NAME = str(sys.argv[1])
         
     # optionally provide a chart title suffix
-    if len(sys.argv) >= 3:
+    if len(sys.argv) >= 3 and sys.argv[2] != "--live":
         CHART_TAG = str(sys.argv[2])
+
+    # with --live, watch the logs of a run in progress instead of saving figures
+    if "--live" in sys.argv:
+        live(LOG_NAME)
+        sys.exit(0)
+    import matplotlib.pyplot as plt
             
-    # get the log filenames
-    process_filenames = []
-    for i in range(3):
-        process_filenames.append(f"logs/process{i}" + LOG_NAME + ".txt")
+    # get the log filenames, one per process
+    log_files = get_log_files(LOG_NAME)
+    pids, process_filenames = list(log_files), list(log_files.values())
+    # parse each log once (or only what was appended since the last run, see load_log); both plots share the columns
+    logs = [load_log(f) for f in process_filenames]
     # find ticks/sec for each logged process
-    ticks = [get_ticks(f) for f in process_filenames]
+    ticks = [log["ticks"] for log in logs]
     # set the start time for the entire system to be the earliest recorded global timestamp across all processes
-    st = min([get_start_time(f) for f in process_filenames])
-    print(f"global start time: {st.strftime('%H:%M:%S.%f')}")
+    st = min(log["time"][0] for log in logs)
+    print(f"global start time: {int(st // 3600):02d}:{int(st % 3600 // 60):02d}:{st % 60:09.6f}")
     
     # PLOT THE CLOCK VALUES
+    start = time.perf_counter()
     plt.figure()
-    for i in range(3):
-        process_clock_updates = get_clock_updates(process_filenames[i], st)
-        xs = [x[0] for x in process_clock_updates]
-        ys = [x[1] for x in process_clock_updates]
-        plt.step(xs, ys, label=f"Machine {i}, {ticks[i]} ticks/s")
+    for i in range(len(logs)):
+        xs, ys = downsample(logs[i]["time"] - st, logs[i]["clock"])
+        plt.step(xs, ys, label=f"Machine {pids[i]}, {ticks[i]} ticks/s")
     plt.legend(loc=2)
     plt.xlabel("Global Time (s)")
     plt.ylabel("Logical Clock Value")
     plt.title("Machine Logical Clock Values")
     plt.savefig(f"figures/clock_updates{CHART_TAG}.png")
+    print(f"clock values plotted in {time.perf_counter() - start:.2f}s")
     
     # PLOT THE MESSAGE QUEUE LENGTHS
+    start = time.perf_counter()
     plt.figure()
-    for i in range(3):
-        queue_lengths = get_queue_lengths(process_filenames[i], st)
-        xs = [x[0] for x in queue_lengths]
-        ys = [x[1] for x in queue_lengths]
-        plt.step(xs, ys, label=f"Machine {i}, {ticks[i]} ticks/s")
+    for i in range(len(logs)):
+        received = logs[i]["event"] == RECEIVED
+        xs, ys = downsample(logs[i]["time"][received] - st, logs[i]["queue"][received])
+        plt.step(xs, ys, label=f"Machine {pids[i]}, {ticks[i]} ticks/s")
     plt.legend(loc=2)
     plt.xlabel("Global Time (s)")
     plt.ylabel("Queue Length")
     plt.title("Machine Message Queue Lengths")
-    plt.savefig(f"figures/queue_lengths{CHART_TAG}.png")
\ No newline at end of file
+    plt.savefig(f"figures/queue_lengths{CHART_TAG}.png")
+    print(f"queue lengths plotted in {time.perf_counter() - start:.2f}s")
\ No newline at end of file
@@ -0,0 +1,155 @@
+import socket
+import struct
+import time
+
+from tracing import get_tracer
+
+# wire format for clock updates sent between machines. Every frame is
+#   length (uint32) | sender pid (uint16) | sequence number (uint32) | count (uint16) | count x clock (uint64)
+# all big-endian, where length is the number of bytes that follow it. A frame can carry several clock updates, so a
+# sender with more than one update pending for the same machine writes them with a single syscall. Because TCP is a
+# byte stream, a recv can return part of a frame or several frames at once; FrameDecoder reassembles them.
+
+HEADER = struct.Struct(">IHIH")
+CLOCK = struct.Struct(">Q")
+# bytes of the header after the length field
+HEADER_BODY = HEADER.size - 4
+# the most clock updates a single frame can carry (count is a uint16)
+MAX_CLOCKS = 0xFFFF
+# how many bytes to ask for per recv; a read can return any number of complete or partial frames
+RECV_SIZE = 4096
+# sequence numbers wrap around at 2^32
+SEQ_MOD = 1 << 32
+# connection retries back off exponentially: the first retry waits CONNECT_DELAY seconds, and every one after that
+# waits twice as long as the last, up to CONNECT_MAX_DELAY
+CONNECT_DELAY = 0.05
+CONNECT_MAX_DELAY = 2.0
+
+def encode_frame(sender: int, seq: int, clocks: list) -> bytes:
+    """
+    Packs clock updates into one frame.
+
+    Args:
+    sender - pid of the sending machine
+    seq - sequence number of the frame on its link (wraps around at 2^32)
+    clocks - the clock values to send, at most MAX_CLOCKS of them
+    """
+    if len(clocks) > MAX_CLOCKS:
+        raise ValueError(f"a frame carries at most {MAX_CLOCKS} clocks, got {len(clocks)}")
+    return HEADER.pack(HEADER_BODY + CLOCK.size * len(clocks), sender, seq % SEQ_MOD, len(clocks)) + \
+        struct.pack(f">{len(clocks)}Q", *clocks)
+
+class FrameDecoder:
+    """
+    Streaming decoder for frames read off a socket. Feed it whatever each recv returns and it hands back the frames
+    completed so far as (sender, seq, clocks) tuples, keeping any trailing partial frame for the next call.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        self.buffer += data
+        frames = []
+        offset = 0
+        while len(self.buffer) - offset >= HEADER.size:
+            length, sender, seq, count = HEADER.unpack_from(self.buffer, offset)
+            if length != HEADER_BODY + CLOCK.size * count:
+                raise ValueError(f"corrupt frame: length {length} does not match {count} clocks")
+            end = offset + 4 + length
+            if end > len(self.buffer):
+                break
+            frames.append((sender, seq, list(struct.unpack_from(f">{count}Q", self.buffer, offset + HEADER.size))))
+            offset = end
+        # drop consumed bytes in one go rather than once per frame
+        del self.buffer[:offset]
+        return frames
+
+class Link:
+    """
+    The sending end of a connection to another machine. Numbers the frames it writes, and can either send clock updates
+    straight away (send) or hold them and write them all as one frame with one syscall (add, then flush).
+
+    Args:
+    sock - a connected socket
+    sender - pid of the sending machine
+    """
+    def __init__(self, sock, sender: int):
+        self.sock = sock
+        self.sender = sender
+        self.seq = 0
+        self.pending = []
+
+    def add(self, clock: int):
+        self.pending.append(clock)
+
+    def flush(self):
+        # frames are capped at MAX_CLOCKS clocks, so a very large backlog is split into several frames (one syscall)
+        if not self.pending:
+            return
+        frames = []
+        for start in range(0, len(self.pending), MAX_CLOCKS):
+            frames.append(encode_frame(self.sender, self.seq, self.pending[start:start + MAX_CLOCKS]))
+            self.seq = (self.seq + 1) % SEQ_MOD
+        self.pending = []
+        self.sock.sendall(b"".join(frames))
+
+    def send(self, clock: int):
+        self.add(clock)
+        self.flush()
+
+    def close(self):
+        self.sock.close()
+
+
+def connect(address: tuple, timeout: float = None, delay: float = CONNECT_DELAY, maxDelay: float = CONNECT_MAX_DELAY):
+    """
+    Connects a TCP socket to address, retrying with exponential backoff while the other end is not accepting
+    connections yet (or can't be reached); returns the connected socket.
+
+    Args:
+    address - (host, port) of the server
+    timeout - give up after this many seconds (None to keep trying), raising the last connection error
+    delay - seconds to wait before the first retry
+    maxDelay - the longest wait between retries
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection(address)
+        except OSError:
+            if deadline is not None and time.monotonic() + delay > deadline:
+                raise
+        time.sleep(delay)
+        delay = min(delay * 2, maxDelay)
+
+class ReconnectingLink(Link):
+    """
+    A Link that opens its own connection (see connect) and keeps it: when a send fails, it reconnects and sends the
+    updates again, instead of leaving the caller with a dead socket. Updates in a frame that was partly written before
+    the connection broke can arrive twice, which a receiver taking the maximum of its clock and the update tolerates;
+    as with any TCP connection, updates written shortly before the other end went away can also be lost.
+
+    Args:
+    address - (host, port) of the other machine's server
+    sender - pid of the sending machine
+    timeout - how long (in seconds) each connection attempt keeps retrying before the error is raised (None: forever)
+    """
+    def __init__(self, address: tuple, sender: int, timeout: float = None):
+        self.address = address
+        self.timeout = timeout
+        # how many times the connection has been reestablished
+        self.reconnects = 0
+        super().__init__(connect(address, timeout), sender)
+
+    def flush(self):
+        pending = self.pending
+        while True:
+            try:
+                super().flush()
+                return
+            except OSError as e:
+                get_tracer(self.sender).warning("lost connection to %s:%d (%s), reconnecting", *self.address, e)
+                self.sock.close()
+                self.sock = connect(self.address, self.timeout)
+                self.reconnects += 1
+                self.pending = pending